@@ -0,0 +1,88 @@
+from registry_value import value_text
+
+
+ACCESS_TOKEN_PATTERN = "neon_access_token_h"
+
+
+def get_value(values, pattern):
+    for key, value_data in values.items():
+        if key.startswith(pattern):
+            return value_data
+    return None
+
+
+def get_value_data(values, pattern):
+    # The decoded text without its NUL padding, cached on RegistryValue.
+    value_data = get_value(values, pattern)
+    return None if value_data is None else value_text(value_data)
+
+
+def split_prefix(token):
+    parts = token.split('|')
+    if len(parts) < 4:
+        return None
+    return '|'.join(parts[:4])
+
+
+def token_prefix(values):
+    if hasattr(values, 'prefix'):
+        return values.prefix
+    token = get_value_data(values, ACCESS_TOKEN_PATTERN)
+    if not token:
+        return None
+    return split_prefix(token)
+
+
+class TokenPrefixIndex:
+    """Maps the first four '|' fields of a saved access token to account names.
+
+    Several saved accounts can share a prefix; lookups return the earliest one
+    added, which matches the first hit of a scan in dict order.
+    """
+
+    def __init__(self, accounts=None):
+        self.by_prefix = {}
+        self.by_name = {}
+        if accounts:
+            self.rebuild(accounts)
+
+    def rebuild(self, accounts):
+        self.by_prefix = {}
+        self.by_name = {}
+        for name, values in accounts.items():
+            self.add(name, values)
+
+    def add(self, name, values):
+        prefix = token_prefix(values)
+        if prefix is not None and self.by_name.get(name) == prefix:
+            # Re-saving under the same prefix keeps the account's place, as
+            # overwriting it keeps its place in the store's dict.
+            return
+        self.remove(name)
+        if prefix is None:
+            return
+        self.by_name[name] = prefix
+        self.by_prefix.setdefault(prefix, []).append(name)
+
+    def remove(self, name):
+        prefix = self.by_name.pop(name, None)
+        if prefix is None:
+            return
+        names = self.by_prefix.get(prefix)
+        if names:
+            names.remove(name)
+            if not names:
+                del self.by_prefix[prefix]
+
+    def rename(self, old_name, new_name):
+        prefix = self.by_name.pop(old_name, None)
+        if prefix is None:
+            return
+        names = self.by_prefix[prefix]
+        names.remove(old_name)
+        names.append(new_name)
+        self.by_name[new_name] = prefix
+
+    def lookup(self, prefix):
+        names = self.by_prefix.get(prefix)
+        return names[0] if names else None
@@ -0,0 +1,173 @@
+import json
+import time
+from collections import OrderedDict
+from datetime import datetime
+
+from account_index import get_value, ACCESS_TOKEN_PATTERN
+from perf_timings import timings
+from registry_value import value_text
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+AUTH_MEMBER_PATTERN = "neon_auth_member_h"
+
+# orjson parses the auth-member document several times faster when it is
+# installed; its errors subclass json.JSONDecodeError.
+json_loads = orjson.loads if orjson is not None else json.loads
+
+
+def parse_auth_member(auth_member, info):
+    try:
+        data = json_loads(auth_member)
+
+        reg_path = data.get('reg_path', '')
+        if reg_path:
+            if reg_path.startswith('FIREBASE_'):
+                info['platform'] = reg_path.split('_', 1)[1]
+            else:
+                info['platform'] = reg_path
+
+        reg_nation = data.get('reg_nation', '')
+        if reg_nation:
+            info['reg_nation'] = reg_nation
+
+        crt_dt = data.get('crt_dt')
+        if crt_dt:
+            dt = datetime.fromtimestamp(crt_dt / 1000)
+            info['create_time'] = dt.strftime('%Y-%m-%d')
+    except (json.JSONDecodeError, ValueError, KeyError, AttributeError):
+        pass
+
+
+def parse_token_timestamp(access_token):
+    try:
+        parts = access_token.split('|')
+        if len(parts) >= 6:
+            return int(parts[5])
+    except (ValueError, IndexError):
+        pass
+    return None
+
+
+def parse_raw_info(auth_member, access_token):
+    info = {'platform': '', 'create_time': '', 'reg_nation': '', 'token_ts': None}
+    if auth_member:
+        parse_auth_member(auth_member, info)
+    if access_token:
+        info['token_ts'] = parse_token_timestamp(access_token)
+    return info
+
+
+class AccountInfo:
+    """Parsed fields of one account, read like the dict parse_raw_info returns.
+
+    token_ts is parsed up front, since matching and the stale-token timer
+    want it for every account. The neon_auth_member_h JSON behind platform,
+    reg_nation and create_time is only parsed when one of them is first read,
+    so accounts that are never displayed or searched never pay for it.
+    """
+
+    __slots__ = ('auth_member', 'token_ts', 'fields')
+
+    def __init__(self, auth_member, token_ts):
+        self.auth_member = auth_member
+        self.token_ts = token_ts
+        self.fields = None
+
+    def __getitem__(self, key):
+        if key == 'token_ts':
+            return self.token_ts
+        if self.fields is None:
+            start = time.perf_counter()
+            fields = {'platform': '', 'create_time': '', 'reg_nation': ''}
+            auth_member = value_text(self.auth_member) if self.auth_member is not None else None
+            if auth_member:
+                parse_auth_member(auth_member, fields)
+            self.fields = fields
+            self.auth_member = None
+            timings.record('parse_auth_member', start, time.perf_counter() - start)
+        return self.fields[key]
+
+
+def format_token_age(token_ts, lang, now=None):
+    if token_ts is None:
+        return ''
+    if now is None:
+        now = time.time()
+
+    total_seconds = int(now - token_ts / 1000)
+    days = total_seconds // 86400
+    hours = (total_seconds % 86400) // 3600
+    minutes = (total_seconds % 3600) // 60
+
+    if total_seconds < 3600:
+        return f"{minutes}分钟前" if lang == 'zh' else f"{minutes}m ago"
+    elif total_seconds < 86400:
+        return f"{hours}小时前" if lang == 'zh' else f"{hours}h ago"
+    return f"{days}天{hours}小时前" if lang == 'zh' else f"{days}d {hours}h ago"
+
+
+def blob_key(value_data):
+    # The stored string itself, base64 or earlier versions' text: a lookup
+    # decodes nothing, and Python caches the string's hash after the first.
+    if isinstance(value_data, dict):
+        return value_data.get('b64', value_data.get('data'))
+    return value_data
+
+
+class AccountInfoCache:
+    """Bounded LRU of parsed account fields keyed by the stored blob strings.
+
+    Entries are AccountInfo, holding the platform, reg_nation, create_time
+    and the token timestamp; relative ages are formatted from token_ts by the
+    caller.
+
+    The bound follows `accounts`, the live dict of the store: room for every
+    account's current values and as many again for values just replaced, and
+    never less than `min_size`. A fixed bound below the account count would
+    evict each entry before the next pass over the list reads it again.
+    """
+
+    def __init__(self, accounts=None, min_size=1024):
+        self.accounts = accounts if accounts is not None else {}
+        self.min_size = min_size
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def max_size(self):
+        return max(self.min_size, 2 * len(self.accounts))
+
+    def get(self, values):
+        info = getattr(values, 'info', None)
+        if info is not None:
+            # Values loaded from the SQLite store come with their parsed fields.
+            return info
+
+        auth_member = get_value(values, AUTH_MEMBER_PATTERN)
+        access_token = get_value(values, ACCESS_TOKEN_PATTERN)
+        key = (blob_key(auth_member), blob_key(access_token))
+
+        info = self.entries.get(key)
+        if info is not None:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return info
+
+        self.misses += 1
+        start = time.perf_counter()
+        token = value_text(access_token) if access_token is not None else None
+        info = AccountInfo(auth_member, parse_token_timestamp(token) if token else None)
+        self.entries[key] = info
+        if len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+        timings.record('account_info_miss', start, time.perf_counter() - start)
+        return info
+
+    def clear(self):
+        self.entries.clear()
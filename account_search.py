@@ -0,0 +1,159 @@
+def trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def attribute_values(info):
+    values = {info['platform'].lower(), info['reg_nation'].lower(), info['create_time']}
+    values.discard('')
+    return tuple(values)
+
+
+class AccountSearchIndex:
+    """Type-ahead filter over account name, platform, reg_nation and registration date.
+
+    A term matches an account when it is a case-insensitive substring of one
+    of those fields; a query of several space-separated terms keeps the
+    accounts matching all of them. Names are indexed by character trigrams.
+    Platform, nation and date take few distinct values, so each distinct value
+    maps straight to its accounts and a lookup only scans those values. Terms
+    shorter than a trigram match too much for an index to help and scan the
+    per-account search texts instead.
+
+    Typing usually extends the previous query, so its result is kept and a
+    query implied by it is answered by narrowing that result. Any add,
+    remove or rename drops the kept result.
+
+    The index is built on the first search, so a session that never filters
+    does not pay for it; until then changes only update the pending infos.
+    """
+
+    def __init__(self, infos=None):
+        self.names = {}
+        self.attributes = {}
+        # Lowercased fields joined by newlines, which a term never contains.
+        self.texts = {}
+        self.by_gram = {}
+        self.by_value = {}
+        self.last_terms = None
+        self.last_result = None
+        self.pending = dict(infos or {})
+
+    def build(self):
+        pending, self.pending = self.pending, None
+        for name, info in pending.items():
+            self.add(name, info)
+
+    def add(self, name, info):
+        if self.pending is not None:
+            self.pending[name] = info
+            return
+        self.remove(name)
+        self.index_name(name)
+        values = self.attributes[name] = attribute_values(info)
+        for value in values:
+            self.by_value.setdefault(value, set()).add(name)
+        self.texts[name] = '\n'.join((self.names[name],) + values)
+
+    def index_name(self, name):
+        key = self.names[name] = name.lower()
+        for gram in trigrams(key):
+            self.by_gram.setdefault(gram, set()).add(name)
+        self.last_terms = None
+
+    def unindex_name(self, name):
+        for gram in trigrams(self.names.pop(name)):
+            names = self.by_gram[gram]
+            names.discard(name)
+            if not names:
+                del self.by_gram[gram]
+        self.last_terms = None
+
+    def remove(self, name):
+        if self.pending is not None:
+            self.pending.pop(name, None)
+            return
+        if name not in self.names:
+            return
+        self.unindex_name(name)
+        del self.texts[name]
+        for value in self.attributes.pop(name):
+            names = self.by_value[value]
+            names.discard(name)
+            if not names:
+                del self.by_value[value]
+
+    def rename(self, old_name, new_name):
+        if self.pending is not None:
+            if old_name in self.pending:
+                self.pending[new_name] = self.pending.pop(old_name)
+            return
+        if old_name not in self.names:
+            return
+        self.unindex_name(old_name)
+        self.index_name(new_name)
+        values = self.attributes[new_name] = self.attributes.pop(old_name)
+        del self.texts[old_name]
+        self.texts[new_name] = '\n'.join((self.names[new_name],) + values)
+        for value in values:
+            names = self.by_value[value]
+            names.discard(old_name)
+            names.add(new_name)
+
+    def lookup(self, term):
+        if len(term) < 3:
+            return {name for name, text in self.texts.items() if term in text}
+        result = set()
+        for value, names in self.by_value.items():
+            if term in value:
+                result |= names
+        postings = []
+        for gram in trigrams(term):
+            names = self.by_gram.get(gram)
+            if names is None:
+                return result
+            postings.append(names)
+        postings.sort(key=len)
+        candidates = postings[0].intersection(*postings[1:])
+        result.update(name for name in candidates if term in self.names[name])
+        return result
+
+    def candidate_count(self, term):
+        # Rough cost of lookup(term) in names filtered one by one: a plain
+        # scan of the texts runs about three times faster per name, and the
+        # attribute sets are merged by set unions, about ten times faster.
+        if len(term) < 3:
+            return len(self.texts) // 3
+        count = min(len(self.by_gram.get(gram, ())) for gram in trigrams(term))
+        return count + sum(len(names) for value, names in self.by_value.items() if term in value) // 10
+
+    def search(self, query):
+        """Returns the set of matching names, or None for an empty query."""
+        terms = query.lower().split()
+        if not terms:
+            return None
+        if self.pending is not None:
+            self.build()
+        last_terms = self.last_terms
+        if last_terms is not None and all(any(old in term for term in terms) for old in last_terms):
+            # Every account matching `terms` also matched the last query, so
+            # only the terms that changed are checked against its result,
+            # unless the index finds fewer candidates than that result holds.
+            result = self.last_result
+            texts = self.texts
+            for term in terms:
+                if term in last_terms:
+                    continue
+                if self.candidate_count(term) < len(result):
+                    result = result & self.lookup(term)
+                else:
+                    result = {name for name in result if term in texts[name]}
+        else:
+            result = None
+            for term in sorted(terms, key=len, reverse=True):
+                found = self.lookup(term)
+                result = found if result is None else result & found
+                if not result:
+                    break
+        self.last_terms = terms
+        self.last_result = result
+        return result
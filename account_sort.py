@@ -0,0 +1,55 @@
+from bisect import bisect_left, insort
+
+
+SORT_FIELDS = ('name', 'platform', 'reg_nation', 'create_time', 'token_ts')
+
+
+def sort_key(field, name, info):
+    # Accounts without the field sort after the rest; the name breaks ties,
+    # which also makes every key unique so bisect finds exactly one entry.
+    if field == 'name':
+        return (name.lower(), name)
+    value = info[field]
+    if field == 'token_ts':
+        return (value is None, value or 0, name)
+    return (not value, value.lower(), name)
+
+
+class SortedAccountIndex:
+    """Account names kept in order by name, platform, region, date or token time.
+
+    Each order is a sorted list of sort keys, built on first use and then
+    kept sorted with bisect as single accounts are added, removed or
+    renamed, so a refreshed token moves one entry instead of re-sorting
+    the store. token_ts ascending lists the oldest tokens first.
+    """
+
+    def __init__(self, infos=None):
+        self.infos = dict(infos or {})
+        self.orders = {}
+
+    def add(self, name, info):
+        self.remove(name)
+        self.infos[name] = info
+        for field, order in self.orders.items():
+            insort(order, sort_key(field, name, info))
+
+    def remove(self, name):
+        info = self.infos.pop(name, None)
+        if info is None:
+            return
+        for field, order in self.orders.items():
+            del order[bisect_left(order, sort_key(field, name, info))]
+
+    def rename(self, old_name, new_name):
+        info = self.infos.get(old_name)
+        if info is not None:
+            self.remove(old_name)
+            self.add(new_name, info)
+
+    def names(self, field, reverse=False):
+        order = self.orders.get(field)
+        if order is None:
+            order = self.orders[field] = sorted(sort_key(field, name, info) for name, info in self.infos.items())
+        keys = reversed(order) if reverse else order
+        return [key[-1] for key in keys]
@@ -0,0 +1,337 @@
+import os
+import json
+import threading
+from pathlib import Path
+
+from perf_timings import timed
+from registry_value import value_hook
+
+
+WARNING_TEXT = 'This file contains sensitive account data. Do NOT share or upload publicly.'
+
+
+class PassphraseError(ValueError):
+    """An encrypted store could not be unlocked; the data on disk is left as it is.
+
+    Defined here rather than in encrypted_store so the frontends can catch it
+    without importing cryptography on every start.
+    """
+
+
+def export_text(accounts):
+    data = {'_config': {'_warning': WARNING_TEXT}}
+    data.update((name, dict(values)) for name, values in accounts.items())
+    return json.dumps(data, ensure_ascii=False, indent=2)
+
+
+def create_store(data_file, writer=None, spec=None, passphrase=None):
+    # BD2_ACCOUNT_STORE selects the storage: "journal" (accounts.json plus
+    # accounts.journal), "sqlite" (accounts.db), "binary" (accounts.bd2),
+    # "encrypted" (accounts.enc) or "blobs" (accounts.blobs, deduplicated and
+    # with per-account history); the others are seeded from accounts.json.
+    # Without it an existing accounts.db, .bd2, .enc or .blobs wins.
+    # `passphrase` is a callable asked for the key of an encrypted store.
+    data_file = Path(data_file)
+    db_file = data_file.with_suffix('.db')
+    bin_file = data_file.with_suffix('.bd2')
+    enc_file = data_file.with_suffix('.enc')
+    blob_file = data_file.with_suffix('.blobs')
+    if spec is None:
+        spec = os.environ.get('BD2_ACCOUNT_STORE', '')
+    if not spec:
+        spec = ('sqlite' if db_file.exists() else 'binary' if bin_file.exists()
+                else 'encrypted' if enc_file.exists() else 'blobs' if blob_file.exists() else 'journal')
+    if spec == 'sqlite':
+        from sqlite_store import SqliteAccountStore
+        return SqliteAccountStore(db_file, import_file=data_file, writer=writer)
+    if spec == 'binary':
+        from binary_store import BinaryAccountStore
+        return BinaryAccountStore(bin_file, import_file=data_file, writer=writer)
+    if spec == 'encrypted':
+        from encrypted_store import EncryptedAccountStore
+        return EncryptedAccountStore(enc_file, passphrase, import_file=data_file, writer=writer)
+    if spec == 'blobs':
+        from blob_store import BlobAccountStore
+        return BlobAccountStore(blob_file, import_file=data_file, writer=writer)
+    return JournaledAccountStore(data_file, writer=writer)
+
+
+def write_atomic(path, text):
+    tmp_path = Path(str(path) + '.tmp')
+    with open(tmp_path, 'wb') as f:
+        f.write(text if isinstance(text, bytes) else text.encode('utf-8'))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+class JournaledAccountStore:
+    """accounts.json snapshot plus an append-only journal of later mutations.
+
+    Every put/delete/rename is appended to the journal as one
+    JSON line and fsynced, so a single-account update costs one small record.
+    Once the journal grows past `compact_threshold` records, a background
+    thread folds it into a new snapshot written through an atomic rename and
+    trims the folded records. A torn trailing journal line is discarded on
+    load; the snapshot itself is never rewritten in place.
+
+    The config lives in a small sidecar (accounts.config.json) so the UI
+    language can be picked before the account payload is decoded. The store
+    is parsed at most once; later load() calls return the same dicts.
+    """
+
+    def __init__(self, data_file, journal_file=None, config_file=None, compact_threshold=200, writer=None):
+        self.data_file = Path(data_file)
+        self.journal_file = Path(journal_file) if journal_file else self.data_file.with_suffix('.journal')
+        self.config_file = Path(config_file) if config_file else self.data_file.with_suffix('.config.json')
+        self.compact_threshold = compact_threshold
+        self.config = {}
+        self.accounts = {}
+        self.tags = {}
+        self.seq = 0
+        self.snapshot_seq = 0
+        self.pending = 0
+        self.loaded = False
+        self.load_error = None
+        self.lock = threading.RLock()
+        # Held for a whole compaction so an explicit compact() and the
+        # background one never write the snapshot at the same time.
+        self.compact_lock = threading.Lock()
+        self.compactor = None
+        # Optional callable taking a zero-argument job; lets a UI push journal
+        # writes onto its background worker. Records stay in order as long as
+        # the writer runs jobs serially.
+        self.writer = writer
+
+    def load_config(self):
+        with self.lock:
+            if self.loaded:
+                return self.config
+            sidecar = self._read_sidecar()
+            if sidecar is not None:
+                self.config = sidecar
+                return self.config
+            # Stores written before the sidecar existed keep their config in
+            # the snapshot, so parse it now and keep the result for load().
+            try:
+                self.load()
+            except ValueError:
+                pass
+            return self.config
+
+    def _read_sidecar(self):
+        if not self.config_file.exists():
+            return None
+        try:
+            with open(self.config_file, 'r', encoding='utf-8') as f:
+                config = json.load(f)
+        except ValueError:
+            return None
+        return config if isinstance(config, dict) else None
+
+    def load(self):
+        with self.lock:
+            if not self.loaded:
+                self._load()
+            if self.load_error is not None:
+                raise self.load_error
+            return self.config, self.accounts
+
+    def _load(self):
+        self.config = {}
+        self.accounts = {}
+        self.tags = {}
+        self.seq = 0
+        try:
+            self._load_snapshot()
+        except (json.JSONDecodeError, ValueError) as e:
+            self.load_error = e
+        self.snapshot_seq = self.seq
+        self._replay_journal()
+        sidecar = self._read_sidecar()
+        if sidecar is not None:
+            self.config = sidecar
+        self.loaded = True
+
+    def _load_snapshot(self):
+        if not self.data_file.exists():
+            return
+        with open(self.data_file, 'r', encoding='utf-8') as f:
+            content = f.read().strip()
+        if not content:
+            return
+        data = json.loads(content, object_hook=value_hook)
+        config = dict(data.get('_config', {}))
+        self.seq = config.pop('_journal_seq', 0)
+        config.pop('_warning', None)
+        self.tags = config.pop('_tags', {})
+        self.config = config
+        self.accounts = {k: v for k, v in data.items() if k != '_config'}
+
+    def _replay_journal(self):
+        if not self.journal_file.exists():
+            return
+        valid_length = 0
+        with open(self.journal_file, 'rb') as f:
+            for line in f:
+                if not line.endswith(b'\n'):
+                    break
+                try:
+                    record = json.loads(line, object_hook=value_hook)
+                except ValueError:
+                    break
+                valid_length += len(line)
+                if record.get('seq', 0) <= self.snapshot_seq:
+                    continue
+                self._apply(record)
+                self.seq = record['seq']
+                self.pending += 1
+        if valid_length != self.journal_file.stat().st_size:
+            with open(self.journal_file, 'r+b') as f:
+                f.truncate(valid_length)
+
+    def _apply(self, record):
+        op = record.get('op')
+        if op == 'put':
+            self.accounts[record['name']] = record['values']
+        elif op == 'delete':
+            self.accounts.pop(record['name'], None)
+            self.tags.pop(record['name'], None)
+        elif op == 'rename':
+            if record['old'] in self.accounts:
+                self.accounts[record['new']] = self.accounts.pop(record['old'])
+            if record['old'] in self.tags:
+                self.tags[record['new']] = self.tags.pop(record['old'])
+        elif op in ('tag', 'untag'):
+            # Tag lists are replaced, never mutated, so compaction can copy
+            # the dict shallowly.
+            for name in record['names']:
+                tags = set(self.tags.get(name, ()))
+                if op == 'tag':
+                    tags.add(record['tag'])
+                else:
+                    tags.discard(record['tag'])
+                if tags:
+                    self.tags[name] = sorted(tags)
+                else:
+                    self.tags.pop(name, None)
+        elif op == 'batch':
+            for item in record['ops']:
+                self._apply(item)
+        elif op == 'config':
+            self.config = dict(record['config'])
+
+    def _append(self, record):
+        self.seq += 1
+        record['seq'] = self.seq
+        line = json.dumps(record, ensure_ascii=False) + '\n'
+        if self.writer is None:
+            self._write_line(line)
+        else:
+            self.writer(lambda: self._write_line(line))
+        self.pending += 1
+        if self.pending >= self.compact_threshold:
+            self.compact_async()
+
+    @timed('journal_write')
+    def _write_line(self, line):
+        with self.lock:
+            with open(self.journal_file, 'a', encoding='utf-8') as f:
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+
+    def commit(self, record):
+        with self.lock:
+            self._apply(record)
+            self._append(record)
+
+    def put(self, name, values):
+        self.commit({'op': 'put', 'name': name, 'values': values})
+
+    def delete(self, name):
+        self.commit({'op': 'delete', 'name': name})
+
+    def rename(self, old_name, new_name):
+        self.commit({'op': 'rename', 'old': old_name, 'new': new_name})
+
+    def apply_batch(self, ops):
+        # The whole batch is one journal line, so it lands or tears as a unit.
+        if ops:
+            self.commit({'op': 'batch', 'ops': list(ops)})
+
+    def delete_many(self, names):
+        self.apply_batch([{'op': 'delete', 'name': name} for name in names])
+
+    def tag_many(self, names, tag, remove=False):
+        self.commit({'op': 'untag' if remove else 'tag', 'names': list(names), 'tag': tag})
+
+    def set_config(self, config):
+        with self.lock:
+            self.config = dict(config)
+            write_atomic(self.config_file, json.dumps(self.config, ensure_ascii=False, indent=2))
+
+    def snapshot_accounts(self):
+        return dict(self.accounts)
+
+    def encode_snapshot(self, config, accounts, tags, seq):
+        data = {
+            '_config': {
+                **config,
+                '_warning': WARNING_TEXT,
+                '_tags': tags,
+                '_journal_seq': seq
+            }
+        }
+        data.update(accounts)
+        return json.dumps(data, ensure_ascii=False, indent=2)
+
+    @timed('compact')
+    def compact(self):
+        with self.compact_lock:
+            with self.lock:
+                config = dict(self.config)
+                accounts = self.snapshot_accounts()
+                tags = dict(self.tags)
+                seq = self.seq
+
+            write_atomic(self.data_file, self.encode_snapshot(config, accounts, tags, seq))
+            if not self.config_file.exists():
+                write_atomic(self.config_file, json.dumps(config, ensure_ascii=False, indent=2))
+
+            with self.lock:
+                self.snapshot_seq = seq
+                self._trim_journal(seq)
+
+    def _trim_journal(self, seq):
+        if not self.journal_file.exists():
+            self.pending = 0
+            return
+        kept = []
+        with open(self.journal_file, 'rb') as f:
+            for line in f:
+                try:
+                    if json.loads(line).get('seq', 0) > seq:
+                        kept.append(line)
+                except ValueError:
+                    break
+        if kept:
+            tmp_path = Path(str(self.journal_file) + '.tmp')
+            with open(tmp_path, 'wb') as f:
+                f.writelines(kept)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.journal_file)
+        else:
+            self.journal_file.unlink()
+        self.pending = len(kept)
+
+    def compact_async(self):
+        if self.compactor is not None and self.compactor.is_alive():
+            return
+        self.compactor = threading.Thread(target=self.compact, daemon=True)
+        self.compactor.start()
+
+    def close(self):
+        if self.compactor is not None:
+            self.compactor.join()
@@ -0,0 +1,96 @@
+"""Save/load overhead of the encrypted account store against plaintext.
+
+    python benchmarks/encryption.py [--accounts N] [--repeat R] [--json]
+"""
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+import statistics
+from pathlib import Path
+
+from synthetic import synthetic_accounts, account_values
+
+from account_store import JournaledAccountStore
+import encrypted_store
+from encrypted_store import EncryptedAccountStore, derive_key
+
+PASSPHRASE = 'benchmark passphrase'
+
+
+def timed(func, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def bench_store(make_store, count, repeat):
+    results = {}
+    seed = make_store()
+    seed.load()
+    for name, values in synthetic_accounts(count).items():
+        seed.put(name, values)
+    results['save_all'] = timed(seed.compact, repeat)
+
+    def load_all():
+        store = make_store()
+        _, accounts = store.load()
+        for values in accounts.values():
+            len(values)
+    results['load_all'] = timed(load_all, repeat)
+
+    rng = random.Random(1)
+    results['save_one'] = timed(lambda: seed.put('account000000', account_values(rng, 0)), repeat)
+    results['file_bytes'] = seed.data_file.stat().st_size
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--accounts', type=int, default=1000)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--json', action='store_true')
+    args = parser.parse_args(argv)
+
+    if encrypted_store.AESGCM is None:
+        print("The 'cryptography' package is required for this benchmark", file=sys.stderr)
+        return 1
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        results = {
+            'plaintext': bench_store(
+                lambda: JournaledAccountStore(tmp / 'plain.json'), args.accounts, args.repeat
+            ),
+            'encrypted': bench_store(
+                lambda: EncryptedAccountStore(tmp / 'accounts.enc', PASSPHRASE), args.accounts, args.repeat
+            )
+        }
+
+        def derive_uncached():
+            derive_key.cache_clear()
+            derive_key(PASSPHRASE, b'\x00' * 16, **encrypted_store.KDF_PARAMS)
+        results['encrypted']['key_derivation'] = timed(derive_uncached, args.repeat)
+
+    if args.json:
+        print(json.dumps({'accounts': args.accounts, 'repeat': args.repeat, 'results': results}, indent=2))
+        return 0
+
+    print(f"{args.accounts} accounts, median of {args.repeat} runs")
+    print(f"{'':12}{'plaintext':>14}{'encrypted':>14}{'overhead':>10}")
+    for key in ('load_all', 'save_all', 'save_one'):
+        plain, sealed = results['plaintext'][key], results['encrypted'][key]
+        print(f"{key:12}{plain * 1000:>12.2f}ms{sealed * 1000:>12.2f}ms{sealed / plain:>9.2f}x")
+    plain, sealed = results['plaintext']['file_bytes'], results['encrypted']['file_bytes']
+    print(f"{'file size':12}{plain:>14}{sealed:>14}{sealed / plain:>9.2f}x")
+    print(f"key derivation (once per session): {results['encrypted']['key_derivation'] * 1000:.1f}ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
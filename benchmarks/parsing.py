@@ -0,0 +1,125 @@
+"""Per-account parse cost of the account fields on the store-load path.
+
+    python benchmarks/parsing.py [--accounts N] [--repeat R] [--json]
+
+Each run loads a fresh journal store, so nothing is decoded yet, and then
+parses every account the way start-up does:
+
+    eager       all fields at once, as before AccountInfo (parse_raw_info)
+    load        AccountInfoCache.get and token_ts only: what matching and the
+                stale-token timer read for every account
+    visible     load, then platform for the first VISIBLE_ROWS only: what the
+                Tk list reads before it is scrolled
+    display     load, then platform as well: the auth-member JSON for every row
+
+with the stdlib json module and, when installed, orjson. Times are medians
+in microseconds per account.
+"""
+import sys
+import json
+import time
+import argparse
+import tempfile
+import statistics
+from pathlib import Path
+
+from synthetic import synthetic_accounts, write_store
+
+import account_info
+from account_info import AccountInfoCache, parse_raw_info, AUTH_MEMBER_PATTERN
+from account_index import get_value_data, ACCESS_TOKEN_PATTERN
+from account_store import JournaledAccountStore
+
+# The Tk account list's height in rows.
+VISIBLE_ROWS = 15
+
+
+def timed(func, repeat, setup):
+    samples = []
+    for _ in range(repeat):
+        state = setup()
+        start = time.perf_counter()
+        func(state)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def eager(accounts):
+    for values in accounts.values():
+        parse_raw_info(get_value_data(values, AUTH_MEMBER_PATTERN), get_value_data(values, ACCESS_TOKEN_PATTERN))
+
+
+def load(accounts):
+    cache = AccountInfoCache(accounts)
+    for values in accounts.values():
+        cache.get(values)['token_ts']
+
+
+def visible(accounts):
+    cache = AccountInfoCache(accounts)
+    for index, values in enumerate(accounts.values()):
+        info = cache.get(values)
+        info['token_ts']
+        if index < VISIBLE_ROWS:
+            info['platform']
+
+
+def display(accounts):
+    cache = AccountInfoCache(accounts)
+    for values in accounts.values():
+        info = cache.get(values)
+        info['token_ts']
+        info['platform']
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--accounts', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--json', action='store_true')
+    args = parser.parse_args(argv)
+
+    parsers = {'json': json.loads}
+    if account_info.orjson is not None:
+        parsers['orjson'] = account_info.orjson.loads
+
+    with tempfile.TemporaryDirectory() as tmp:
+        data_file = Path(tmp) / 'accounts.json'
+        write_store(data_file, synthetic_accounts(args.accounts))
+
+        def fresh_accounts():
+            _, accounts = JournaledAccountStore(data_file).load()
+            return accounts
+
+        results = {'store_load': timed(lambda store: store.load(), args.repeat,
+                                       lambda: JournaledAccountStore(data_file))}
+        default_loads = account_info.json_loads
+        try:
+            for parser_name, loads in parsers.items():
+                account_info.json_loads = loads
+                results[parser_name] = {
+                    'eager': timed(eager, args.repeat, fresh_accounts),
+                    'load': timed(load, args.repeat, fresh_accounts),
+                    'visible': timed(visible, args.repeat, fresh_accounts),
+                    'display': timed(display, args.repeat, fresh_accounts)
+                }
+        finally:
+            account_info.json_loads = default_loads
+
+    per_account = 1e6 / args.accounts
+    if args.json:
+        print(json.dumps({'accounts': args.accounts, 'repeat': args.repeat, 'results': results}, indent=2))
+        return 0
+
+    print(f"{args.accounts} accounts, median of {args.repeat} runs, microseconds per account")
+    print(f"{'store load':12}{results['store_load'] * per_account:>10.2f}")
+    print(f"{'':12}" + ''.join(f"{name:>10}" for name in parsers))
+    for key in ('eager', 'load', 'visible', 'display'):
+        print(f"{key:12}" + ''.join(f"{results[name][key] * per_account:>10.2f}" for name in parsers))
+    if account_info.orjson is None:
+        print("orjson is not installed; pip install orjson to compare")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,185 @@
+"""Timing suite over synthetic account stores and an in-memory registry.
+
+    python benchmarks/suite.py [--sizes 10,1000,10000,100000] [--repeat R]
+                               [--output results.json] [--compare baseline.json]
+
+Results are medians in seconds. --output writes them as JSON; --compare
+reads an earlier --output file, prints the ratios and exits with status 1
+when any benchmark got slower than --threshold times its baseline.
+"""
+import sys
+import json
+import time
+import argparse
+import platform
+import tempfile
+import statistics
+from pathlib import Path
+
+from synthetic import synthetic_accounts, write_store, fake_registry
+
+from account_store import create_store
+from account_index import TokenPrefixIndex, token_prefix
+from account_info import AccountInfoCache, format_token_age
+from account_search import AccountSearchIndex
+from list_diff import diff_rows
+
+
+def timed(func, repeat, setup=None):
+    samples = []
+    for _ in range(repeat):
+        state = setup() if setup else None
+        start = time.perf_counter()
+        func(state) if setup else func()
+        samples.append(time.perf_counter() - start)
+    return {'median': statistics.median(samples), 'min': min(samples), 'runs': repeat}
+
+
+def row_label(info, lang, now):
+    # Mirrors the Tk list formatting without a window.
+    parts = [info['platform'], info['reg_nation'], info['create_time']]
+    parts.append(format_token_age(info['token_ts'], lang, now))
+    return ' | '.join(part for part in parts if part)
+
+
+def list_rows(accounts, cache, now):
+    return [(name, row_label(cache.get(values), 'en', now)) for name, values in accounts.items()]
+
+
+def bench_size(count, repeat, tmp, store_spec):
+    data_file = tmp / f'accounts_{count}.json'
+    accounts = synthetic_accounts(count)
+    write_store(data_file, accounts)
+    # An unsaved login matches nothing; the switch target sits mid-list.
+    target = f'account{count // 2:06d}'
+    results = {'file_bytes': data_file.stat().st_size}
+
+    def open_store():
+        return create_store(data_file, spec=store_spec)
+
+    # The first open of a sqlite or binary store converts accounts.json.
+    seeded = open_store()
+    seeded.load()
+    seeded.close()
+
+    def load(store):
+        _, loaded = store.load()
+        return loaded
+    results['load_accounts'] = timed(load, repeat, setup=open_store)
+
+    store = open_store()
+    _, loaded = store.load()
+    results['save_config'] = timed(lambda: store.set_config({'language': 'en'}), repeat)
+    results['save_account'] = timed(lambda: store.put(target, accounts[target]), repeat)
+    # A bulk re-save of up to 100 accounts, committed as one batch.
+    batch = [{'op': 'put', 'name': name, 'values': accounts[name]} for name in list(accounts)[:100]]
+    results['save_accounts'] = timed(lambda: store.apply_batch(batch), repeat)
+    if hasattr(store, 'compact'):
+        results['compact'] = timed(store.compact, repeat)
+
+    # Built the way the apps build theirs, so the bound is the one they get.
+    results['parse_account_info_cold'] = timed(
+        lambda cache: [cache.get(values) for values in loaded.values()], repeat,
+        setup=lambda: AccountInfoCache(loaded)
+    )
+    cache = AccountInfoCache(loaded)
+    for values in loaded.values():
+        cache.get(values)
+    results['parse_account_info_warm'] = timed(lambda: [cache.get(values) for values in loaded.values()], repeat)
+
+    index = TokenPrefixIndex(loaded)
+    live = fake_registry(accounts[target])
+    results['match_index_build'] = timed(lambda: TokenPrefixIndex(loaded), repeat)
+    results['match_current'] = timed(lambda: index.lookup(token_prefix(live.snapshot())), repeat)
+
+    infos = {name: cache.get(values) for name, values in loaded.items()}
+    results['search_index_build'] = timed(lambda: AccountSearchIndex(infos).build(), repeat)
+    search = AccountSearchIndex(infos)
+
+    def typing(query):
+        # One search per keystroke, as the filter box issues them.
+        return lambda: [search.search(query[:end]) for end in range(1, len(query) + 1)]
+    info = infos[target]
+    results['search_typing_name'] = timed(typing(target), repeat)
+    results['search_typing_fields'] = timed(typing(f"{info['platform']} {info['reg_nation']}"), repeat)
+
+    now = time.time()
+    rows = list_rows(loaded, cache, now)
+    names = [name for name, _ in rows]
+    labels = dict(rows)
+    results['refresh_list_full'] = timed(lambda: diff_rows([], {}, list_rows(loaded, cache, now)), repeat)
+    results['refresh_list_noop'] = timed(lambda: diff_rows(names, labels, list_rows(loaded, cache, now)), repeat)
+    # A sort toggle: every row changes place, none changes label.
+    results['refresh_list_reorder'] = timed(lambda: diff_rows(names, labels, rows[::-1]), repeat)
+
+    def switch():
+        snapshot = live.write(store.accounts[target])
+        return index.lookup(token_prefix(snapshot))
+    assert switch() == target
+    results['switch'] = timed(switch, repeat)
+    store.close()
+    return results
+
+
+def compare(results, baseline, threshold):
+    regressions = []
+    for size, metrics in results['sizes'].items():
+        old_metrics = baseline.get('sizes', {}).get(size, {})
+        for name, value in metrics.items():
+            old = old_metrics.get(name)
+            if not isinstance(value, dict) or not isinstance(old, dict) or not old['median']:
+                continue
+            ratio = value['median'] / old['median']
+            flag = ' REGRESSION' if ratio > threshold else ''
+            print(f"{size:>8} {name:26} {old['median'] * 1000:>10.3f}ms -> {value['median'] * 1000:>10.3f}ms"
+                  f" {ratio:>6.2f}x{flag}")
+            if flag:
+                regressions.append((size, name))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', default='10,1000,10000,100000')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--store', default='journal', choices=['journal', 'sqlite', 'binary', 'blobs'])
+    parser.add_argument('--output', help="write results as JSON to this file ('-' for stdout)")
+    parser.add_argument('--compare', help="baseline JSON from an earlier --output run")
+    parser.add_argument('--threshold', type=float, default=1.25)
+    args = parser.parse_args(argv)
+
+    results = {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'store': args.store,
+        'repeat': args.repeat,
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'sizes': {}
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        for count in [int(size) for size in args.sizes.split(',')]:
+            print(f"{count} accounts...", file=sys.stderr)
+            results['sizes'][str(count)] = bench_size(count, args.repeat, Path(tmp), args.store)
+
+    if args.output == '-':
+        print(json.dumps(results, indent=2))
+    else:
+        if args.output:
+            with open(args.output, 'w', encoding='utf-8') as f:
+                json.dump(results, f, indent=2)
+        for size, metrics in results['sizes'].items():
+            print(f"{size} accounts ({metrics['file_bytes']} bytes)")
+            for name, value in metrics.items():
+                if isinstance(value, dict):
+                    print(f"  {name:26} {value['median'] * 1000:>10.3f}ms")
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        if compare(results, baseline, args.threshold):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
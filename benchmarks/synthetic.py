@@ -0,0 +1,65 @@
+"""Synthetic account stores and registry contents for the benchmarks."""
+import sys
+import json
+import random
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from account_store import JournaledAccountStore, write_atomic
+from registry_backend import MemoryBackend
+from registry_value import RegistryValue, REG_BINARY
+
+PLATFORMS = ['FIREBASE_google', 'FIREBASE_apple', 'FIREBASE_facebook', 'STEAM', 'GUEST']
+NATIONS = ['KR', 'JP', 'TW', 'US', 'DE', 'TH', 'CN']
+# Value names carry a per-install hash suffix in the real registry key.
+TOKEN_VALUE = 'neon_access_token_h2877165395'
+MEMBER_VALUE = 'neon_auth_member_h1780470731'
+
+
+def access_token(rng, i, token_ts):
+    member_id = f'{rng.getrandbits(64):016x}'
+    session = ''.join(rng.choice('0123456789abcdef') for _ in range(64))
+    return f'{member_id}|{i % 9973}|{rng.randint(1, 4)}|bd2|{session}|{token_ts}|{rng.getrandbits(128):032x}\x00'
+
+
+def auth_member(rng, i):
+    return json.dumps({
+        'member_id': i,
+        'reg_path': rng.choice(PLATFORMS),
+        'reg_nation': rng.choice(NATIONS),
+        'crt_dt': 1_640_995_200_000 + rng.randrange(0, 3 * 365 * 86_400_000),
+        'last_login_dt': 1_700_000_000_000 + rng.randrange(0, 86_400_000),
+        'nickname': f'player{i}',
+        'device_id': f'{rng.getrandbits(128):032x}',
+        'push_token': ''.join(rng.choice('0123456789abcdef') for _ in range(152)),
+        'terms': {'service': True, 'privacy': True, 'night_push': bool(i % 2)}
+    }) + '\x00'
+
+
+def account_values(rng, i, now_ms=1_700_000_000_000):
+    token_ts = now_ms - rng.randrange(0, 14 * 86_400_000)
+    return {
+        TOKEN_VALUE: RegistryValue.from_raw(access_token(rng, i, token_ts).encode('utf-8'), REG_BINARY),
+        MEMBER_VALUE: RegistryValue.from_raw(auth_member(rng, i).encode('utf-8'), REG_BINARY)
+    }
+
+
+def synthetic_accounts(count, seed=0):
+    rng = random.Random(seed)
+    return {f'account{i:06d}': account_values(rng, i) for i in range(count)}
+
+
+def write_store(data_file, accounts, config=None):
+    """Writes accounts as a compacted accounts.json, the way the app leaves it."""
+    store = JournaledAccountStore(data_file)
+    write_atomic(data_file, store.encode_snapshot(config or {'language': 'en'}, accounts, {}, 0))
+
+
+def fake_registry(values):
+    """MemoryBackend holding `values` as the live login."""
+    registry = MemoryBackend()
+    for name, value_data in values.items():
+        registry.set_value(name, value_data.raw, value_data.type)
+    registry.changed.clear()
+    return registry
@@ -0,0 +1,290 @@
+import sys
+import json
+import mmap
+import struct
+import argparse
+from collections.abc import Mapping
+from pathlib import Path
+
+from account_store import JournaledAccountStore, WARNING_TEXT, write_atomic
+from registry_value import RegistryValue, as_value
+
+
+# accounts.bd2 layout (little endian):
+#   header   magic, version, account count, meta length
+#   meta     the accounts.json "_config" object as UTF-8 JSON
+#   table    per account: name length, name, blob offset, blob length
+#   blobs    per account: value count, then per value a kind byte, name
+#            length, type, data length, name and the raw data bytes
+# Kind 1 is a {'data': str, 'type': int} value, kind 0 a bare string, both
+# stored as UTF-8; kind 2 (version 2) is a RegistryValue read from the
+# registry, stored as the exact bytes it holds; kind 3 (version 3) is a
+# {'data': int, 'type': int} value such as a REG_DWORD, stored as a signed
+# little-endian integer of the data length. Earlier versions still load.
+MAGIC = b'BD2ACCT\x00'
+VERSION = 3
+READABLE_VERSIONS = (1, 2, 3)
+HEADER = struct.Struct('<8sHII')
+NAME_LENGTH = struct.Struct('<H')
+TABLE_ENTRY = struct.Struct('<QI')
+VALUE_COUNT = struct.Struct('<H')
+VALUE_HEADER = struct.Struct('<BHiI')
+
+KIND_PLAIN = 0
+KIND_TYPED = 1
+KIND_RAW = 2
+KIND_INT = 3
+
+
+def encode_text(text):
+    return text.encode('utf-8', errors='surrogatepass')
+
+
+def decode_text(data):
+    return bytes(data).decode('utf-8', errors='surrogatepass')
+
+
+def pack_values(values):
+    parts = [VALUE_COUNT.pack(len(values))]
+    for value_name, value_data in values.items():
+        if isinstance(value_data, str):
+            kind, value_type, data = KIND_PLAIN, 0, encode_text(value_data)
+        elif (isinstance(value_data, dict) and set(value_data) == {'b64', 'type'}
+              and isinstance(value_data['type'], int)):
+            kind, value_type, data = KIND_RAW, value_data['type'], as_value(value_data).raw
+        elif (isinstance(value_data, dict) and set(value_data) == {'data', 'type'}
+              and isinstance(value_data['data'], str) and isinstance(value_data['type'], int)):
+            kind, value_type, data = KIND_TYPED, value_data['type'], encode_text(value_data['data'])
+        elif (isinstance(value_data, dict) and set(value_data) == {'data', 'type'}
+              and type(value_data['data']) is int and isinstance(value_data['type'], int)):
+            number = value_data['data']
+            kind, value_type = KIND_INT, value_data['type']
+            data = number.to_bytes(number.bit_length() // 8 + 1, 'little', signed=True)
+        else:
+            raise ValueError(f"Cannot pack value {value_name!r}: {value_data!r}")
+        name = encode_text(value_name)
+        parts.append(VALUE_HEADER.pack(kind, len(name), value_type, len(data)))
+        parts.append(name)
+        parts.append(data)
+    return b''.join(parts)
+
+
+def unpack_values(buffer):
+    values = {}
+    (count,) = VALUE_COUNT.unpack_from(buffer, 0)
+    pos = VALUE_COUNT.size
+    for _ in range(count):
+        kind, name_length, value_type, data_length = VALUE_HEADER.unpack_from(buffer, pos)
+        pos += VALUE_HEADER.size
+        value_name = decode_text(buffer[pos:pos + name_length])
+        pos += name_length
+        data = buffer[pos:pos + data_length]
+        pos += data_length
+        if kind == KIND_RAW:
+            values[value_name] = RegistryValue.from_raw(data, value_type)
+        elif kind == KIND_INT:
+            number = int.from_bytes(data, 'little', signed=True)
+            values[value_name] = RegistryValue.from_raw(number, value_type)
+        elif kind == KIND_TYPED:
+            values[value_name] = RegistryValue({'data': decode_text(data), 'type': value_type})
+        else:
+            values[value_name] = decode_text(data)
+    return values
+
+
+def pack_accounts(meta, accounts):
+    meta_bytes = encode_text(json.dumps(meta, ensure_ascii=False))
+    names = [encode_text(name) for name in accounts]
+    blobs = [pack_values(values) for values in accounts.values()]
+
+    table_size = sum(NAME_LENGTH.size + len(name) + TABLE_ENTRY.size for name in names)
+    offset = HEADER.size + len(meta_bytes) + table_size
+    table = []
+    for name, blob in zip(names, blobs):
+        table.append(NAME_LENGTH.pack(len(name)) + name + TABLE_ENTRY.pack(offset, len(blob)))
+        offset += len(blob)
+    return b''.join([HEADER.pack(MAGIC, VERSION, len(names), len(meta_bytes)), meta_bytes] + table + blobs)
+
+
+def read_index(buffer):
+    """Returns (meta, [(name, offset, length)]) without touching any blob."""
+    if len(buffer) < HEADER.size:
+        raise ValueError("Truncated account file")
+    magic, version, count, meta_length = HEADER.unpack_from(buffer, 0)
+    if magic != MAGIC:
+        raise ValueError("Not an account file")
+    if version not in READABLE_VERSIONS:
+        raise ValueError(f"Unsupported account file version {version}")
+    pos = HEADER.size
+    meta = json.loads(decode_text(buffer[pos:pos + meta_length]))
+    pos += meta_length
+    entries = []
+    try:
+        for _ in range(count):
+            (name_length,) = NAME_LENGTH.unpack_from(buffer, pos)
+            pos += NAME_LENGTH.size
+            name = decode_text(buffer[pos:pos + name_length])
+            pos += name_length
+            offset, length = TABLE_ENTRY.unpack_from(buffer, pos)
+            pos += TABLE_ENTRY.size
+            if offset + length > len(buffer):
+                raise ValueError(f"Truncated account file: {name!r}")
+            entries.append((name, offset, length))
+    except struct.error as e:
+        raise ValueError(f"Truncated account file: {e}")
+    return meta, entries
+
+
+def export_meta(store):
+    # The target starts without a journal, so the source's _journal_seq
+    # would make it skip records it never had.
+    return {**store.config, '_warning': WARNING_TEXT, '_tags': store.tags}
+
+
+def json_to_binary(json_file, binary_file):
+    # Loaded through the store so changes still in accounts.journal come along.
+    source = JournaledAccountStore(json_file)
+    _, accounts = source.load()
+    write_atomic(binary_file, pack_accounts(export_meta(source), accounts))
+
+
+def binary_to_json(binary_file, json_file):
+    source = BinaryAccountStore(binary_file)
+    try:
+        _, accounts = source.load()
+        data = {'_config': export_meta(source)}
+        data.update((name, dict(values)) for name, values in accounts.items())
+    finally:
+        source.close()
+    write_atomic(json_file, json.dumps(data, ensure_ascii=False, indent=2))
+
+
+class PackedValues(Mapping):
+    """Registry values of one account, decoded from the mapped file on first use."""
+
+    def __init__(self, store, offset, length):
+        self.store = store
+        self.offset = offset
+        self.length = length
+        self.values = None
+
+    def fetch(self):
+        if self.values is None:
+            self.values = self.store.unpack(self.offset, self.length)
+        return self.values
+
+    def __getitem__(self, key):
+        return self.fetch()[key]
+
+    def __iter__(self):
+        return iter(self.fetch())
+
+    def __len__(self):
+        return len(self.fetch())
+
+    def __eq__(self, other):
+        # Compared by identity, like sqlite_store.StoredValues, so the Qt
+        # model's change check does not decode every row.
+        return other is self
+
+    __hash__ = None
+
+
+class BinaryAccountStore(JournaledAccountStore):
+    """JournaledAccountStore whose snapshot is an accounts.bd2 container.
+
+    The snapshot is memory-mapped and only its offset table is read on load;
+    each account is a PackedValues that decodes its blobs when the account is
+    parsed for the list or written to the registry. Mutations still go to a
+    journal (accounts.bd2.journal). Compaction decodes the remaining accounts
+    and unmaps the file before replacing it, since a mapped file cannot be
+    replaced on Windows.
+
+    A missing snapshot is seeded from `import_file` (accounts.json and its
+    journal).
+    """
+
+    def __init__(self, data_file, import_file=None, writer=None, compact_threshold=200):
+        data_file = Path(data_file)
+        super().__init__(data_file, journal_file=data_file.with_suffix('.bd2.journal'),
+                         compact_threshold=compact_threshold, writer=writer)
+        self.import_file = Path(import_file) if import_file else None
+        self.mapped = None
+
+    def _load_snapshot(self):
+        if not self.data_file.exists():
+            if self.import_file is not None and not self.journal_file.exists():
+                self._import()
+            return
+        with open(self.data_file, 'rb') as f:
+            if not f.seek(0, 2):
+                return
+            self.mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        meta, entries = read_index(self.mapped)
+        config = dict(meta or {})
+        self.seq = config.pop('_journal_seq', 0)
+        config.pop('_warning', None)
+        self.tags = config.pop('_tags', {})
+        self.config = config
+        self.accounts = {name: PackedValues(self, offset, length) for name, offset, length in entries}
+
+    def _import(self):
+        source = JournaledAccountStore(self.import_file)
+        config, accounts = source.load()
+        self.config = dict(config)
+        self.accounts = dict(accounts)
+        self.tags = dict(source.tags)
+        write_atomic(self.data_file, self.encode_snapshot(self.config, self.accounts, self.tags, 0))
+
+    def unpack(self, offset, length):
+        with self.lock:
+            try:
+                return unpack_values(self.mapped[offset:offset + length])
+            except struct.error as e:
+                raise ValueError(f"Corrupted account data: {e}")
+
+    def encode_snapshot(self, config, accounts, tags, seq):
+        meta = {**config, '_warning': WARNING_TEXT, '_tags': tags, '_journal_seq': seq}
+        return pack_accounts(meta, accounts)
+
+    def release_mapping(self):
+        with self.lock:
+            if self.mapped is None:
+                return
+            for values in self.accounts.values():
+                if isinstance(values, PackedValues):
+                    values.fetch()
+            self.mapped.close()
+            self.mapped = None
+
+    def compact(self):
+        self.release_mapping()
+        super().compact()
+
+    def close(self):
+        super().close()
+        with self.lock:
+            if self.mapped is not None:
+                self.mapped.close()
+                self.mapped = None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Convert between accounts.json and accounts.bd2")
+    parser.add_argument('direction', choices=['to-binary', 'to-json'])
+    parser.add_argument('source')
+    parser.add_argument('target')
+    args = parser.parse_args(argv)
+    try:
+        if args.direction == 'to-binary':
+            json_to_binary(args.source, args.target)
+        else:
+            binary_to_json(args.source, args.target)
+    except (OSError, ValueError) as e:
+        print(e, file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,191 @@
+import json
+import time
+import hashlib
+from pathlib import Path
+
+from account_store import JournaledAccountStore, write_atomic
+from registry_value import value_raw, value_type, value_hook
+
+
+HISTORY_LIMIT = 5
+
+
+def blob_id(value_data):
+    # Content address of one value: a digest of its type and raw bytes.
+    raw = value_raw(value_data)
+    h = hashlib.blake2b(digest_size=16)
+    h.update(str(value_type(value_data)).encode('ascii'))
+    h.update(b'\x00')
+    h.update(raw if isinstance(raw, bytes) else str(raw).encode('utf-8'))
+    return h.hexdigest()
+
+
+class BlobAccountStore(JournaledAccountStore):
+    """JournaledAccountStore keeping every distinct registry value once (accounts.blobs).
+
+    The snapshot holds a `_blobs` table of values keyed by blob_id and an
+    `_accounts` table, nested so that no account name can collide with either;
+    each account holds {value_name: blob id} for its current values plus a history
+    of earlier ones, newest first and at most `history_limit` long. A put
+    journals only the blobs the store does not have yet, so accounts sharing
+    a neon_auth_member_h value, or a refresh that changed only the token, add
+    no copy of what is already stored. A put that changes an account moves
+    its previous values into the history, and rollback() brings them back;
+    the values it replaces go into the history in turn. Compaction drops the
+    blobs nothing refers to any more.
+
+    Loaded accounts share the value objects of equal blobs. A missing snapshot
+    is seeded from `import_file` (accounts.json and its journal).
+    """
+
+    def __init__(self, data_file, import_file=None, writer=None, compact_threshold=200,
+                 history_limit=HISTORY_LIMIT):
+        data_file = Path(data_file)
+        super().__init__(data_file, journal_file=data_file.with_suffix('.blobs.journal'),
+                         compact_threshold=compact_threshold, writer=writer)
+        self.import_file = Path(import_file) if import_file else None
+        self.history_limit = history_limit
+        self.blobs = {}
+        # {name: {'values': refs, 'saved': time or None, 'history': [...]}};
+        # entries and their history lists are replaced, never mutated, so a
+        # compaction can copy them shallowly.
+        self.records = {}
+
+    def resolve(self, refs):
+        try:
+            return {value_name: self.blobs[key] for value_name, key in refs.items()}
+        except KeyError as e:
+            raise ValueError(f"Missing blob {e.args[0]}")
+
+    def intern(self, values):
+        refs = {}
+        new_blobs = {}
+        for value_name, value_data in values.items():
+            key = refs[value_name] = blob_id(value_data)
+            if key not in self.blobs:
+                new_blobs[key] = value_data
+        return refs, new_blobs
+
+    def _load_snapshot(self):
+        self.blobs = {}
+        self.records = {}
+        if not self.data_file.exists():
+            if self.import_file is not None and not self.journal_file.exists():
+                self._import()
+            return
+        with open(self.data_file, 'r', encoding='utf-8') as f:
+            content = f.read().strip()
+        if not content:
+            return
+        data = json.loads(content, object_hook=value_hook)
+        config = dict(data.pop('_config', {}))
+        self.seq = config.pop('_journal_seq', 0)
+        config.pop('_warning', None)
+        self.tags = config.pop('_tags', {})
+        self.config = config
+        self.blobs = data.pop('_blobs', {})
+        # Snapshots from before `_accounts` kept the records at the top level.
+        records = data.pop('_accounts', data)
+        for name, record in records.items():
+            self.records[name] = record
+            self.accounts[name] = self.resolve(record['values'])
+
+    def _import(self):
+        source = JournaledAccountStore(self.import_file)
+        config, accounts = source.load()
+        self.config = dict(config)
+        self.tags = dict(source.tags)
+        for name, values in accounts.items():
+            refs, new_blobs = self.intern(values)
+            self.blobs.update(new_blobs)
+            self.records[name] = {'values': refs, 'saved': None, 'history': []}
+            self.accounts[name] = self.resolve(refs)
+        write_atomic(self.data_file, self.encode_snapshot(self.config, self.snapshot_accounts(), self.tags, 0))
+
+    def _apply(self, record):
+        op = record.get('op')
+        if op == 'put':
+            name = record['name']
+            self.blobs.update(record['blobs'])
+            history = []
+            previous = self.records.get(name)
+            if previous is not None:
+                history = [{'values': previous['values'], 'saved': previous['saved']}] + previous['history']
+            self.records[name] = {'values': record['refs'], 'saved': record.get('saved'),
+                                  'history': history[:self.history_limit]}
+            self.accounts[name] = self.resolve(record['refs'])
+        elif op == 'rollback':
+            name = record['name']
+            current = self.records.get(name)
+            if current is None or not 0 <= record['index'] < len(current['history']):
+                return
+            history = list(current['history'])
+            restored = history.pop(record['index'])
+            history.insert(0, {'values': current['values'], 'saved': current['saved']})
+            self.records[name] = {'values': restored['values'], 'saved': restored['saved'],
+                                  'history': history[:self.history_limit]}
+            self.accounts[name] = self.resolve(restored['values'])
+        else:
+            super()._apply(record)
+            if op == 'delete':
+                self.records.pop(record['name'], None)
+            elif op == 'rename' and record['old'] in self.records:
+                self.records[record['new']] = self.records.pop(record['old'])
+
+    def put(self, name, values):
+        with self.lock:
+            refs, new_blobs = self.intern(values)
+            current = self.records.get(name)
+            if current is not None and current['values'] == refs:
+                return
+            self.commit({'op': 'put', 'name': name, 'refs': refs, 'blobs': new_blobs, 'saved': int(time.time())})
+
+    def apply_batch(self, ops):
+        # Puts are journaled by reference as put() does; a blob shared by
+        # several of them is carried by the first one only.
+        with self.lock:
+            batch = []
+            added = set()
+            touched = set()
+            saved = int(time.time())
+            for item in ops:
+                if item.get('op') == 'put':
+                    name = item['name']
+                    refs, new_blobs = self.intern(item['values'])
+                    current = self.records.get(name)
+                    if name not in touched and current is not None and current['values'] == refs:
+                        continue
+                    new_blobs = {key: value for key, value in new_blobs.items() if key not in added}
+                    added.update(new_blobs)
+                    item = {'op': 'put', 'name': name, 'refs': refs, 'blobs': new_blobs, 'saved': saved}
+                touched.update(item[key] for key in ('name', 'old', 'new') if key in item)
+                batch.append(item)
+            super().apply_batch(batch)
+
+    def history(self, name):
+        """Earlier values of `name`, newest first, as (saved, values) pairs."""
+        with self.lock:
+            record = self.records.get(name)
+            if record is None:
+                return []
+            return [(item['saved'], self.resolve(item['values'])) for item in record['history']]
+
+    def rollback(self, name, index=0):
+        """Makes history entry `index` of `name` current again and returns its values."""
+        with self.lock:
+            record = self.records.get(name)
+            if record is None or not 0 <= index < len(record['history']):
+                raise ValueError(f"No earlier values of {name!r} at {index}")
+            self.commit({'op': 'rollback', 'name': name, 'index': index})
+            return self.accounts[name]
+
+    def snapshot_accounts(self):
+        # Called under the lock. Blobs nothing refers to are dropped here too,
+        # so any later put that needs one again journals it again.
+        live = set()
+        for record in self.records.values():
+            live.update(record['values'].values())
+            for item in record['history']:
+                live.update(item['values'].values())
+        self.blobs = {key: value for key, value in self.blobs.items() if key in live}
+        return {'_blobs': dict(self.blobs), '_accounts': dict(self.records)}
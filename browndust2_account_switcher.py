@@ -1,11 +1,40 @@
 import sys
 import json
-import winreg
+import math
+import time
+import queue
 import locale
 from pathlib import Path
-from datetime import datetime
+from registry_backend import create_backend, REG_BINARY
+from registry_value import value_text
+from account_index import TokenPrefixIndex, get_value_data, ACCESS_TOKEN_PATTERN
+from account_search import AccountSearchIndex
+from account_sort import SortedAccountIndex, SORT_FIELDS
+from token_expiry import ExpiryScheduler, DEFAULT_STALE_HOURS
+from account_info import AccountInfoCache, format_token_age
+from list_diff import diff_rows
+from account_store import create_store, PassphraseError, export_text, write_atomic
+from registry_watcher import RegistryWatcher
+from task_worker import SerialWorker
+from translator import Translator
+from perf_timings import timings, timed
 import tkinter as tk
-from tkinter import ttk, messagebox, simpledialog, Menu
+from tkinter import ttk, messagebox, simpledialog, filedialog, Menu
+
+
+# Translation keys of what an encrypted store asks for.
+PASSPHRASE_PROMPTS = {
+    'unlock': 'input_passphrase',
+    'retry': 'passphrase_retry',
+    'new': 'new_passphrase',
+    'confirm': 'confirm_passphrase',
+    'mismatch': 'passphrase_mismatch'
+}
+
+# None keeps the saved order.
+SORT_OPTIONS = (None,) + SORT_FIELDS
+# Tk timers take 32-bit milliseconds; far-off expiries are re-armed.
+MAX_TIMER_MS = 6 * 3600 * 1000
 
 
 def get_app_dir():
@@ -22,80 +51,70 @@ class AccountSwitcher:
             "neon_access_token_h",
             "neon_auth_member_h"
         ]
+        self.registry = create_backend(self.registry_path, self.token_key_patterns)
         self.app_dir = get_app_dir()
         self.data_file = self.app_dir / "accounts.json"
+        self.worker = SerialWorker()
+        # The root exists, hidden, before the store is opened, so the unlock
+        # prompt and its errors have a parent instead of a throwaway Tk().
+        self.root = tk.Tk()
+        self.root.withdraw()
+        self.store = create_store(
+            self.data_file, writer=lambda job: self.worker.submit(job, on_error=self.show_task_error),
+            passphrase=self.ask_passphrase
+        )
         self.load_translations()
         self.accounts = self.load_accounts()
+        self.token_index = TokenPrefixIndex(self.accounts)
+        self.info_cache = AccountInfoCache(self.accounts)
+        infos = {name: self.info_cache.get(values) for name, values in self.accounts.items()}
+        self.search_index = AccountSearchIndex(infos)
+        self.sort_index = SortedAccountIndex(infos)
+        self.expiry = ExpiryScheduler(infos, self.config.get('stale_hours', DEFAULT_STALE_HOURS) * 3600)
+        self.expiry.advance(time.time())
         self.init_ui()
 
+    @timed('get_registry_keys')
     def get_registry_keys(self):
-        try:
-            key = winreg.OpenKey(winreg.HKEY_CURRENT_USER, self.registry_path, 0, winreg.KEY_READ)
-            keys = {}
-            i = 0
-            while True:
-                try:
-                    name = winreg.EnumValue(key, i)[0]
-                    for pattern in self.token_key_patterns:
-                        if name.startswith(pattern):
-                            keys[pattern] = name
-                            break
-                    i += 1
-                except OSError:
-                    break
-            winreg.CloseKey(key)
-            return keys
-        except FileNotFoundError:
-            return {}
+        return self.registry.registry_keys(self.registry.snapshot())
 
+    @timed('load_accounts')
     def load_accounts(self):
-        if self.data_file.exists():
-            try:
-                with open(self.data_file, 'r', encoding='utf-8') as f:
-                    content = f.read().strip()
-                    if not content:
-                        return {}
-                    data = json.loads(content)
-                    self.config = data.get('_config', {})
-                    accounts = {k: v for k, v in data.items() if k != '_config'}
-                    return accounts
-            except (json.JSONDecodeError, ValueError) as e:
-                messagebox.showwarning(
-                    "提示" if hasattr(self, 'tr') else 'Tip', 
-                    self.tr('data_corrupted', str(e)) if hasattr(self, 'tr') else f'Data corrupted: {e}'
-                )
-                return {}
-        return {}
-
-    def save_accounts(self):
-        data = {
-            '_config': {
-                **self.config,
-                '_warning': 'This file contains sensitive account data. Do NOT share or upload publicly.'
-            }
-        }
-        data.update(self.accounts)
-        with open(self.data_file, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+        try:
+            config, accounts = self.store.load()
+            if config:
+                self.config = config
+            return accounts
+        except PassphraseError as e:
+            # Nothing could be read and nothing may be written; starting with
+            # an empty list would only invite saves into a locked store.
+            messagebox.showerror(self.tr('error'), self.tr('wrong_passphrase', str(e)), parent=self.root)
+            sys.exit(1)
+        except (json.JSONDecodeError, ValueError) as e:
+            messagebox.showwarning(
+                "提示" if hasattr(self, 'tr') else 'Tip', 
+                self.tr('data_corrupted', str(e)) if hasattr(self, 'tr') else f'Data corrupted: {e}',
+                parent=self.root
+            )
+            return self.store.accounts
+
+    def ask_passphrase(self, prompt='unlock'):
+        if hasattr(self, 'translator'):
+            tr = self.tr
+        else:
+            # May run before translations are loaded when there is no config sidecar yet.
+            with open(Path(__file__).parent / "translations.json", 'r', encoding='utf-8') as f:
+                tr = Translator(json.load(f), 'en')
+        return simpledialog.askstring(tr('passphrase_title'), tr(PASSPHRASE_PROMPTS[prompt]), show='*',
+                                      parent=self.root)
 
     def load_translations(self):
         trans_file = Path(__file__).parent / "translations.json"
         with open(trans_file, 'r', encoding='utf-8') as f:
             self.all_translations = json.load(f)
         
-        self.config = {}
-        saved_lang = None
-        
-        if self.data_file.exists():
-            try:
-                with open(self.data_file, 'r', encoding='utf-8') as f:
-                    content = f.read().strip()
-                    if content:
-                        data = json.loads(content)
-                        self.config = data.get('_config', {})
-                        saved_lang = self.config.get('language')
-            except:
-                pass
+        self.config = dict(self.store.load_config())
+        saved_lang = self.config.get('language')
         
         if saved_lang and saved_lang in self.all_translations:
             self.lang = saved_lang
@@ -111,30 +130,53 @@ class AccountSwitcher:
             except:
                 self.lang = 'en'
         
-        self.translations = self.all_translations[self.lang]
+        self.translator = Translator(self.all_translations, self.lang)
 
     def switch_language(self):
-        new_lang = 'en' if self.lang == 'zh' else 'zh'
-        self.lang = new_lang
-        self.translations = self.all_translations[self.lang]
-        
-        self.config['language'] = new_lang
-        self.save_accounts()
-        
-        self.root.destroy()
-        self.__init__()
+        self.lang = 'en' if self.lang == 'zh' else 'zh'
+        self.translator.set_language(self.lang)
+        self.config['language'] = self.lang
+        config = dict(self.config)
+        self.worker.submit(lambda: self.store.set_config(config), on_error=self.show_task_error)
+        self.retranslate_ui()
 
     def tr(self, key, *args):
-        text = self.translations.get(key, key)
-        if args:
-            text = text.replace('{0}', str(args[0]))
-            for i, arg in enumerate(args[1:], 1):
-                text = text.replace(f'{{{i}}}', str(arg))
-        return text
+        return self.translator(key, *args)
+
+    def bind_text(self, setter, key):
+        # Registers a widget text so retranslate_ui() can re-label it in place.
+        self.translated.append((setter, key))
+        setter(self.tr(key))
+
+    def retranslate_ui(self):
+        for setter, key in self.translated:
+            setter(self.tr(key))
+        self.lang_btn.config(text="EN" if self.lang == 'zh' else "中文")
+        self.update_sort_box()
+        self.update_current_account_display(self.current_values or {})
+        self.update_visible_rows(*self.account_tree.yview())
+
+    def update_sort_box(self):
+        self.sort_box.config(values=[self.tr(f"sort_{field or 'saved'}") for field in SORT_OPTIONS])
+        self.sort_box.current(SORT_OPTIONS.index(self.sort_field))
+        self.sort_dir_btn.config(text="↓" if self.sort_reverse else "↑")
+
+    def change_sort(self, field, reverse):
+        self.sort_field = field
+        self.sort_reverse = reverse
+        self.config['sort'] = [field, reverse]
+        config = dict(self.config)
+        self.worker.submit(lambda: self.store.set_config(config), on_error=self.show_task_error)
+        self.update_sort_box()
+        self.show_rows(relabel=False)
+
+    def sort_by_name(self):
+        self.change_sort('name', self.sort_field == 'name' and not self.sort_reverse)
 
     def init_ui(self):
-        self.root = tk.Tk()
-        self.root.title(f"{self.tr('window_title')} - github.com/Liovovo/BrownDust2-Account-Switcher")
+        self.translated = []
+        self.bind_text(lambda text: self.root.title(f"{text} - github.com/Liovovo/BrownDust2-Account-Switcher"),
+                       'window_title')
         
         width = 650
         height = 500
@@ -156,12 +198,31 @@ class AccountSwitcher:
         title_frame.grid(row=0, column=0, sticky=(tk.W, tk.E), pady=(0, 10))
         title_frame.columnconfigure(0, weight=1)
 
-        title_label = ttk.Label(title_frame, text=self.tr('account_list'), font=('', 12, 'bold'))
+        title_label = ttk.Label(title_frame, font=('', 12, 'bold'))
+        self.bind_text(lambda text: title_label.config(text=text), 'account_list')
         title_label.grid(row=0, column=0, sticky=tk.W)
 
+        search_label = ttk.Label(title_frame)
+        self.bind_text(lambda text: search_label.config(text=text), 'search')
+        search_label.grid(row=0, column=1, sticky=tk.E, padx=(0, 5))
+        self.filter_var = tk.StringVar()
+        self.filter_var.trace_add('write', lambda *args: self.filter_list())
+        ttk.Entry(title_frame, textvariable=self.filter_var, width=24).grid(row=0, column=2, padx=(0, 10))
+
+        sort_field, self.sort_reverse = self.config.get('sort') or (None, False)
+        self.sort_field = sort_field if sort_field in SORT_FIELDS else None
+        self.sort_box = ttk.Combobox(title_frame, state='readonly', width=12)
+        self.sort_box.bind('<<ComboboxSelected>>',
+                           lambda e: self.change_sort(SORT_OPTIONS[self.sort_box.current()], self.sort_reverse))
+        self.sort_box.grid(row=0, column=3)
+        self.sort_dir_btn = ttk.Button(title_frame, width=2,
+                                       command=lambda: self.change_sort(self.sort_field, not self.sort_reverse))
+        self.sort_dir_btn.grid(row=0, column=4, padx=(2, 10))
+        self.update_sort_box()
+
         self.lang_btn = ttk.Button(title_frame, text="EN" if self.lang == 'zh' else "中文", 
                                   command=self.switch_language, width=6)
-        self.lang_btn.grid(row=0, column=1, sticky=tk.E)
+        self.lang_btn.grid(row=0, column=5, sticky=tk.E)
 
         current_frame = ttk.Frame(main_frame)
         current_frame.grid(row=1, column=0, sticky=(tk.W, tk.E), pady=(0, 10))
@@ -182,14 +243,25 @@ class AccountSwitcher:
         list_frame.rowconfigure(0, weight=1)
         main_frame.rowconfigure(2, weight=1)
 
-        self.account_tree = ttk.Treeview(list_frame, columns=('info',), show='tree headings', height=15)
-        self.account_tree.heading('#0', text=self.tr('account_name') if hasattr(self, 'tr') else 'Account Name')
-        self.account_tree.heading('info', text=self.tr('account_info') if hasattr(self, 'tr') else 'Account Info')
+        self.row_names = []
+        self.row_ids = {}
+        self.row_labels = {}
+        self.row_parts = {}
+        # Index range of the rows on screen when the view was last laid out.
+        self.shown_range = (0, 0)
+        self.age_now = time.time()
+        self.account_tree = ttk.Treeview(list_frame, columns=('info',), show='tree headings', height=15,
+                                         selectmode='extended')
+        self.bind_text(lambda text: self.account_tree.heading('#0', text=text), 'account_name')
+        self.account_tree.heading('#0', command=self.sort_by_name)
+        self.bind_text(lambda text: self.account_tree.heading('info', text=text), 'account_info')
         self.account_tree.column('#0', width=150)
+        self.account_tree.tag_configure('stale', foreground='#c62828')
+        self.expiry_timer = None
         self.account_tree.column('info', width=450)
         
         scrollbar = ttk.Scrollbar(list_frame, orient=tk.VERTICAL, command=self.account_tree.yview)
-        self.account_tree.configure(yscrollcommand=scrollbar.set)
+        self.account_tree.configure(yscrollcommand=lambda first, last: self.on_tree_scroll(scrollbar, first, last))
         
         self.account_tree.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
         scrollbar.grid(row=0, column=1, sticky=(tk.N, tk.S))
@@ -200,142 +272,323 @@ class AccountSwitcher:
         btn_frame = ttk.Frame(main_frame)
         btn_frame.grid(row=3, column=0, sticky=(tk.W, tk.E))
         
-        self.btn_refresh_token = ttk.Button(btn_frame, text=self.tr('refresh_token'),
-                                          command=self.refresh_token)
+        self.btn_refresh_token = ttk.Button(btn_frame, command=self.refresh_token)
+        self.bind_text(lambda text: self.btn_refresh_token.config(text=text), 'refresh_token')
         self.btn_refresh_token.grid(row=0, column=0, padx=(0, 5), sticky=(tk.W, tk.E))
 
-        self.btn_save_new = ttk.Button(btn_frame, text=self.tr('save_current'),
-                                     command=self.save_new_account)
+        self.btn_save_new = ttk.Button(btn_frame, command=self.save_new_account)
+        self.bind_text(lambda text: self.btn_save_new.config(text=text), 'save_current')
         self.btn_save_new.grid(row=0, column=1, padx=5, sticky=(tk.W, tk.E))
 
-        self.btn_logout = ttk.Button(btn_frame, text=self.tr('logout'),
-                                   command=self.logout_account)
+        self.btn_logout = ttk.Button(btn_frame, command=self.logout_account)
+        self.bind_text(lambda text: self.btn_logout.config(text=text), 'logout')
         self.btn_logout.grid(row=0, column=2, padx=(5, 0), sticky=(tk.W, tk.E))
 
         for i in range(3):
             btn_frame.columnconfigure(i, weight=1)
 
+        self.progress = ttk.Progressbar(main_frame, mode='indeterminate')
+        self.progress.grid(row=4, column=0, sticky=(tk.W, tk.E), pady=(10, 0))
+        self.progress.grid_remove()
+        self.busy_shown = False
+
         self.refresh_list()
         
+        self.registry_changes = queue.Queue()
+        self.watcher = RegistryWatcher(self.registry, self.registry_changes.put)
+        self.watcher.start()
+        self.root.after(250, self.poll_registry_changes)
+        self.root.after(50, self.poll_tasks)
+        self.root.after(60000, self.tick_token_ages)
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        self.root.bind('<Control-Shift-D>', lambda e: self.show_diagnostics())
+        self.diagnostics = None
+        
+        self.root.deiconify()
         self.root.mainloop()
 
-    def refresh_list(self):
-        for item in self.account_tree.get_children():
-            self.account_tree.delete(item)
-        
-        for name, values in self.accounts.items():
-            info = self.parse_account_info(values)
-            
-            info_parts = []
-            if info['platform']:
-                info_parts.append(info['platform'])
-            if info['reg_nation']:
-                info_parts.append(info['reg_nation'])
-            if info['create_time']:
-                info_parts.append(f"{self.tr('registered')}: {info['create_time']}")
-            if info['token_time']:
-                info_parts.append(f"{self.tr('token')}: {info['token_time']}")
-            
-            info_text = " | ".join(info_parts)
-            
-            self.account_tree.insert('', 'end', text=name, values=(info_text,), tags=(name,))
+    def show_diagnostics(self):
+        # Hidden panel (Ctrl+Shift+D) listing the hot-path timings.
+        if self.diagnostics is not None and self.diagnostics.winfo_exists():
+            self.diagnostics.lift()
+            return
+        window = tk.Toplevel(self.root)
+        window.title(self.tr('diagnostics_title'))
+        window.geometry("520x260")
+        self.diagnostics = window
+
+        columns = ('count', 'p50', 'p95', 'max')
+        table = ttk.Treeview(window, columns=columns, show='tree headings', height=8)
+        table.heading('#0', text=self.tr('timing_name'))
+        table.heading('count', text=self.tr('timing_count'))
+        for column in columns[1:]:
+            table.heading(column, text=f"{column} (ms)")
+        table.column('#0', width=170)
+        for column in columns:
+            table.column(column, width=80, anchor=tk.E)
+        table.pack(fill=tk.BOTH, expand=True, padx=10, pady=(10, 5))
+
+        btn_frame = ttk.Frame(window)
+        btn_frame.pack(fill=tk.X, padx=10, pady=(0, 10))
+        ttk.Button(btn_frame, text=self.tr('reset_timings'), command=timings.reset).pack(side=tk.LEFT)
+        ttk.Button(btn_frame, text=self.tr('export_timings'), command=self.export_timings).pack(side=tk.RIGHT)
+
+        def update():
+            if not window.winfo_exists():
+                return
+            table.delete(*table.get_children())
+            for name, row in timings.summary().items():
+                table.insert('', tk.END, text=name, values=(
+                    row['count'], f"{row['p50_ms']:.2f}", f"{row['p95_ms']:.2f}", f"{row['max_ms']:.2f}"
+                ))
+            self.root.after(1000, update)
+        update()
+
+    def export_timings(self):
+        path = filedialog.asksaveasfilename(defaultextension='.json', initialfile='bd2_timings.json',
+                                            filetypes=[('JSON', '*.json')], parent=self.diagnostics)
+        if path:
+            text = timings.export_text()
+            self.run_task(lambda: write_atomic(path, text),
+                          lambda result: messagebox.showinfo(self.tr('success'), self.tr('timings_exported', path)))
+
+    def on_close(self):
+        self.worker.flush(5)
+        self.root.destroy()
+
+    def run_task(self, job, on_done, on_error=None, key=None):
+        self.worker.submit(job, on_done, on_error or self.show_task_error, key)
+        self.set_busy(True)
+
+    def poll_tasks(self):
+        self.worker.drain()
+        self.set_busy(self.worker.busy())
+        self.root.after(50, self.poll_tasks)
+
+    def set_busy(self, busy):
+        if busy == self.busy_shown:
+            return
+        self.busy_shown = busy
+        if busy:
+            self.progress.grid()
+            self.progress.start(10)
+            self.root.config(cursor='watch')
+        else:
+            self.progress.stop()
+            self.progress.grid_remove()
+            self.root.config(cursor='')
+
+    def show_task_error(self, error):
+        messagebox.showerror(self.tr('error'), str(error))
+
+    def show_write_error(self, error):
+        messagebox.showerror(self.tr('error'), self.tr('write_failed', str(error)))
+
+    def poll_registry_changes(self):
+        changed = False
+        snapshot = None
+        while True:
+            try:
+                snapshot = self.registry_changes.get_nowait()
+                changed = True
+            except queue.Empty:
+                break
+        if changed:
+            self.update_current_account_display(snapshot or {})
+        self.root.after(250, self.poll_registry_changes)
+
+    def account_row_parts(self, name, values):
+        # Parsed once per account change; the label is composed from these
+        # parts, so token ages and language switches only re-run the format.
+        info = self.info_cache.get(values)
+        tags = self.store.tags.get(name)
+        return name, info, ' '.join(f"#{tag}" for tag in tags) if tags else ''
+
+    def format_row_label(self, parts, now):
+        name, info, tags = parts
+        info_parts = []
+        if info['platform']:
+            info_parts.append(info['platform'])
+        if info['reg_nation']:
+            info_parts.append(info['reg_nation'])
+        if info['create_time']:
+            info_parts.append(f"{self.tr('registered')}: {info['create_time']}")
+        if info['token_ts'] is not None:
+            badge = "⚠ " if name in self.expiry.stale else ""
+            info_parts.append(f"{badge}{self.tr('token')}: {format_token_age(info['token_ts'], self.lang, now)}")
+        if tags:
+            info_parts.append(tags)
+        return " | ".join(info_parts)
+
+    def row_tags(self, name):
+        return (name, 'stale') if name in self.expiry.stale else (name,)
+
+    @timed('refresh_list')
+    def refresh_list(self, select=None):
+        self.age_now = time.time()
+        self.row_parts = {name: self.account_row_parts(name, values) for name, values in self.accounts.items()}
+        self.show_rows(select)
+        self.check_token_expiry()
+
+    @timed('filter_list')
+    def filter_list(self):
+        self.show_rows(relabel=False)
+
+    def show_rows(self, select=None, relabel=True):
+        # Rows outside the search filter are dropped; their parts are kept.
+        # Only rows on screen are labelled: a label reads the auth-member
+        # fields, which AccountInfo parses on first use. The others keep their
+        # text, or start blank, until update_visible_rows shows them.
+        # Without `relabel` rows already labelled keep their text.
+        matches = self.search_index.search(self.filter_var.get())
+        start, stop = self.visible_range()
+        names = [name for name in self.ordered_names() if matches is None or name in matches]
+        rows = []
+        for index, name in enumerate(names):
+            label = self.row_labels.get(name)
+            if start <= index < stop and (relabel or label is None):
+                label = self.format_row_label(self.row_parts[name], self.age_now)
+            rows.append((name, label))
+        ops = diff_rows(self.row_names, self.row_labels, rows)
+
+        # Removals come first; one delete call drops them all.
+        removed = [op[2] for op in ops if op[0] == 'remove']
+        if removed:
+            self.account_tree.delete(*[self.row_ids.pop(name) for name in removed])
+            for name in removed:
+                del self.row_labels[name]
+        for op in ops[len(removed):]:
+            if op[0] == 'insert':
+                _, index, name, label = op
+                self.row_ids[name] = self.account_tree.insert('', index, text=name, values=(label or '',),
+                                                              tags=self.row_tags(name))
+                self.row_labels[name] = label
+            elif op[0] == 'order':
+                # Relinks every remaining row in one call; selection is kept.
+                self.account_tree.set_children('', *[self.row_ids[name] for name in op[1]])
+            else:
+                _, index, name, label = op
+                self.account_tree.item(self.row_ids[name], values=(label,), tags=self.row_tags(name))
+                self.row_labels[name] = label
+        
+        self.row_names = [name for name, _ in rows]
+        
+        if select in self.row_ids:
+            self.account_tree.selection_set(self.row_ids[select])
+            self.account_tree.focus(self.row_ids[select])
+            self.account_tree.see(self.row_ids[select])
+
+    def ordered_names(self):
+        if self.sort_field is not None:
+            return self.sort_index.names(self.sort_field, self.sort_reverse)
+        return reversed(self.row_parts) if self.sort_reverse else self.row_parts
+
+    def index_account(self, name, values):
+        self.token_index.add(name, values)
+        info = self.info_cache.get(values)
+        self.search_index.add(name, info)
+        self.sort_index.add(name, info)
+        self.expiry.add(name, info)
+
+    def remove_indexed(self, name):
+        self.token_index.remove(name)
+        self.search_index.remove(name)
+        self.sort_index.remove(name)
+        self.expiry.remove(name)
+
+    def rename_indexed(self, old_name, new_name):
+        self.token_index.rename(old_name, new_name)
+        self.search_index.rename(old_name, new_name)
+        self.sort_index.rename(old_name, new_name)
+        self.expiry.rename(old_name, new_name)
+
+    def check_token_expiry(self):
+        # One timer, armed for the next token to go stale; only the rows
+        # that crossed the threshold are redrawn, and those off screen only
+        # get their badge when update_visible_rows shows them.
+        now = time.time()
+        start, stop = self.visible_range()
+        visible = set(self.row_names[start:stop])
+        for name in self.expiry.advance(now):
+            if name in visible:
+                label = self.format_row_label(self.row_parts[name], self.age_now)
+                self.account_tree.item(self.row_ids[name], values=(label,), tags=self.row_tags(name))
+                self.row_labels[name] = label
+            elif name in self.row_ids:
+                self.account_tree.item(self.row_ids[name], tags=self.row_tags(name))
+        if self.expiry_timer is not None:
+            self.root.after_cancel(self.expiry_timer)
+            self.expiry_timer = None
+        due = self.expiry.next_due()
+        if due is not None:
+            delay = min(max(int((due - now) * 1000) + 1, 0), MAX_TIMER_MS)
+            self.expiry_timer = self.root.after(delay, self.check_token_expiry)
 
     def show_context_menu(self, event):
         item = self.account_tree.identify_row(event.y)
         if not item:
             return
         
-        self.account_tree.selection_set(item)
+        if item not in self.account_tree.selection():
+            self.account_tree.selection_set(item)
         self.account_tree.focus(item)
 
         menu = Menu(self.root, tearoff=0)
         menu.add_command(label=self.tr('load_account'), command=self.load_account)
         menu.add_command(label=self.tr('overwrite_account'), command=self.overwrite_account)
+        if hasattr(self.store, 'rollback'):
+            menu.add_command(label=self.tr('restore_token'), command=self.restore_previous_token)
         menu.add_separator()
         menu.add_command(label=self.tr('rename'), command=self.rename_account)
+        menu.add_command(label=self.tr('add_tag'), command=self.tag_accounts)
+        menu.add_command(label=self.tr('remove_tag'), command=lambda: self.tag_accounts(remove=True))
+        menu.add_command(label=self.tr('export_selected'), command=self.export_accounts)
         menu.add_command(label=self.tr('delete'), command=self.delete_account)
 
         try:
             menu.tk_popup(event.x_root, event.y_root)
         finally:
             menu.grab_release()
+    def visible_range(self):
+        # yview() only follows inserts once the tree is laid out when idle, so
+        # this is the range seen then, widened to at least `height` rows;
+        # the yscrollcommand after the next layout labels anything it missed.
+        start, stop = self.shown_range
+        return start, max(stop, start + int(self.account_tree.cget('height')))
+
+    def update_visible_rows(self, first, last):
+        # Rows scrolled out of view keep their old text until they are shown.
+        count = len(self.row_names)
+        self.shown_range = (int(first * count), math.ceil(last * count))
+        for name in self.row_names[self.shown_range[0]:self.shown_range[1]]:
+            label = self.format_row_label(self.row_parts[name], self.age_now)
+            if label != self.row_labels[name]:
+                self.account_tree.item(self.row_ids[name], values=(label,))
+                self.row_labels[name] = label
+
+    def tick_token_ages(self):
+        self.age_now = time.time()
+        self.update_visible_rows(*self.account_tree.yview())
+        self.root.after(60000, self.tick_token_ages)
+
+    def on_tree_scroll(self, scrollbar, first, last):
+        scrollbar.set(first, last)
+        self.update_visible_rows(float(first), float(last))
+
+    @timed('parse_account_info')
     def parse_account_info(self, values):
-        info = {'platform': '', 'create_time': '', 'token_time': '', 'reg_nation': ''}
-        
-        auth_member = None
-        for key, value_data in values.items():
-            if key.startswith('neon_auth_member_h'):
-                auth_member = value_data.get('data', '') if isinstance(value_data, dict) else value_data
-                break
-        
-        if auth_member:
-            try:
-                auth_member = auth_member.rstrip('\x00')
-                data = json.loads(auth_member)
-                
-                reg_path = data.get('reg_path', '')
-                if reg_path:
-                    if reg_path.startswith('FIREBASE_'):
-                        info['platform'] = reg_path.split('_', 1)[1]
-                    else:
-                        info['platform'] = reg_path
-                
-                reg_nation = data.get('reg_nation', '')
-                if reg_nation:
-                    info['reg_nation'] = reg_nation
-                
-                crt_dt = data.get('crt_dt')
-                if crt_dt:
-                    dt = datetime.fromtimestamp(crt_dt / 1000)
-                    info['create_time'] = dt.strftime('%Y-%m-%d')
-            except (json.JSONDecodeError, ValueError, KeyError):
-                pass
-        
-        access_token = None
-        for key, value_data in values.items():
-            if key.startswith('neon_access_token_h'):
-                access_token = value_data.get('data', '') if isinstance(value_data, dict) else value_data
-                break
-        
-        if access_token:
-            try:
-                access_token = access_token.rstrip('\x00')
-                parts = access_token.split('|')
-                if len(parts) >= 6:
-                    timestamp = int(parts[5])
-                    token_dt = datetime.fromtimestamp(timestamp / 1000)
-                    now = datetime.now()
-                    delta = now - token_dt
-                    
-                    total_seconds = int(delta.total_seconds())
-                    days = total_seconds // 86400
-                    hours = (total_seconds % 86400) // 3600
-                    minutes = (total_seconds % 3600) // 60
-                    
-                    if total_seconds < 3600:
-                        if self.lang == 'zh':
-                            info['token_time'] = f"{minutes}分钟前"
-                        else:
-                            info['token_time'] = f"{minutes}m ago"
-                    elif total_seconds < 86400:
-                        if self.lang == 'zh':
-                            info['token_time'] = f"{hours}小时前"
-                        else:
-                            info['token_time'] = f"{hours}h ago"
-                    else:
-                        if self.lang == 'zh':
-                            info['token_time'] = f"{days}天{hours}小时前"
-                        else:
-                            info['token_time'] = f"{days}d {hours}h ago"
-            except (ValueError, IndexError):
-                pass
-        
-        return info
+        cached = self.info_cache.get(values)
+        return {
+            'platform': cached['platform'],
+            'create_time': cached['create_time'],
+            'token_time': format_token_age(cached['token_ts'], self.lang),
+            'reg_nation': cached['reg_nation']
+        }
 
     def normalize_account_data(self, values):
         for key, value in values.items():
             if key.startswith('neon_access_token_h'):
-                token = value.rstrip('\x00')
+                token = value_text(value)
                 parts = token.split('|')
                 if len(parts) >= 1 and parts[0]:
                     token_id = parts[0]
@@ -344,18 +597,16 @@ class AccountSwitcher:
                     return token_id
         return ""
 
-    def update_current_account_display(self):
-        current_values = self.read_registry_values()
+    def update_current_account_display(self, current_values=None):
+        if current_values is None:
+            current_values = self.read_registry_values()
+        # Kept so a language switch can redraw the label without the registry.
+        self.current_values = current_values
         if not current_values:
             self.current_account_label.config(text=f"{self.tr('current_login')}: {self.tr('not_logged_in')}")
             return
         
-        current_token = None
-        for key, value_data in current_values.items():
-            if key.startswith('neon_access_token_h'):
-                current_token = value_data.get('data', '') if isinstance(value_data, dict) else value_data
-                current_token = current_token.rstrip('\x00')
-                break
+        current_token = get_value_data(current_values, ACCESS_TOKEN_PATTERN)
         
         if not current_token:
             self.current_account_label.config(text=f"{self.tr('current_login')}: {self.tr('not_logged_in')}")
@@ -368,21 +619,7 @@ class AccountSwitcher:
         
         current_prefix = '|'.join(current_parts[:4])
         
-        matched_account = None
-        for name, values in self.accounts.items():
-            for key, value_data in values.items():
-                if key.startswith('neon_access_token_h'):
-                    saved_token = value_data.get('data', '') if isinstance(value_data, dict) else value_data
-                    saved_token = saved_token.rstrip('\x00')
-                    if saved_token:
-                        saved_parts = saved_token.split('|')
-                        if len(saved_parts) >= 4:
-                            saved_prefix = '|'.join(saved_parts[:4])
-                            if saved_prefix == current_prefix:
-                                matched_account = name
-                                break
-            if matched_account:
-                break
+        matched_account = self.token_index.lookup(current_prefix)
         
         info = self.parse_account_info(current_values)
         
@@ -406,13 +643,15 @@ class AccountSwitcher:
         self.current_account_label.config(text=display_text)
 
     def refresh_current_account(self):
-        self.update_current_account_display()
+        self.run_task(self.snapshot_registry, self.complete_refresh_current, key='refresh_current')
+
+    def complete_refresh_current(self, values):
+        self.update_current_account_display(self.checked_registry_values(values) or {})
 
     def get_masked_token_id(self, values):
         for key, value_data in values.items():
             if key.startswith('neon_access_token_h'):
-                token = value_data.get('data', '') if isinstance(value_data, dict) else value_data
-                token = token.rstrip('\x00')
+                token = value_text(value_data)
                 parts = token.split('|')
                 if len(parts) >= 1 and parts[0]:
                     token_id = parts[0]
@@ -421,66 +660,34 @@ class AccountSwitcher:
                     return token_id
         return ""
 
+    @timed('read_registry_values')
+    def snapshot_registry(self):
+        return self.registry.snapshot()
+
     def read_registry_values(self):
-        try:
-            registry_keys = self.get_registry_keys()
-            if not registry_keys:
-                messagebox.showwarning(self.tr('error'), self.tr('registry_not_found'))
-                return None
-            
-            key = winreg.OpenKey(winreg.HKEY_CURRENT_USER, self.registry_path, 0, winreg.KEY_READ)
-            values = {}
-            for pattern, key_name in registry_keys.items():
-                try:
-                    value, value_type = winreg.QueryValueEx(key, key_name)
-                    if isinstance(value, bytes):
-                        value_str = value.decode('utf-8', errors='ignore')
-                    else:
-                        value_str = str(value) if value else ""
-                    values[key_name] = {'data': value_str, 'type': value_type}
-                except FileNotFoundError:
-                    values[key_name] = {'data': "", 'type': winreg.REG_BINARY}
-            winreg.CloseKey(key)
-            return values
-        except FileNotFoundError:
+        return self.checked_registry_values(self.snapshot_registry())
+
+    def checked_registry_values(self, values):
+        if not values:
             messagebox.showwarning(self.tr('error'), self.tr('registry_not_found'))
             return None
+        return values
 
+    @timed('write_registry_values')
     def write_registry_values(self, values):
-        try:
-            registry_keys = self.get_registry_keys()
-            key = winreg.OpenKey(winreg.HKEY_CURRENT_USER, self.registry_path, 0, winreg.KEY_WRITE)
-            
-            for saved_key, value_data in values.items():
-                target_key = saved_key
-                
-                if isinstance(value_data, dict):
-                    value_str = value_data.get('data', '')
-                    value_type = value_data.get('type', winreg.REG_BINARY)
-                else:
-                    value_str = value_data
-                    value_type = winreg.REG_BINARY
-                
-                for pattern in self.token_key_patterns:
-                    if saved_key.startswith(pattern):
-                        if pattern in registry_keys:
-                            target_key = registry_keys[pattern]
-                        break
-                
-                if value_type == winreg.REG_BINARY:
-                    value_bytes = value_str.encode('utf-8') if value_str else b''
-                    winreg.SetValueEx(key, target_key, 0, winreg.REG_BINARY, value_bytes)
-                else:
-                    winreg.SetValueEx(key, target_key, 0, value_type, value_str)
-            
-            winreg.CloseKey(key)
-            return True
-        except Exception as e:
-            messagebox.showerror(self.tr('error'), self.tr('write_failed', str(e)))
-            return False
+        report = {}
+        snapshot = self.registry.write(values, report)
+        return snapshot, report
+
+    def switch_report_text(self, report):
+        elapsed = report['read_ms'] + report['write_ms'] + report['verify_ms']
+        return self.tr('switch_report', report['written'], report['unchanged'], f"{elapsed:.1f}")
 
     def save_new_account(self):
-        values = self.read_registry_values()
+        self.run_task(self.snapshot_registry, self.complete_save_new_account, key='save_new')
+
+    def complete_save_new_account(self, values):
+        values = self.checked_registry_values(values)
         if not values:
             return
 
@@ -490,10 +697,10 @@ class AccountSwitcher:
                 if not messagebox.askyesno(self.tr('confirm'), self.tr('account_exists', name)):
                     return
 
-            self.accounts[name] = values
-            self.save_accounts()
+            self.store.put(name, values)
+            self.index_account(name, values)
             self.refresh_list()
-            self.update_current_account_display()
+            self.update_current_account_display(values)
             messagebox.showinfo(self.tr('success'), self.tr('account_saved', name))
 
     def overwrite_account(self):
@@ -503,17 +710,40 @@ class AccountSwitcher:
             return
 
         name = self.account_tree.item(selection[0])['text']
-        values = self.read_registry_values()
+        self.run_task(self.snapshot_registry,
+                      lambda values: self.complete_overwrite_account(name, values), key='overwrite')
+
+    def complete_overwrite_account(self, name, values):
+        values = self.checked_registry_values(values)
         if not values:
             return
 
         if messagebox.askyesno(self.tr('confirm'), self.tr('overwrite_confirm', name)):
-            self.accounts[name] = values
-            self.save_accounts()
+            self.store.put(name, values)
+            self.index_account(name, values)
             self.refresh_list()
-            self.update_current_account_display()
+            self.update_current_account_display(values)
             messagebox.showinfo(self.tr('success'), self.tr('account_updated', name))
 
+    def restore_previous_token(self):
+        selection = self.account_tree.selection()
+        if not selection:
+            messagebox.showwarning(self.tr('tip'), self.tr('select_account_first'))
+            return
+
+        name = self.account_tree.item(selection[0])['text']
+        history = self.store.history(name)
+        if not history:
+            messagebox.showwarning(self.tr('tip'), self.tr('no_token_history', name))
+            return
+
+        token_age = format_token_age(self.info_cache.get(history[0][1])['token_ts'], self.lang)
+        if messagebox.askyesno(self.tr('confirm'), self.tr('restore_token_confirm', name, token_age)):
+            values = self.store.rollback(name)
+            self.index_account(name, values)
+            self.refresh_list()
+            messagebox.showinfo(self.tr('success'), self.tr('token_restored', name))
+
     def load_account(self):
         selection = self.account_tree.selection()
         if not selection:
@@ -524,9 +754,14 @@ class AccountSwitcher:
         values = self.accounts[name]
 
         if messagebox.askyesno(self.tr('confirm'), self.tr('load_confirm', name)):
-            if self.write_registry_values(values):
-                self.update_current_account_display()
-                messagebox.showinfo(self.tr('success'), self.tr('account_loaded', name))
+            self.run_task(lambda: self.write_registry_values(values),
+                          lambda result: self.complete_load_account(name, *result),
+                          self.show_write_error, key='switch')
+
+    def complete_load_account(self, name, snapshot, report):
+        self.update_current_account_display(snapshot)
+        message = self.tr('account_loaded', name) + '\n' + self.switch_report_text(report)
+        messagebox.showinfo(self.tr('success'), message)
 
     def rename_account(self):
         selection = self.account_tree.selection()
@@ -543,43 +778,85 @@ class AccountSwitcher:
                 messagebox.showwarning(self.tr('error'), self.tr('name_exists', new_name))
                 return
             
-            self.accounts[new_name] = self.accounts.pop(old_name)
-            self.save_accounts()
-            self.refresh_list()
+            self.store.rename(old_name, new_name)
+            self.rename_indexed(old_name, new_name)
+            self.refresh_list(select=new_name)
             messagebox.showinfo(self.tr('success'), self.tr('renamed', new_name))
 
+    def selected_names(self):
+        return [self.account_tree.item(item)['text'] for item in self.account_tree.selection()]
+
     def delete_account(self):
-        selection = self.account_tree.selection()
-        if not selection:
+        names = self.selected_names()
+        if not names:
             messagebox.showwarning(self.tr('tip'), self.tr('select_delete'))
             return
 
-        name = self.account_tree.item(selection[0])['text']
-        if messagebox.askyesno(self.tr('confirm'), self.tr('delete_confirm', name)):
-            del self.accounts[name]
-            self.save_accounts()
+        if len(names) == 1:
+            question = self.tr('delete_confirm', names[0])
+        else:
+            question = self.tr('delete_many_confirm', len(names))
+        if messagebox.askyesno(self.tr('confirm'), question):
+            self.store.delete_many(names)
+            for name in names:
+                self.remove_indexed(name)
             self.refresh_list()
-            messagebox.showinfo(self.tr('success'), self.tr('account_deleted', name))
+            if len(names) == 1:
+                messagebox.showinfo(self.tr('success'), self.tr('account_deleted', names[0]))
+            else:
+                messagebox.showinfo(self.tr('success'), self.tr('accounts_deleted', len(names)))
+
+    def tag_accounts(self, remove=False):
+        names = self.selected_names()
+        if not names:
+            messagebox.showwarning(self.tr('tip'), self.tr('select_accounts'))
+            return
+
+        tag = simpledialog.askstring(self.tr('tag_title'), self.tr('input_tag'))
+        tag = tag.strip() if tag else ''
+        if tag:
+            self.store.tag_many(names, tag, remove)
+            self.refresh_list()
+            messagebox.showinfo(self.tr('success'), self.tr('tags_updated', len(names)))
+
+    def export_accounts(self):
+        names = self.selected_names()
+        if not names:
+            messagebox.showwarning(self.tr('tip'), self.tr('select_accounts'))
+            return
+
+        path = filedialog.asksaveasfilename(defaultextension='.json', initialfile='accounts_export.json',
+                                            filetypes=[('JSON', '*.json')])
+        if path:
+            accounts = {name: self.accounts[name] for name in names}
+            self.run_task(lambda: write_atomic(path, export_text(accounts)),
+                          lambda result: messagebox.showinfo(self.tr('success'),
+                                                             self.tr('accounts_exported', len(names))))
 
     def logout_account(self):
         if messagebox.askyesno(self.tr('confirm'), self.tr('logout_confirm')):
-            registry_keys = self.get_registry_keys()
-            empty_values = {key_name: {'data': '', 'type': winreg.REG_BINARY} for key_name in registry_keys.values()}
-            if self.write_registry_values(empty_values):
-                self.update_current_account_display()
-                messagebox.showinfo(self.tr('success'), self.tr('logged_out'))
+            self.run_task(self.clear_registry_values, lambda result: self.complete_logout(*result),
+                          self.show_write_error, key='switch')
+
+    def clear_registry_values(self):
+        registry_keys = self.get_registry_keys()
+        empty_values = {key_name: {'data': '', 'type': REG_BINARY} for key_name in registry_keys.values()}
+        return self.write_registry_values(empty_values)
+
+    def complete_logout(self, snapshot, report):
+        self.update_current_account_display(snapshot)
+        message = self.tr('logged_out') + '\n' + self.switch_report_text(report)
+        messagebox.showinfo(self.tr('success'), message)
 
     def refresh_token(self):
-        current_values = self.read_registry_values()
+        self.run_task(self.snapshot_registry, self.complete_refresh_token, key='refresh_token')
+
+    def complete_refresh_token(self, current_values):
+        current_values = self.checked_registry_values(current_values)
         if not current_values:
             return
         
-        current_token = None
-        for key, value_data in current_values.items():
-            if key.startswith('neon_access_token_h'):
-                current_token = value_data.get('data', '') if isinstance(value_data, dict) else value_data
-                current_token = current_token.rstrip('\x00')
-                break
+        current_token = get_value_data(current_values, ACCESS_TOKEN_PATTERN)
         
         if not current_token:
             messagebox.showwarning(self.tr('error'), self.tr('no_token'))
@@ -593,28 +870,14 @@ class AccountSwitcher:
             
             current_prefix = '|'.join(current_parts[:4])
             
-            matched_account = None
-            for name, values in self.accounts.items():
-                for key, value_data in values.items():
-                    if key.startswith('neon_access_token_h'):
-                        saved_token = value_data.get('data', '') if isinstance(value_data, dict) else value_data
-                        saved_token = saved_token.rstrip('\x00')
-                        if saved_token:
-                            saved_parts = saved_token.split('|')
-                            if len(saved_parts) >= 4:
-                                saved_prefix = '|'.join(saved_parts[:4])
-                                if saved_prefix == current_prefix:
-                                    matched_account = name
-                                    break
-                if matched_account:
-                    break
+            matched_account = self.token_index.lookup(current_prefix)
             
             if matched_account:
                 if messagebox.askyesno(self.tr('confirm'), self.tr('matched_account', matched_account)):
-                    self.accounts[matched_account] = current_values
-                    self.save_accounts()
+                    self.store.put(matched_account, current_values)
+                    self.index_account(matched_account, current_values)
                     self.refresh_list()
-                    self.update_current_account_display()
+                    self.update_current_account_display(current_values)
                     messagebox.showinfo(self.tr('success'), self.tr('token_updated', matched_account))
             else:
                 masked_prefix = self.mask_prefix(current_prefix)
@@ -1,15 +1,38 @@
 import sys
 import json
-import winreg
+import time
 import locale
 from pathlib import Path
-from datetime import datetime
+from registry_backend import create_backend, REG_BINARY
+from registry_value import value_text
+from account_index import TokenPrefixIndex, get_value_data, ACCESS_TOKEN_PATTERN
+from account_search import AccountSearchIndex
+from account_sort import SortedAccountIndex, SORT_FIELDS
+from token_expiry import ExpiryScheduler, DEFAULT_STALE_HOURS
+from account_info import AccountInfoCache, format_token_age
+from list_diff import diff_rows
+from account_store import create_store, PassphraseError, export_text, write_atomic
+from registry_watcher import RegistryWatcher
+from task_worker import SerialWorker
+from translator import Translator
+from perf_timings import timings, timed
 from PyQt6.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
-    QListWidget, QPushButton, QInputDialog, QMessageBox, QLabel, QListWidgetItem, QMenu
+    QListView, QPushButton, QInputDialog, QMessageBox, QLabel, QMenu, QStyledItemDelegate, QProgressBar,
+    QAbstractItemView, QFileDialog, QLineEdit, QComboBox, QDialog, QTableWidget, QTableWidgetItem, QHeaderView
 )
-from PyQt6.QtCore import Qt
-from PyQt6.QtGui import QFont, QCursor
+from PyQt6.QtCore import Qt, QAbstractListModel, QModelIndex, QObject, QPoint, QTimer, pyqtSignal
+from PyQt6.QtGui import QFont, QCursor, QKeySequence, QShortcut, QColor, QPalette
+
+
+# Translation keys of what an encrypted store asks for.
+PASSPHRASE_PROMPTS = {
+    'unlock': 'input_passphrase',
+    'retry': 'passphrase_retry',
+    'new': 'new_passphrase',
+    'confirm': 'confirm_passphrase',
+    'mismatch': 'passphrase_mismatch'
+}
 
 
 def get_app_dir():
@@ -19,6 +42,154 @@ def get_app_dir():
         return Path(__file__).parent
 
 
+RESET_THRESHOLD = 500
+# None keeps the saved order.
+SORT_OPTIONS = (None,) + SORT_FIELDS
+# QTimer takes 32-bit milliseconds; far-off expiries are re-armed.
+MAX_TIMER_MS = 6 * 3600 * 1000
+
+
+class AccountListModel(QAbstractListModel):
+    def __init__(self, row_parts, format_label, parent=None):
+        super().__init__(parent)
+        self.row_parts = row_parts
+        self.format_label = format_label
+        self.names = []
+        self.row_values = {}
+        self.parts = {}
+        self.labels = {}
+        self.now = time.time()
+        # Names whose token went stale; shared with the window's scheduler.
+        self.stale = set()
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self.names)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        if role in (Qt.ItemDataRole.DisplayRole, Qt.ItemDataRole.UserRole):
+            return self.names[index.row()]
+        return None
+
+    def label(self, row):
+        name = self.names[row]
+        label = self.labels.get(name)
+        if label is None:
+            parts = self.parts.get(name)
+            if parts is None:
+                parts = self.parts[name] = self.row_parts(name, self.row_values[name])
+            label = self.labels[name] = self.format_label(parts, self.now)
+        return label
+
+    def row_of(self, name):
+        if name not in self.row_values:
+            return -1
+        return self.names.index(name)
+
+    def sync(self, accounts):
+        ops = diff_rows(self.names, self.row_values, list(accounts.items()))
+        if len(ops) > RESET_THRESHOLD:
+            # Past a few hundred edits one reset is cheaper than per-row signals.
+            self.reset(accounts)
+            return
+        for op in ops:
+            if op[0] == 'remove':
+                _, index, name = op
+                self.beginRemoveRows(QModelIndex(), index, index)
+                del self.names[index]
+                del self.row_values[name]
+                self.parts.pop(name, None)
+                self.labels.pop(name, None)
+                self.endRemoveRows()
+            elif op[0] == 'insert':
+                _, index, name, values = op
+                self.beginInsertRows(QModelIndex(), index, index)
+                self.names.insert(index, name)
+                self.row_values[name] = values
+                self.endInsertRows()
+            elif op[0] == 'order':
+                # One layout change for the whole reordering; the selection
+                # and current row follow their accounts.
+                self.layoutAboutToBeChanged.emit()
+                rows = {name: row for row, name in enumerate(op[1])}
+                persistent = self.persistentIndexList()
+                self.changePersistentIndexList(
+                    persistent, [self.index(rows[self.names[index.row()]]) for index in persistent]
+                )
+                self.names = list(op[1])
+                self.layoutChanged.emit()
+            else:
+                _, index, name, values = op
+                self.row_values[name] = values
+                self.parts.pop(name, None)
+                self.labels.pop(name, None)
+                model_index = self.index(index)
+                self.dataChanged.emit(model_index, model_index)
+
+    def reset(self, accounts):
+        self.beginResetModel()
+        kept = self.row_values
+        self.names = list(accounts)
+        self.row_values = dict(accounts)
+        for name in list(self.parts):
+            if name not in self.row_values or kept.get(name) is not self.row_values[name]:
+                self.parts.pop(name, None)
+                self.labels.pop(name, None)
+        self.endResetModel()
+
+    def refresh_rows(self, names):
+        for name in names:
+            row = self.row_of(name)
+            if row >= 0:
+                self.parts.pop(name, None)
+                self.labels.pop(name, None)
+                model_index = self.index(row)
+                self.dataChanged.emit(model_index, model_index)
+
+    def tick(self, first, last, now):
+        # Only the rows on screen are re-labelled; the rest are composed from
+        # their cached parts with the new time when they are next painted.
+        self.now = now
+        visible = {}
+        changed = []
+        for row in range(first, last + 1):
+            name = self.names[row]
+            parts = self.parts.get(name)
+            if parts is None:
+                continue
+            visible[name] = self.format_label(parts, now)
+            if visible[name] != self.labels.get(name):
+                changed.append(row)
+        self.labels = visible
+        if changed:
+            self.dataChanged.emit(self.index(changed[0]), self.index(changed[-1]))
+
+    def invalidate_labels(self):
+        self.parts.clear()
+        self.labels.clear()
+        if self.names:
+            self.dataChanged.emit(self.index(0), self.index(len(self.names) - 1))
+
+
+class AccountItemDelegate(QStyledItemDelegate):
+    # Rows are only formatted here, when the view paints them.
+    def initStyleOption(self, option, index):
+        super().initStyleOption(option, index)
+        model = index.model()
+        option.text = model.label(index.row())
+        if model.names[index.row()] in model.stale:
+            option.palette.setColor(QPalette.ColorRole.Text, QColor('#c62828'))
+
+
+class BackgroundSignals(QObject):
+    # Emitted from background threads; Qt queues delivery onto the GUI thread.
+    registry_changed = pyqtSignal(object)
+    task_finished = pyqtSignal()
+
+
 class AccountSwitcher(QMainWindow):
     def __init__(self):
         super().__init__()
@@ -27,80 +198,66 @@ class AccountSwitcher(QMainWindow):
             "neon_access_token_h",
             "neon_auth_member_h"
         ]
+        self.registry = create_backend(self.registry_path, self.token_key_patterns)
         self.app_dir = get_app_dir()
         self.data_file = self.app_dir / "accounts.json"
+        self.worker = SerialWorker()
+        self.store = create_store(
+            self.data_file, writer=lambda job: self.worker.submit(job, on_error=self.show_task_error),
+            passphrase=self.ask_passphrase
+        )
         self.load_translations()
         self.accounts = self.load_accounts()
+        self.token_index = TokenPrefixIndex(self.accounts)
+        self.info_cache = AccountInfoCache(self.accounts)
+        infos = {name: self.info_cache.get(values) for name, values in self.accounts.items()}
+        self.search_index = AccountSearchIndex(infos)
+        self.sort_index = SortedAccountIndex(infos)
+        self.expiry = ExpiryScheduler(infos, self.config.get('stale_hours', DEFAULT_STALE_HOURS) * 3600)
+        self.expiry.advance(time.time())
         self.init_ui()
 
+    @timed('get_registry_keys')
     def get_registry_keys(self):
-        try:
-            key = winreg.OpenKey(winreg.HKEY_CURRENT_USER, self.registry_path, 0, winreg.KEY_READ)
-            keys = {}
-            i = 0
-            while True:
-                try:
-                    name = winreg.EnumValue(key, i)[0]
-                    for pattern in self.token_key_patterns:
-                        if name.startswith(pattern):
-                            keys[pattern] = name
-                            break
-                    i += 1
-                except OSError:
-                    break
-            winreg.CloseKey(key)
-            return keys
-        except FileNotFoundError:
-            return {}
+        return self.registry.registry_keys(self.registry.snapshot())
 
+    @timed('load_accounts')
     def load_accounts(self):
-        if self.data_file.exists():
-            try:
-                with open(self.data_file, 'r', encoding='utf-8') as f:
-                    content = f.read().strip()
-                    if not content:
-                        return {}
-                    data = json.loads(content)
-                    self.config = data.get('_config', {})
-                    accounts = {k: v for k, v in data.items() if k != '_config'}
-                    return accounts
-            except (json.JSONDecodeError, ValueError) as e:
-                QMessageBox.warning(
-                    None, self.tr('tip') if hasattr(self, 'tr') else 'Tip', 
-                    self.tr('data_corrupted', str(e)) if hasattr(self, 'tr') else f'Data corrupted: {e}'
-                )
-                return {}
-        return {}
-
-    def save_accounts(self):
-        data = {
-            '_config': {
-                **self.config,
-                '_warning': 'This file contains sensitive account data. Do NOT share or upload publicly.'
-            }
-        }
-        data.update(self.accounts)
-        with open(self.data_file, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+        try:
+            config, accounts = self.store.load()
+            if config:
+                self.config = config
+            return accounts
+        except PassphraseError as e:
+            # Nothing could be read and nothing may be written; starting with
+            # an empty list would only invite saves into a locked store.
+            QMessageBox.critical(None, self.tr('error'), self.tr('wrong_passphrase', str(e)))
+            sys.exit(1)
+        except (json.JSONDecodeError, ValueError) as e:
+            QMessageBox.warning(
+                None, self.tr('tip') if hasattr(self, 'tr') else 'Tip', 
+                self.tr('data_corrupted', str(e)) if hasattr(self, 'tr') else f'Data corrupted: {e}'
+            )
+            return self.store.accounts
+
+    def ask_passphrase(self, prompt='unlock'):
+        if hasattr(self, 'translator'):
+            tr = self.tr
+        else:
+            # May run before translations are loaded when there is no config sidecar yet.
+            with open(Path(__file__).parent / "translations.json", 'r', encoding='utf-8') as f:
+                tr = Translator(json.load(f), 'en')
+        passphrase, ok = QInputDialog.getText(self, tr('passphrase_title'), tr(PASSPHRASE_PROMPTS[prompt]),
+                                              QLineEdit.EchoMode.Password)
+        return passphrase if ok else None
 
     def load_translations(self):
         trans_file = Path(__file__).parent / "translations.json"
         with open(trans_file, 'r', encoding='utf-8') as f:
             self.all_translations = json.load(f)
         
-        self.config = {}
-        saved_lang = None
-        
-        if self.data_file.exists():
-            try:
-                with open(self.data_file, 'r', encoding='utf-8') as f:
-                    content = f.read().strip()
-                    if content:
-                        data = json.loads(content)
-                        self.config = data.get('_config', {})
-                        saved_lang = self.config.get('language')
-            except:
-                pass
+        self.config = dict(self.store.load_config())
+        saved_lang = self.config.get('language')
         
         if saved_lang and saved_lang in self.all_translations:
             self.lang = saved_lang
@@ -116,30 +273,51 @@ class AccountSwitcher(QMainWindow):
             except:
                 self.lang = 'en'
         
-        self.translations = self.all_translations[self.lang]
+        self.translator = Translator(self.all_translations, self.lang)
 
     def switch_language(self):
-        new_lang = 'en' if self.lang == 'zh' else 'zh'
-        self.lang = new_lang
-        self.translations = self.all_translations[self.lang]
-        
-        self.config['language'] = new_lang
-        self.save_accounts()
-        
-        self.close()
-        self.__init__()
-        self.show()
+        self.lang = 'en' if self.lang == 'zh' else 'zh'
+        self.translator.set_language(self.lang)
+        self.config['language'] = self.lang
+        config = dict(self.config)
+        self.worker.submit(lambda: self.store.set_config(config), on_error=self.show_task_error)
+        self.retranslate_ui()
 
     def tr(self, key, *args):
-        text = self.translations.get(key, key)
-        if args:
-            text = text.replace('{0}', str(args[0]))
-            for i, arg in enumerate(args[1:], 1):
-                text = text.replace(f'{{{i}}}', str(arg))
-        return text
+        return self.translator(key, *args)
+
+    def bind_text(self, setter, key):
+        # Registers a widget text so retranslate_ui() can re-label it in place.
+        self.translated.append((setter, key))
+        setter(self.tr(key))
+
+    def retranslate_ui(self):
+        for setter, key in self.translated:
+            setter(self.tr(key))
+        self.lang_btn.setText("EN" if self.lang == 'zh' else "中文")
+        self.btn_refresh_current.setToolTip(self.tr('refresh_token') if self.lang == 'zh' else 'Refresh')
+        self.update_sort_box()
+        self.update_current_account_display(self.current_values or {})
+        self.update_visible_rows()
+
+    def update_sort_box(self):
+        for index, field in enumerate(SORT_OPTIONS):
+            self.sort_box.setItemText(index, self.tr(f"sort_{field or 'saved'}"))
+        self.sort_dir_btn.setText("↓" if self.sort_reverse else "↑")
+
+    def change_sort(self, field, reverse):
+        self.sort_field = field
+        self.sort_reverse = reverse
+        self.config['sort'] = [field, reverse]
+        config = dict(self.config)
+        self.worker.submit(lambda: self.store.set_config(config), on_error=self.show_task_error)
+        self.update_sort_box()
+        self.account_model.sync(self.visible_accounts())
 
     def init_ui(self):
-        self.setWindowTitle(f"{self.tr('window_title')} - github.com/Liovovo/BrownDust2-Account-Switcher")
+        self.translated = []
+        self.bind_text(lambda text: self.setWindowTitle(f"{text} - github.com/Liovovo/BrownDust2-Account-Switcher"),
+                       'window_title')
         self.setMinimumSize(650, 500)
 
         central_widget = QWidget()
@@ -149,10 +327,33 @@ class AccountSwitcher(QMainWindow):
         layout.setSpacing(10)
 
         title_layout = QHBoxLayout()
-        title = QLabel(self.tr('account_list'))
+        title = QLabel()
+        self.bind_text(title.setText, 'account_list')
         title.setStyleSheet("font-size: 16px; font-weight: bold; padding: 8px 0;")
         title_layout.addWidget(title)
         title_layout.addStretch()
+
+        self.filter_edit = QLineEdit()
+        self.bind_text(self.filter_edit.setPlaceholderText, 'search_placeholder')
+        self.filter_edit.setClearButtonEnabled(True)
+        self.filter_edit.setMinimumWidth(220)
+        self.filter_edit.textChanged.connect(self.filter_list)
+        title_layout.addWidget(self.filter_edit)
+
+        sort_field, self.sort_reverse = self.config.get('sort') or (None, False)
+        self.sort_field = sort_field if sort_field in SORT_FIELDS else None
+        self.sort_box = QComboBox()
+        self.sort_box.addItems([''] * len(SORT_OPTIONS))
+        self.sort_box.setCurrentIndex(SORT_OPTIONS.index(self.sort_field))
+        self.sort_box.currentIndexChanged.connect(
+            lambda index: self.change_sort(SORT_OPTIONS[index], self.sort_reverse)
+        )
+        title_layout.addWidget(self.sort_box)
+        self.sort_dir_btn = QPushButton()
+        self.sort_dir_btn.setMaximumWidth(30)
+        self.sort_dir_btn.clicked.connect(lambda: self.change_sort(self.sort_field, not self.sort_reverse))
+        title_layout.addWidget(self.sort_dir_btn)
+        self.update_sort_box()
         
         self.lang_btn = QPushButton("EN" if self.lang == 'zh' else "中文")
         self.lang_btn.setMaximumWidth(50)
@@ -189,32 +390,44 @@ class AccountSwitcher(QMainWindow):
         
         self.update_current_account_display()
 
-        self.account_list = QListWidget()
+        self.account_model = AccountListModel(self.account_row_parts, self.format_row_label, self)
+        self.account_model.stale = self.expiry.stale
+        self.expiry_timer = QTimer(self)
+        self.expiry_timer.setSingleShot(True)
+        self.expiry_timer.timeout.connect(self.check_token_expiry)
+        self.account_list = QListView()
+        self.account_list.setModel(self.account_model)
+        self.account_list.setItemDelegate(AccountItemDelegate(self.account_list))
+        self.account_list.setUniformItemSizes(True)
+        self.account_list.setSelectionMode(QAbstractItemView.SelectionMode.ExtendedSelection)
         self.account_list.setStyleSheet("""
-            QListWidget {
+            QListView {
                 border: 1px solid #ddd;
                 border-radius: 4px;
                 padding: 5px;
                 outline: none;
             }
-            QListWidget::item {
+            QListView::item {
                 padding: 8px;
                 border-bottom: 1px solid #f0f0f0;
                 outline: none;
             }
-            QListWidget::item:selected {
+            QListView::item:selected {
                 background-color: #e3f2fd;
                 color: #000;
                 outline: none;
             }
-            QListWidget::item:hover {
+            QListView::item:hover {
                 background-color: #f5f5f5;
             }
-            QListWidget::item:focus {
+            QListView::item:focus {
                 outline: none;
             }
         """)
-        self.account_list.itemDoubleClicked.connect(self.load_account)
+        self.account_list.doubleClicked.connect(lambda index: self.load_account())
+        self.age_timer = QTimer(self)
+        self.age_timer.timeout.connect(self.update_visible_rows)
+        self.age_timer.start(60000)
         self.account_list.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
         self.account_list.customContextMenuRequested.connect(self.show_context_menu)
         layout.addWidget(self.account_list)
@@ -222,55 +435,265 @@ class AccountSwitcher(QMainWindow):
         btn_layout = QHBoxLayout()
         btn_layout.setSpacing(8)
         
-        self.btn_refresh_token = QPushButton(self.tr('refresh_token'))
+        self.btn_refresh_token = QPushButton()
+        self.bind_text(self.btn_refresh_token.setText, 'refresh_token')
         self.btn_refresh_token.setMinimumHeight(36)
         self.btn_refresh_token.clicked.connect(self.refresh_token)
         btn_layout.addWidget(self.btn_refresh_token)
 
-        self.btn_save_new = QPushButton(self.tr('save_current'))
+        self.btn_save_new = QPushButton()
+        self.bind_text(self.btn_save_new.setText, 'save_current')
         self.btn_save_new.setMinimumHeight(36)
         self.btn_save_new.clicked.connect(self.save_new_account)
         btn_layout.addWidget(self.btn_save_new)
 
-        self.btn_logout = QPushButton(self.tr('logout'))
+        self.btn_logout = QPushButton()
+        self.bind_text(self.btn_logout.setText, 'logout')
         self.btn_logout.setMinimumHeight(36)
         self.btn_logout.clicked.connect(self.logout_account)
         btn_layout.addWidget(self.btn_logout)
 
         layout.addLayout(btn_layout)
 
+        self.progress = QProgressBar()
+        self.progress.setRange(0, 0)
+        self.progress.setMaximumHeight(6)
+        self.progress.setTextVisible(False)
+        self.progress.hide()
+        layout.addWidget(self.progress)
+        self.busy_shown = False
+        self.draining = False
+
         self.refresh_list()
 
-    def refresh_list(self):
-        self.account_list.clear()
-        for name, values in self.accounts.items():
-            info = self.parse_account_info(values)
-            item = QListWidgetItem()
-            
-            display_text = f"{name}"
-            if info['platform']:
-                display_text += f"  |  {info['platform']}"
-            if info['reg_nation']:
-                display_text += f"  |  {info['reg_nation']}"
-            if info['create_time']:
-                display_text += f"  |  {self.tr('registered')}: {info['create_time']}"
-            if info['token_time']:
-                display_text += f"  |  {self.tr('token')}: {info['token_time']}"
-            
-            item.setText(display_text)
-            item.setData(Qt.ItemDataRole.UserRole, name)
-            self.account_list.addItem(item)
+        self.signals = BackgroundSignals(self)
+        self.signals.registry_changed.connect(self.on_registry_changed)
+        self.signals.task_finished.connect(self.poll_tasks)
+        self.worker.notify = self.signals.task_finished.emit
+        self.watcher = RegistryWatcher(self.registry, self.signals.registry_changed.emit)
+        self.watcher.start()
+
+        self.diagnostics = None
+        QShortcut(QKeySequence("Ctrl+Shift+D"), self, self.show_diagnostics)
+
+    def show_diagnostics(self):
+        # Hidden panel (Ctrl+Shift+D) listing the hot-path timings.
+        if self.diagnostics is not None:
+            self.diagnostics.show()
+            self.diagnostics.raise_()
+            return
+        dialog = QDialog(self)
+        dialog.setWindowTitle(self.tr('diagnostics_title'))
+        dialog.resize(520, 280)
+        layout = QVBoxLayout(dialog)
+
+        table = QTableWidget(0, 5)
+        table.setHorizontalHeaderLabels([self.tr('timing_name'), self.tr('timing_count'),
+                                         'p50 (ms)', 'p95 (ms)', 'max (ms)'])
+        table.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
+        table.verticalHeader().hide()
+        table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        layout.addWidget(table)
+
+        btn_layout = QHBoxLayout()
+        reset_btn = QPushButton(self.tr('reset_timings'))
+        reset_btn.clicked.connect(timings.reset)
+        btn_layout.addWidget(reset_btn)
+        btn_layout.addStretch()
+        export_btn = QPushButton(self.tr('export_timings'))
+        export_btn.clicked.connect(self.export_timings)
+        btn_layout.addWidget(export_btn)
+        layout.addLayout(btn_layout)
+
+        def update():
+            summary = timings.summary()
+            table.setRowCount(len(summary))
+            for row, (name, stat) in enumerate(summary.items()):
+                cells = [name, str(stat['count']), f"{stat['p50_ms']:.2f}",
+                         f"{stat['p95_ms']:.2f}", f"{stat['max_ms']:.2f}"]
+                for column, text in enumerate(cells):
+                    item = QTableWidgetItem(text)
+                    if column:
+                        item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+                    table.setItem(row, column, item)
+
+        timer = QTimer(dialog)
+        timer.timeout.connect(update)
+        timer.start(1000)
+        update()
+        self.diagnostics = dialog
+        dialog.show()
+
+    def export_timings(self):
+        path, _ = QFileDialog.getSaveFileName(self.diagnostics, self.tr('export_timings'), 'bd2_timings.json',
+                                              'JSON (*.json)')
+        if path:
+            text = timings.export_text()
+            self.run_task(lambda: write_atomic(path, text),
+                          lambda result: QMessageBox.information(self, self.tr('success'),
+                                                                 self.tr('timings_exported', path)))
+
+    def on_registry_changed(self, snapshot):
+        self.update_current_account_display(snapshot or {})
+
+    def closeEvent(self, event):
+        self.worker.flush(5)
+        super().closeEvent(event)
+
+    def run_task(self, job, on_done, on_error=None, key=None):
+        self.worker.submit(job, on_done, on_error or self.show_task_error, key)
+        self.set_busy(True)
+
+    def poll_tasks(self):
+        # Callbacks may open modal dialogs, whose event loop delivers further
+        # task_finished signals; the outer drain picks those results up.
+        if self.draining:
+            return
+        self.draining = True
+        try:
+            self.worker.drain()
+        finally:
+            self.draining = False
+        self.set_busy(self.worker.busy())
+
+    def set_busy(self, busy):
+        if busy == self.busy_shown:
+            return
+        self.busy_shown = busy
+        self.progress.setVisible(busy)
+        if busy:
+            self.setCursor(Qt.CursorShape.BusyCursor)
+        else:
+            self.unsetCursor()
+
+    def show_task_error(self, error):
+        QMessageBox.critical(self, self.tr('error'), str(error))
+
+    def show_write_error(self, error):
+        QMessageBox.critical(self, self.tr('error'), self.tr('write_failed', str(error)))
+
+    def account_row_parts(self, name, values):
+        # Parsed once per account change; the label is composed from these
+        # parts, so token ages and language switches only re-run the format.
+        info = self.info_cache.get(values)
+        tags = self.store.tags.get(name)
+        return name, info, ' '.join(f"#{tag}" for tag in tags) if tags else ''
+
+    def format_row_label(self, parts, now):
+        name, info, tags = parts
+        display_text = f"{name}"
+        if info['platform']:
+            display_text += f"  |  {info['platform']}"
+        if info['reg_nation']:
+            display_text += f"  |  {info['reg_nation']}"
+        if info['create_time']:
+            display_text += f"  |  {self.tr('registered')}: {info['create_time']}"
+        if info['token_ts'] is not None:
+            badge = "⚠ " if name in self.expiry.stale else ""
+            display_text += f"  |  {badge}{self.tr('token')}: {format_token_age(info['token_ts'], self.lang, now)}"
+        if tags:
+            display_text += f"  |  {tags}"
+        return display_text
+
+    def update_visible_rows(self):
+        if not self.account_model.names:
+            return
+        viewport = self.account_list.viewport()
+        first = self.account_list.indexAt(QPoint(0, 0)).row()
+        last = self.account_list.indexAt(QPoint(0, viewport.height() - 1)).row()
+        if first < 0:
+            first = 0
+        if last < 0:
+            last = len(self.account_model.names) - 1
+        self.account_model.tick(first, last, time.time())
+
+    @timed('refresh_list')
+    def refresh_list(self, select=None):
+        self.account_model.now = time.time()
+        self.account_model.sync(self.visible_accounts())
+        self.check_token_expiry()
+        
+        if select is not None:
+            row = self.account_model.row_of(select)
+            if row >= 0:
+                self.account_list.setCurrentIndex(self.account_model.index(row))
+
+    @timed('filter_list')
+    def filter_list(self):
+        self.account_model.sync(self.visible_accounts())
+
+    def visible_accounts(self):
+        matches = self.search_index.search(self.filter_edit.text())
+        if self.sort_field is not None:
+            names = self.sort_index.names(self.sort_field, self.sort_reverse)
+        elif self.sort_reverse:
+            names = reversed(self.accounts)
+        elif matches is None:
+            return self.accounts
+        else:
+            names = self.accounts
+        return {name: self.accounts[name] for name in names if matches is None or name in matches}
+
+    def index_account(self, name, values):
+        self.token_index.add(name, values)
+        info = self.info_cache.get(values)
+        self.search_index.add(name, info)
+        self.sort_index.add(name, info)
+        self.expiry.add(name, info)
+
+    def remove_indexed(self, name):
+        self.token_index.remove(name)
+        self.search_index.remove(name)
+        self.sort_index.remove(name)
+        self.expiry.remove(name)
+
+    def rename_indexed(self, old_name, new_name):
+        self.token_index.rename(old_name, new_name)
+        self.search_index.rename(old_name, new_name)
+        self.sort_index.rename(old_name, new_name)
+        self.expiry.rename(old_name, new_name)
+
+    def check_token_expiry(self):
+        # One timer, armed for the next token to go stale; only the rows
+        # that crossed the threshold are redrawn.
+        now = time.time()
+        crossed = self.expiry.advance(now)
+        if crossed:
+            self.account_model.refresh_rows(crossed)
+        due = self.expiry.next_due()
+        if due is None:
+            self.expiry_timer.stop()
+        else:
+            self.expiry_timer.start(min(max(int((due - now) * 1000) + 1, 0), MAX_TIMER_MS))
+
+    def current_account_name(self):
+        index = self.account_list.currentIndex()
+        if not index.isValid():
+            return None
+        return index.data(Qt.ItemDataRole.UserRole)
+
+    def selected_names(self):
+        rows = sorted(index.row() for index in self.account_list.selectionModel().selectedRows())
+        return [self.account_model.names[row] for row in rows]
 
     def show_context_menu(self, position):
-        item = self.account_list.itemAt(position)
-        if not item:
+        index = self.account_list.indexAt(position)
+        if not index.isValid():
             return
+        if not self.account_list.selectionModel().isSelected(index):
+            self.account_list.setCurrentIndex(index)
 
         menu = QMenu()
         load_action = menu.addAction(self.tr('load_account'))
         overwrite_action = menu.addAction(self.tr('overwrite_account'))
+        restore_action = None
+        if hasattr(self.store, 'rollback'):
+            restore_action = menu.addAction(self.tr('restore_token'))
         menu.addSeparator()
         rename_action = menu.addAction(self.tr('rename'))
+        add_tag_action = menu.addAction(self.tr('add_tag'))
+        remove_tag_action = menu.addAction(self.tr('remove_tag'))
+        export_action = menu.addAction(self.tr('export_selected'))
         delete_action = menu.addAction(self.tr('delete'))
 
         action = menu.exec(QCursor.pos())
@@ -279,88 +702,33 @@ class AccountSwitcher(QMainWindow):
             self.load_account()
         elif action == overwrite_action:
             self.overwrite_account()
+        elif action is not None and action == restore_action:
+            self.restore_previous_token()
         elif action == rename_action:
             self.rename_account()
+        elif action == add_tag_action:
+            self.tag_accounts()
+        elif action == remove_tag_action:
+            self.tag_accounts(remove=True)
+        elif action == export_action:
+            self.export_accounts()
         elif action == delete_action:
             self.delete_account()
 
+    @timed('parse_account_info')
     def parse_account_info(self, values):
-        info = {'platform': '', 'create_time': '', 'token_time': '', 'reg_nation': ''}
-        
-        auth_member = None
-        for key, value_data in values.items():
-            if key.startswith('neon_auth_member_h'):
-                auth_member = value_data.get('data', '') if isinstance(value_data, dict) else value_data
-                break
-        
-        if auth_member:
-            try:
-                auth_member = auth_member.rstrip('\x00')
-                data = json.loads(auth_member)
-                
-                reg_path = data.get('reg_path', '')
-                if reg_path:
-                    if reg_path.startswith('FIREBASE_'):
-                        info['platform'] = reg_path.split('_', 1)[1]
-                    else:
-                        info['platform'] = reg_path
-                
-                reg_nation = data.get('reg_nation', '')
-                if reg_nation:
-                    info['reg_nation'] = reg_nation
-                
-                crt_dt = data.get('crt_dt')
-                if crt_dt:
-                    dt = datetime.fromtimestamp(crt_dt / 1000)
-                    info['create_time'] = dt.strftime('%Y-%m-%d')
-            except (json.JSONDecodeError, ValueError, KeyError):
-                pass
-        
-        access_token = None
-        for key, value_data in values.items():
-            if key.startswith('neon_access_token_h'):
-                access_token = value_data.get('data', '') if isinstance(value_data, dict) else value_data
-                break
-        
-        if access_token:
-            try:
-                access_token = access_token.rstrip('\x00')
-                parts = access_token.split('|')
-                if len(parts) >= 6:
-                    timestamp = int(parts[5])
-                    token_dt = datetime.fromtimestamp(timestamp / 1000)
-                    now = datetime.now()
-                    delta = now - token_dt
-                    
-                    total_seconds = int(delta.total_seconds())
-                    days = total_seconds // 86400
-                    hours = (total_seconds % 86400) // 3600
-                    minutes = (total_seconds % 3600) // 60
-                    
-                    if total_seconds < 3600:
-                        if self.lang == 'zh':
-                            info['token_time'] = f"{minutes}分钟前"
-                        else:
-                            info['token_time'] = f"{minutes}m ago"
-                    elif total_seconds < 86400:
-                        if self.lang == 'zh':
-                            info['token_time'] = f"{hours}小时前"
-                        else:
-                            info['token_time'] = f"{hours}h ago"
-                    else:
-                        if self.lang == 'zh':
-                            info['token_time'] = f"{days}天{hours}小时前"
-                        else:
-                            info['token_time'] = f"{days}d {hours}h ago"
-            except (ValueError, IndexError):
-                pass
-        
-        return info
+        cached = self.info_cache.get(values)
+        return {
+            'platform': cached['platform'],
+            'create_time': cached['create_time'],
+            'token_time': format_token_age(cached['token_ts'], self.lang),
+            'reg_nation': cached['reg_nation']
+        }
 
     def normalize_account_data(self, values):
         for key, value in values.items():
             if key.startswith('neon_access_token_h'):
-                token = value.rstrip('\x00')
+                token = value_text(value)
                 parts = token.split('|')
                 if len(parts) >= 1 and parts[0]:
                     token_id = parts[0]
@@ -369,18 +737,16 @@ class AccountSwitcher(QMainWindow):
                     return token_id
         return ""
 
-    def update_current_account_display(self):
-        current_values = self.read_registry_values()
+    def update_current_account_display(self, current_values=None):
+        if current_values is None:
+            current_values = self.read_registry_values()
+        # Kept so a language switch can redraw the label without the registry.
+        self.current_values = current_values
         if not current_values:
             self.current_account_label.setText(f"{self.tr('current_login')}: {self.tr('not_logged_in')}")
             return
         
-        current_token = None
-        for key, value_data in current_values.items():
-            if key.startswith('neon_access_token_h'):
-                current_token = value_data.get('data', '') if isinstance(value_data, dict) else value_data
-                current_token = current_token.rstrip('\x00')
-                break
+        current_token = get_value_data(current_values, ACCESS_TOKEN_PATTERN)
         
         if not current_token:
             self.current_account_label.setText(f"{self.tr('current_login')}: {self.tr('not_logged_in')}")
@@ -393,21 +759,7 @@ class AccountSwitcher(QMainWindow):
         
         current_prefix = '|'.join(current_parts[:4])
         
-        matched_account = None
-        for name, values in self.accounts.items():
-            for key, value_data in values.items():
-                if key.startswith('neon_access_token_h'):
-                    saved_token = value_data.get('data', '') if isinstance(value_data, dict) else value_data
-                    saved_token = saved_token.rstrip('\x00')
-                    if saved_token:
-                        saved_parts = saved_token.split('|')
-                        if len(saved_parts) >= 4:
-                            saved_prefix = '|'.join(saved_parts[:4])
-                            if saved_prefix == current_prefix:
-                                matched_account = name
-                                break
-            if matched_account:
-                break
+        matched_account = self.token_index.lookup(current_prefix)
         
         info = self.parse_account_info(current_values)
         
@@ -431,7 +783,10 @@ class AccountSwitcher(QMainWindow):
         self.current_account_label.setText(display_text)
 
     def refresh_current_account(self):
-        self.update_current_account_display()
+        self.run_task(self.snapshot_registry, self.complete_refresh_current, key='refresh_current')
+
+    def complete_refresh_current(self, values):
+        self.update_current_account_display(self.checked_registry_values(values) or {})
 
     def normalize_account_data(self, values):
         normalized = {}
@@ -445,8 +800,7 @@ class AccountSwitcher(QMainWindow):
     def get_masked_token_id(self, values):
         for key, value_data in values.items():
             if key.startswith('neon_access_token_h'):
-                token = value_data.get('data', '') if isinstance(value_data, dict) else value_data
-                token = token.rstrip('\x00')
+                token = value_text(value_data)
                 parts = token.split('|')
                 if len(parts) >= 1 and parts[0]:
                     token_id = parts[0]
@@ -455,66 +809,34 @@ class AccountSwitcher(QMainWindow):
                     return token_id
         return ""
 
+    @timed('read_registry_values')
+    def snapshot_registry(self):
+        return self.registry.snapshot()
+
     def read_registry_values(self):
-        try:
-            registry_keys = self.get_registry_keys()
-            if not registry_keys:
-                QMessageBox.warning(self, self.tr('error'), self.tr('registry_not_found'))
-                return None
-            
-            key = winreg.OpenKey(winreg.HKEY_CURRENT_USER, self.registry_path, 0, winreg.KEY_READ)
-            values = {}
-            for pattern, key_name in registry_keys.items():
-                try:
-                    value, value_type = winreg.QueryValueEx(key, key_name)
-                    if isinstance(value, bytes):
-                        value_str = value.decode('utf-8', errors='ignore')
-                    else:
-                        value_str = str(value) if value else ""
-                    values[key_name] = {'data': value_str, 'type': value_type}
-                except FileNotFoundError:
-                    values[key_name] = {'data': "", 'type': winreg.REG_BINARY}
-            winreg.CloseKey(key)
-            return values
-        except FileNotFoundError:
+        return self.checked_registry_values(self.snapshot_registry())
+
+    def checked_registry_values(self, values):
+        if not values:
             QMessageBox.warning(self, self.tr('error'), self.tr('registry_not_found'))
             return None
+        return values
 
+    @timed('write_registry_values')
     def write_registry_values(self, values):
-        try:
-            registry_keys = self.get_registry_keys()
-            key = winreg.OpenKey(winreg.HKEY_CURRENT_USER, self.registry_path, 0, winreg.KEY_WRITE)
-            
-            for saved_key, value_data in values.items():
-                target_key = saved_key
-                
-                if isinstance(value_data, dict):
-                    value_str = value_data.get('data', '')
-                    value_type = value_data.get('type', winreg.REG_BINARY)
-                else:
-                    value_str = value_data
-                    value_type = winreg.REG_BINARY
-                
-                for pattern in self.token_key_patterns:
-                    if saved_key.startswith(pattern):
-                        if pattern in registry_keys:
-                            target_key = registry_keys[pattern]
-                        break
-                
-                if value_type == winreg.REG_BINARY:
-                    value_bytes = value_str.encode('utf-8') if value_str else b''
-                    winreg.SetValueEx(key, target_key, 0, winreg.REG_BINARY, value_bytes)
-                else:
-                    winreg.SetValueEx(key, target_key, 0, value_type, value_str)
-            
-            winreg.CloseKey(key)
-            return True
-        except Exception as e:
-            QMessageBox.critical(self, self.tr('error'), self.tr('write_failed', str(e)))
-            return False
+        report = {}
+        snapshot = self.registry.write(values, report)
+        return snapshot, report
+
+    def switch_report_text(self, report):
+        elapsed = report['read_ms'] + report['write_ms'] + report['verify_ms']
+        return self.tr('switch_report', report['written'], report['unchanged'], f"{elapsed:.1f}")
 
     def save_new_account(self):
-        values = self.read_registry_values()
+        self.run_task(self.snapshot_registry, self.complete_save_new_account, key='save_new')
+
+    def complete_save_new_account(self, values):
+        values = self.checked_registry_values(values)
         if not values:
             return
 
@@ -528,20 +850,23 @@ class AccountSwitcher(QMainWindow):
                 if reply == QMessageBox.StandardButton.No:
                     return
 
-            self.accounts[name] = values
-            self.save_accounts()
+            self.store.put(name, values)
+            self.index_account(name, values)
             self.refresh_list()
-            self.update_current_account_display()
+            self.update_current_account_display(values)
             QMessageBox.information(self, self.tr('success'), self.tr('account_saved', name))
 
     def overwrite_account(self):
-        current_item = self.account_list.currentItem()
-        if not current_item:
+        name = self.current_account_name()
+        if name is None:
             QMessageBox.warning(self, self.tr('tip'), self.tr('select_account_first'))
             return
 
-        name = current_item.data(Qt.ItemDataRole.UserRole)
-        values = self.read_registry_values()
+        self.run_task(self.snapshot_registry,
+                      lambda values: self.complete_overwrite_account(name, values), key='overwrite')
+
+    def complete_overwrite_account(self, name, values):
+        values = self.checked_registry_values(values)
         if not values:
             return
 
@@ -550,19 +875,40 @@ class AccountSwitcher(QMainWindow):
             QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
         )
         if reply == QMessageBox.StandardButton.Yes:
-            self.accounts[name] = values
-            self.save_accounts()
+            self.store.put(name, values)
+            self.index_account(name, values)
             self.refresh_list()
-            self.update_current_account_display()
+            self.update_current_account_display(values)
             QMessageBox.information(self, self.tr('success'), self.tr('account_updated', name))
 
+    def restore_previous_token(self):
+        name = self.current_account_name()
+        if name is None:
+            QMessageBox.warning(self, self.tr('tip'), self.tr('select_account_first'))
+            return
+
+        history = self.store.history(name)
+        if not history:
+            QMessageBox.warning(self, self.tr('tip'), self.tr('no_token_history', name))
+            return
+
+        token_age = format_token_age(self.info_cache.get(history[0][1])['token_ts'], self.lang)
+        reply = QMessageBox.question(
+            self, self.tr('confirm'), self.tr('restore_token_confirm', name, token_age),
+            QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
+        )
+        if reply == QMessageBox.StandardButton.Yes:
+            values = self.store.rollback(name)
+            self.index_account(name, values)
+            self.refresh_list()
+            QMessageBox.information(self, self.tr('success'), self.tr('token_restored', name))
+
     def load_account(self):
-        current_item = self.account_list.currentItem()
-        if not current_item:
+        name = self.current_account_name()
+        if name is None:
             QMessageBox.warning(self, self.tr('tip'), self.tr('select_account_first'))
             return
 
-        name = current_item.data(Qt.ItemDataRole.UserRole)
         values = self.accounts[name]
 
         reply = QMessageBox.question(
@@ -570,17 +916,21 @@ class AccountSwitcher(QMainWindow):
             QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
         )
         if reply == QMessageBox.StandardButton.Yes:
-            if self.write_registry_values(values):
-                self.update_current_account_display()
-                QMessageBox.information(self, self.tr('success'), self.tr('account_loaded', name))
+            self.run_task(lambda: self.write_registry_values(values),
+                          lambda result: self.complete_load_account(name, *result),
+                          self.show_write_error, key='switch')
+
+    def complete_load_account(self, name, snapshot, report):
+        self.update_current_account_display(snapshot)
+        message = self.tr('account_loaded', name) + '\n' + self.switch_report_text(report)
+        QMessageBox.information(self, self.tr('success'), message)
 
     def rename_account(self):
-        current_item = self.account_list.currentItem()
-        if not current_item:
+        old_name = self.current_account_name()
+        if old_name is None:
             QMessageBox.warning(self, self.tr('tip'), self.tr('select_rename'))
             return
 
-        old_name = current_item.data(Qt.ItemDataRole.UserRole)
         new_name, ok = QInputDialog.getText(self, self.tr('rename_account_title'), self.tr('input_new_name'), text=old_name)
         
         if ok and new_name:
@@ -589,27 +939,60 @@ class AccountSwitcher(QMainWindow):
                     QMessageBox.warning(self, self.tr('error'), self.tr('name_exists', new_name))
                     return
                 
-                self.accounts[new_name] = self.accounts.pop(old_name)
-                self.save_accounts()
-                self.refresh_list()
+                self.store.rename(old_name, new_name)
+                self.rename_indexed(old_name, new_name)
+                self.refresh_list(select=new_name)
                 QMessageBox.information(self, self.tr('success'), self.tr('renamed', new_name))
 
     def delete_account(self):
-        current_item = self.account_list.currentItem()
-        if not current_item:
+        names = self.selected_names()
+        if not names:
             QMessageBox.warning(self, self.tr('tip'), self.tr('select_delete'))
             return
 
-        name = current_item.data(Qt.ItemDataRole.UserRole)
+        if len(names) == 1:
+            question = self.tr('delete_confirm', names[0])
+        else:
+            question = self.tr('delete_many_confirm', len(names))
         reply = QMessageBox.question(
-            self, self.tr('confirm'), self.tr('delete_confirm', name),
+            self, self.tr('confirm'), question,
             QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
         )
         if reply == QMessageBox.StandardButton.Yes:
-            del self.accounts[name]
-            self.save_accounts()
+            self.store.delete_many(names)
+            for name in names:
+                self.remove_indexed(name)
             self.refresh_list()
-            QMessageBox.information(self, self.tr('success'), self.tr('account_deleted', name))
+            if len(names) == 1:
+                QMessageBox.information(self, self.tr('success'), self.tr('account_deleted', names[0]))
+            else:
+                QMessageBox.information(self, self.tr('success'), self.tr('accounts_deleted', len(names)))
+
+    def tag_accounts(self, remove=False):
+        names = self.selected_names()
+        if not names:
+            QMessageBox.warning(self, self.tr('tip'), self.tr('select_accounts'))
+            return
+
+        tag, ok = QInputDialog.getText(self, self.tr('tag_title'), self.tr('input_tag'))
+        tag = tag.strip()
+        if ok and tag:
+            self.store.tag_many(names, tag, remove)
+            self.account_model.refresh_rows(names)
+            QMessageBox.information(self, self.tr('success'), self.tr('tags_updated', len(names)))
+
+    def export_accounts(self):
+        names = self.selected_names()
+        if not names:
+            QMessageBox.warning(self, self.tr('tip'), self.tr('select_accounts'))
+            return
+
+        path, _ = QFileDialog.getSaveFileName(self, self.tr('export_selected'), 'accounts_export.json', 'JSON (*.json)')
+        if path:
+            accounts = {name: self.accounts[name] for name in names}
+            self.run_task(lambda: write_atomic(path, export_text(accounts)),
+                          lambda result: QMessageBox.information(self, self.tr('success'),
+                                                                 self.tr('accounts_exported', len(names))))
 
     def logout_account(self):
         reply = QMessageBox.question(
@@ -617,23 +1000,28 @@ class AccountSwitcher(QMainWindow):
             QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
         )
         if reply == QMessageBox.StandardButton.Yes:
-            registry_keys = self.get_registry_keys()
-            empty_values = {key_name: {'data': '', 'type': winreg.REG_BINARY} for key_name in registry_keys.values()}
-            if self.write_registry_values(empty_values):
-                self.update_current_account_display()
-                QMessageBox.information(self, self.tr('success'), self.tr('logged_out'))
+            self.run_task(self.clear_registry_values, lambda result: self.complete_logout(*result),
+                          self.show_write_error, key='switch')
+
+    def clear_registry_values(self):
+        registry_keys = self.get_registry_keys()
+        empty_values = {key_name: {'data': '', 'type': REG_BINARY} for key_name in registry_keys.values()}
+        return self.write_registry_values(empty_values)
+
+    def complete_logout(self, snapshot, report):
+        self.update_current_account_display(snapshot)
+        message = self.tr('logged_out') + '\n' + self.switch_report_text(report)
+        QMessageBox.information(self, self.tr('success'), message)
 
     def refresh_token(self):
-        current_values = self.read_registry_values()
+        self.run_task(self.snapshot_registry, self.complete_refresh_token, key='refresh_token')
+
+    def complete_refresh_token(self, current_values):
+        current_values = self.checked_registry_values(current_values)
         if not current_values:
             return
         
-        current_token = None
-        for key, value_data in current_values.items():
-            if key.startswith('neon_access_token_h'):
-                current_token = value_data.get('data', '') if isinstance(value_data, dict) else value_data
-                current_token = current_token.rstrip('\x00')
-                break
+        current_token = get_value_data(current_values, ACCESS_TOKEN_PATTERN)
         
         if not current_token:
             QMessageBox.warning(self, self.tr('error'), self.tr('no_token'))
@@ -647,21 +1035,7 @@ class AccountSwitcher(QMainWindow):
             
             current_prefix = '|'.join(current_parts[:4])
             
-            matched_account = None
-            for name, values in self.accounts.items():
-                for key, value_data in values.items():
-                    if key.startswith('neon_access_token_h'):
-                        saved_token = value_data.get('data', '') if isinstance(value_data, dict) else value_data
-                        saved_token = saved_token.rstrip('\x00')
-                        if saved_token:
-                            saved_parts = saved_token.split('|')
-                            if len(saved_parts) >= 4:
-                                saved_prefix = '|'.join(saved_parts[:4])
-                                if saved_prefix == current_prefix:
-                                    matched_account = name
-                                    break
-                if matched_account:
-                    break
+            matched_account = self.token_index.lookup(current_prefix)
             
             if matched_account:
                 reply = QMessageBox.question(
@@ -670,10 +1044,10 @@ class AccountSwitcher(QMainWindow):
                     QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
                 )
                 if reply == QMessageBox.StandardButton.Yes:
-                    self.accounts[matched_account] = current_values
-                    self.save_accounts()
+                    self.store.put(matched_account, current_values)
+                    self.index_account(matched_account, current_values)
                     self.refresh_list()
-                    self.update_current_account_display()
+                    self.update_current_account_display(current_values)
                     QMessageBox.information(self, self.tr('success'), self.tr('token_updated', matched_account))
             else:
                 masked_prefix = self.mask_prefix(current_prefix)
@@ -0,0 +1,280 @@
+import os
+import sys
+import json
+import getpass
+import argparse
+import time
+from pathlib import Path
+from registry_backend import create_backend, REG_BINARY, REGISTRY_PATH, TOKEN_KEY_PATTERNS
+from account_index import TokenPrefixIndex, token_prefix
+from account_info import AccountInfoCache, format_token_age
+from account_store import create_store, PassphraseError
+from translator import Translator
+from token_expiry import ExpiryScheduler, DEFAULT_STALE_HOURS, stale_at
+
+
+def get_app_dir():
+    if getattr(sys, 'frozen', False):
+        return Path(sys.executable).parent
+    else:
+        return Path(__file__).parent
+
+
+PASSPHRASE_PROMPTS = {
+    'unlock': "Passphrase: ",
+    'retry': "Wrong passphrase, try again: ",
+    'new': "New passphrase: ",
+    'confirm': "Repeat the passphrase: ",
+    'mismatch': "The passphrases did not match. New passphrase: "
+}
+
+
+def ask_passphrase(prompt='unlock'):
+    return os.environ.get('BD2_PASSPHRASE') or getpass.getpass(PASSPHRASE_PROMPTS[prompt])
+
+
+class SwitcherError(Exception):
+    pass
+
+
+class SwitcherCLI:
+    def __init__(self, data_file=None, registry=None):
+        self.registry = registry or create_backend(REGISTRY_PATH, TOKEN_KEY_PATTERNS)
+        # Counts and timings of the last load or logout.
+        self.last_report = {}
+        self.data_file = Path(data_file) if data_file else get_app_dir() / "accounts.json"
+        self.store = create_store(self.data_file, passphrase=ask_passphrase)
+        self.config = dict(self.store.load_config())
+        self.load_translations()
+        try:
+            _, self.accounts = self.store.load()
+        except PassphraseError as e:
+            raise SwitcherError(self.tr('wrong_passphrase', str(e)))
+        except ValueError as e:
+            raise SwitcherError(self.tr('data_corrupted', str(e)))
+        self.token_index = TokenPrefixIndex(self.accounts)
+        self.info_cache = AccountInfoCache(self.accounts)
+        self.stale_after = self.config.get('stale_hours', DEFAULT_STALE_HOURS) * 3600
+
+    def load_translations(self):
+        trans_file = Path(__file__).parent / "translations.json"
+        with open(trans_file, 'r', encoding='utf-8') as f:
+            all_translations = json.load(f)
+        self.lang = self.config.get('language')
+        if self.lang not in all_translations:
+            self.lang = 'en'
+        self.tr = Translator(all_translations, self.lang)
+
+    def account_info(self, name, values):
+        info = self.info_cache.get(values)
+        due = stale_at(info['token_ts'], self.stale_after)
+        return {
+            'name': name,
+            'platform': info['platform'],
+            'reg_nation': info['reg_nation'],
+            'create_time': info['create_time'],
+            'token_time': format_token_age(info['token_ts'], self.lang),
+            'token_ts': info['token_ts'],
+            'stale': due is not None and due <= time.time()
+        }
+
+    def read_registry_values(self):
+        values = self.registry.snapshot()
+        if not values:
+            raise SwitcherError(self.tr('registry_not_found'))
+        return values
+
+    def list_accounts(self, stale=False):
+        if not stale:
+            return [self.account_info(name, values) for name, values in self.accounts.items()]
+        # Oldest tokens first, in the order they went stale.
+        expiry = ExpiryScheduler({name: self.info_cache.get(values) for name, values in self.accounts.items()},
+                                 self.stale_after)
+        return [self.account_info(name, self.accounts[name]) for name in expiry.advance(time.time())]
+
+    def current_account(self, values=None):
+        if values is None:
+            values = self.registry.snapshot()
+        prefix = token_prefix(values) if values else None
+        if prefix is None:
+            return None
+        info = self.account_info(self.token_index.lookup(prefix), values)
+        info['prefix'] = prefix
+        return info
+
+    def load_account(self, name):
+        if name not in self.accounts:
+            raise SwitcherError(self.tr('account_not_found', name))
+        try:
+            snapshot = self.registry.write(self.accounts[name], self.last_report)
+        except Exception as e:
+            raise SwitcherError(self.tr('write_failed', str(e)))
+        return self.current_account(snapshot)
+
+    def save_account(self, name, force=False):
+        if name in self.accounts and not force:
+            raise SwitcherError(self.tr('name_exists', name))
+        values = self.read_registry_values()
+        self.store.put(name, values)
+        self.token_index.add(name, values)
+        return self.account_info(name, values)
+
+    def refresh_token(self):
+        values = self.read_registry_values()
+        prefix = token_prefix(values)
+        if prefix is None:
+            raise SwitcherError(self.tr('no_token'))
+        name = self.token_index.lookup(prefix)
+        if name is None:
+            raise SwitcherError(self.tr('no_match', mask_prefix(prefix)))
+        self.store.put(name, values)
+        self.token_index.add(name, values)
+        return self.account_info(name, values)
+
+    def token_history(self, name):
+        if name not in self.accounts:
+            raise SwitcherError(self.tr('account_not_found', name))
+        if not hasattr(self.store, 'history'):
+            raise SwitcherError(self.tr('history_unavailable'))
+        history = []
+        for index, (saved, values) in enumerate(self.store.history(name)):
+            info = self.account_info(f"{name} #{index}", values)
+            info['saved'] = saved
+            history.append(info)
+        return history
+
+    def rollback(self, name, index=0):
+        if name not in self.accounts:
+            raise SwitcherError(self.tr('account_not_found', name))
+        if not hasattr(self.store, 'rollback'):
+            raise SwitcherError(self.tr('history_unavailable'))
+        if not 0 <= index < len(self.store.history(name)):
+            raise SwitcherError(self.tr('no_token_history', name))
+        values = self.store.rollback(name, index)
+        self.token_index.add(name, values)
+        return self.account_info(name, values)
+
+    def logout(self):
+        registry_keys = self.registry.registry_keys(self.registry.snapshot())
+        empty_values = {key_name: {'data': '', 'type': REG_BINARY} for key_name in registry_keys.values()}
+        try:
+            self.registry.write(empty_values, self.last_report)
+        except Exception as e:
+            raise SwitcherError(self.tr('write_failed', str(e)))
+
+    def switch_report_text(self):
+        report = self.last_report
+        elapsed = report['read_ms'] + report['write_ms'] + report['verify_ms']
+        return self.tr('switch_report', report['written'], report['unchanged'], f"{elapsed:.1f}")
+
+    def close(self):
+        self.store.close()
+
+
+def mask_prefix(prefix):
+    parts = prefix.split('|')
+    if len(parts) >= 1 and parts[0]:
+        token_id = parts[0]
+        if len(token_id) > 6:
+            parts[0] = f"{token_id[:4]}***{token_id[-2:]}"
+        return '|'.join(parts)
+    return prefix
+
+
+def format_info(cli, info):
+    parts = [info['name'] or mask_prefix(info.get('prefix', '')).split('|')[0]]
+    if info['platform']:
+        parts.append(info['platform'])
+    if info['reg_nation']:
+        parts.append(info['reg_nation'])
+    if info['create_time']:
+        parts.append(f"{cli.tr('registered')}: {info['create_time']}")
+    if info['token_time']:
+        badge = "⚠ " if info.get('stale') else ""
+        parts.append(f"{badge}{cli.tr('token')}: {info['token_time']}")
+    return " | ".join(parts)
+
+
+def emit(cli, args, result):
+    if args.json:
+        print(json.dumps(result, ensure_ascii=False))
+    elif isinstance(result, list):
+        for info in result:
+            print(format_info(cli, info))
+    elif isinstance(result, dict):
+        print(format_info(cli, result))
+    elif result:
+        print(result)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Browndust2 Account Switcher (command line)")
+    parser.add_argument('--data', help="path to accounts.json (default: next to the program)")
+    parser.add_argument('--json', action='store_true', help="print machine-readable JSON")
+    commands = parser.add_subparsers(dest='command', required=True)
+    list_cmd = commands.add_parser('list', help="list saved accounts")
+    list_cmd.add_argument('--stale', action='store_true',
+                          help="only accounts whose token is older than stale_hours, oldest first")
+    commands.add_parser('current', help="show the account currently logged in")
+    load = commands.add_parser('load', help="write a saved account into the registry")
+    load.add_argument('name')
+    save = commands.add_parser('save', help="save the current login under a name")
+    save.add_argument('name')
+    save.add_argument('--force', action='store_true', help="overwrite an existing account")
+    commands.add_parser('refresh-token', help="update the saved account matching the current login")
+    history = commands.add_parser('history', help="list the earlier tokens kept for an account, newest first")
+    history.add_argument('name')
+    rollback = commands.add_parser('rollback', help="make an earlier token of an account current again")
+    rollback.add_argument('name')
+    rollback.add_argument('--index', type=int, default=0, help="entry number from 'history' (default: 0, the newest)")
+    commands.add_parser('logout', help="clear the current login from the registry")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        cli = SwitcherCLI(args.data)
+    except SwitcherError as e:
+        print(e, file=sys.stderr)
+        return 1
+
+    try:
+        if args.command == 'list':
+            result = cli.list_accounts(args.stale)
+        elif args.command == 'current':
+            result = cli.current_account()
+            if result is None:
+                result = cli.tr('not_logged_in') if not args.json else None
+        elif args.command == 'load':
+            cli.load_account(args.name)
+            result = cli.tr('account_loaded', args.name)
+            if not args.json:
+                result += '\n' + cli.switch_report_text()
+        elif args.command == 'save':
+            cli.save_account(args.name, args.force)
+            result = cli.tr('account_saved', args.name)
+        elif args.command == 'refresh-token':
+            name = cli.refresh_token()['name']
+            result = cli.tr('token_updated', name)
+        elif args.command == 'history':
+            result = cli.token_history(args.name)
+        elif args.command == 'rollback':
+            cli.rollback(args.name, args.index)
+            result = cli.tr('token_restored', args.name)
+        else:
+            cli.logout()
+            result = cli.tr('logged_out')
+            if not args.json:
+                result += '\n' + cli.switch_report_text()
+        emit(cli, args, result)
+        return 0
+    except SwitcherError as e:
+        print(e, file=sys.stderr)
+        return 1
+    finally:
+        cli.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
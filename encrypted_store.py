@@ -0,0 +1,252 @@
+import os
+import json
+import base64
+import hashlib
+import functools
+from collections.abc import Mapping
+from pathlib import Path
+
+try:
+    from cryptography.exceptions import InvalidTag
+    from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+except ImportError:
+    AESGCM = None
+
+from account_store import JournaledAccountStore, PassphraseError, write_atomic
+from registry_value import value_hook
+
+
+KDF_PARAMS = {'n': 2 ** 15, 'r': 8, 'p': 1}
+KDF_MAXMEM = 64 * 1024 * 1024
+NONCE_SIZE = 12
+CHECK_TEXT = b'bd2-account-switcher'
+# Times a callable passphrase is asked before the store gives up.
+PASSPHRASE_ATTEMPTS = 3
+
+
+@functools.lru_cache(maxsize=4)
+def derive_key(passphrase, salt, n, r, p):
+    # scrypt is deliberately slow and memory-hard; every store opened with the
+    # same passphrase and salt in this process reuses the derived key.
+    return hashlib.scrypt(passphrase.encode('utf-8'), salt=salt, n=n, r=r, p=p, maxmem=KDF_MAXMEM, dklen=32)
+
+
+class SealedValues(Mapping):
+    """Registry values of one account, decrypted on first use."""
+
+    def __init__(self, store, name, token, values=None):
+        self.store = store
+        self.name = name
+        self.token = token
+        self.values = values
+
+    def fetch(self):
+        if self.values is None:
+            self.values = self.store.open(self.token, self.name)
+        return self.values
+
+    def __getitem__(self, key):
+        return self.fetch()[key]
+
+    def __iter__(self):
+        return iter(self.fetch())
+
+    def __len__(self):
+        return len(self.fetch())
+
+    def __eq__(self, other):
+        # Compared by identity, like sqlite_store.StoredValues.
+        return other is self
+
+    __hash__ = None
+
+
+class EncryptedAccountStore(JournaledAccountStore):
+    """JournaledAccountStore whose accounts are sealed with AES-GCM (accounts.enc).
+
+    Every account is its own record: the snapshot keeps the accounts.json
+    layout with one base64 nonce+ciphertext string per account, and a put
+    journals only that account's ciphertext. The account name is bound to
+    its ciphertext as associated data, so records cannot be swapped between
+    accounts; a rename re-seals the account under its new name. Compaction
+    writes the stored ciphertexts back unchanged, so nothing is re-encrypted
+    that did not change. The key comes from `passphrase` through scrypt; the
+    salt, cost parameters and a check value live in _config['_kdf'].
+
+    `passphrase` is a string or a callable taking what is asked for:
+    'unlock', 'retry' after a wrong passphrase, 'new' and 'confirm' when the
+    store is created, and 'mismatch' when the confirmation differed. A
+    callable gets PASSPHRASE_ATTEMPTS tries; after that, or when it returns
+    nothing, loading fails with PassphraseError and the store stays locked:
+    it loads no accounts and refuses to write.
+
+    A missing snapshot is created, seeded from `import_file` (accounts.json
+    and its journal); the plaintext file is left for the user to remove.
+    """
+
+    def __init__(self, data_file, passphrase, import_file=None, writer=None, compact_threshold=200):
+        data_file = Path(data_file)
+        super().__init__(data_file, journal_file=data_file.with_suffix('.enc.journal'),
+                         compact_threshold=compact_threshold, writer=writer)
+        self.passphrase = passphrase
+        self.import_file = Path(import_file) if import_file else None
+        self.kdf = None
+        self.cipher = None
+        self.sealed = {}
+
+    def ask(self, prompt):
+        passphrase = self.passphrase(prompt) if callable(self.passphrase) else self.passphrase
+        if not passphrase:
+            raise PassphraseError("No passphrase given")
+        return passphrase
+
+    def attempts(self):
+        return PASSPHRASE_ATTEMPTS if callable(self.passphrase) else 1
+
+    def unlock(self, kdf):
+        if AESGCM is None:
+            raise ValueError("Encrypted storage needs the 'cryptography' package")
+        salt = base64.b64decode(kdf['salt'])
+        prompt = 'unlock'
+        for _ in range(self.attempts()):
+            cipher = AESGCM(derive_key(self.ask(prompt), salt, kdf['n'], kdf['r'], kdf['p']))
+            if 'check' not in kdf:
+                break
+            raw = base64.b64decode(kdf['check'])
+            try:
+                cipher.decrypt(raw[:NONCE_SIZE], raw[NONCE_SIZE:], None)
+                break
+            except InvalidTag:
+                prompt = 'retry'
+        else:
+            raise PassphraseError("Wrong passphrase")
+        self.kdf = kdf
+        self.cipher = cipher
+
+    def ask_new(self):
+        prompt = 'new'
+        for _ in range(self.attempts()):
+            passphrase = self.ask(prompt)
+            if not callable(self.passphrase) or self.ask('confirm') == passphrase:
+                return passphrase
+            prompt = 'mismatch'
+        raise PassphraseError("Passphrases do not match")
+
+    def seal_bytes(self, data, name=None):
+        if self.cipher is None:
+            raise ValueError("Account store is locked")
+        nonce = os.urandom(NONCE_SIZE)
+        aad = None if name is None else name.encode('utf-8')
+        return base64.b64encode(nonce + self.cipher.encrypt(nonce, data, aad)).decode('ascii')
+
+    def seal(self, values, name):
+        return self.seal_bytes(json.dumps(dict(values), ensure_ascii=False).encode('utf-8'), name)
+
+    def open(self, token, name):
+        if self.cipher is None:
+            raise ValueError("Account store is locked")
+        raw = base64.b64decode(token)
+        nonce, ciphertext = raw[:NONCE_SIZE], raw[NONCE_SIZE:]
+        try:
+            data = self.cipher.decrypt(nonce, ciphertext, name.encode('utf-8'))
+        except InvalidTag:
+            # Accounts sealed before names were bound carry no associated data.
+            try:
+                data = self.cipher.decrypt(nonce, ciphertext, None)
+            except InvalidTag:
+                raise ValueError("Account data failed authentication")
+        return json.loads(data, object_hook=value_hook)
+
+    def _load_snapshot(self):
+        self.sealed = {}
+        if not self.data_file.exists():
+            if self.journal_file.exists():
+                raise ValueError(f"{self.data_file.name} is missing")
+            self._create()
+            return
+        super()._load_snapshot()
+        # Nothing is published until the key checks out, so a failed unlock
+        # leaves no ciphertext strings behind posing as accounts.
+        sealed, self.accounts = self.accounts, {}
+        tags, self.tags = self.tags, {}
+        kdf = self.config.pop('_kdf', None)
+        if kdf is None:
+            raise ValueError(f"{self.data_file.name} has no key derivation header")
+        self.unlock(kdf)
+        self.sealed = sealed
+        self.tags = tags
+        self.accounts = {name: SealedValues(self, name, token) for name, token in sealed.items()}
+
+    def _create(self):
+        if AESGCM is None:
+            raise ValueError("Encrypted storage needs the 'cryptography' package")
+        kdf = dict(KDF_PARAMS, salt=base64.b64encode(os.urandom(16)).decode('ascii'))
+        salt = base64.b64decode(kdf['salt'])
+        self.cipher = AESGCM(derive_key(self.ask_new(), salt, kdf['n'], kdf['r'], kdf['p']))
+        self.kdf = kdf
+        kdf['check'] = self.seal_bytes(CHECK_TEXT)
+        if self.import_file is not None:
+            source = JournaledAccountStore(self.import_file)
+            config, accounts = source.load()
+            self.config = dict(config)
+            self.tags = dict(source.tags)
+            for name, values in accounts.items():
+                self.sealed[name] = self.seal(values, name)
+                self.accounts[name] = SealedValues(self, name, self.sealed[name], values)
+        write_atomic(self.data_file, self.encode_snapshot(self.config, dict(self.sealed), self.tags, 0))
+        if not self.config_file.exists():
+            write_atomic(self.config_file, json.dumps(self.config, ensure_ascii=False, indent=2))
+
+    def _replay_journal(self):
+        # Without a key the journal cannot be read back meaningfully.
+        if self.cipher is not None:
+            super()._replay_journal()
+
+    def _apply(self, record):
+        op = record.get('op')
+        if op == 'put':
+            self.sealed[record['name']] = record['sealed']
+            self.accounts[record['name']] = SealedValues(self, record['name'], record['sealed'])
+            return
+        values = self.accounts.get(record['old']) if op == 'rename' else None
+        super()._apply(record)
+        if op == 'delete':
+            self.sealed.pop(record['name'], None)
+        elif op == 'rename' and record['old'] in self.sealed:
+            del self.sealed[record['old']]
+            # Renames inside a batch, or journaled before names were bound,
+            # carry no ciphertext for the new name, so it is sealed here.
+            token = record.get('sealed') or self.seal(values.fetch(), record['new'])
+            self.sealed[record['new']] = token
+            self.accounts[record['new']] = SealedValues(self, record['new'], token, values.values)
+
+    def commit(self, record):
+        # A store that failed to unlock must not journal or compact over the
+        # accounts it could not read.
+        if self.cipher is None:
+            raise ValueError("Account store is locked")
+        super().commit(record)
+
+    def put(self, name, values):
+        with self.lock:
+            self.commit({'op': 'put', 'name': name, 'sealed': self.seal(values, name)})
+            self.accounts[name].values = values
+
+    def rename(self, old_name, new_name):
+        with self.lock:
+            values = self.accounts.get(old_name)
+            if values is None:
+                return
+            self.commit({'op': 'rename', 'old': old_name, 'new': new_name,
+                         'sealed': self.seal(values.fetch(), new_name)})
+
+    def snapshot_accounts(self):
+        return dict(self.sealed)
+
+    def compact(self):
+        if self.cipher is None:
+            return
+        super().compact()
+
+    def encode_snapshot(self, config, accounts, tags, seq):
+        return super().encode_snapshot({**config, '_kdf': self.kdf}, accounts, tags, seq)
@@ -0,0 +1,34 @@
+def diff_rows(current_names, current_labels, rows):
+    """Plans the widget edits that turn the displayed rows into `rows`.
+
+    `rows` is an ordered list of (name, label). Operations are returned in the
+    order they must be applied, with row indices valid at that point:
+    ('remove', index, name), ('order', names), ('insert', index, name, label)
+    and ('update', index, name, label). ('order', names) rearranges the rows
+    left after the removals into `names`, and comes at most once.
+    """
+    wanted = {name for name, _ in rows}
+    ops = []
+
+    for index in range(len(current_names) - 1, -1, -1):
+        name = current_names[index]
+        if name not in wanted:
+            ops.append(('remove', index, name))
+    cur = [name for name in current_names if name in wanted]
+
+    # Any change of order is one rearrangement rather than a move per row, so
+    # planning stays linear however far the rows travel.
+    existing = set(cur)
+    kept = [name for name, _ in rows if name in existing]
+    if kept != cur:
+        ops.append(('order', kept))
+
+    # The displayed rows are now rows[:index] followed by the rest of `kept`,
+    # so every existing row is already where it belongs.
+    for index, (name, label) in enumerate(rows):
+        if name not in existing:
+            ops.append(('insert', index, name, label))
+        elif current_labels.get(name) != label:
+            ops.append(('update', index, name, label))
+
+    return ops
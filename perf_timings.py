@@ -0,0 +1,113 @@
+import os
+import json
+import math
+import time
+import atexit
+import threading
+import functools
+from collections import deque
+from contextlib import contextmanager
+
+
+TRACE_ENV = 'BD2_PERF_TRACE'
+
+
+def percentile(sorted_samples, fraction):
+    # Nearest-rank percentile of an already sorted, non-empty list.
+    index = max(0, math.ceil(fraction * len(sorted_samples)) - 1)
+    return sorted_samples[index]
+
+
+class Timings:
+    """Named wall-clock spans aggregated into count, p50, p95 and max.
+
+    Every name keeps its total count, total time and maximum plus the last
+    `window` durations, which the percentiles are taken from, so memory stays
+    bounded however long the app runs. With `trace` set each span is also
+    kept as a Chrome trace event (at most `max_events`), for chrome://tracing
+    or Perfetto. Spans may be recorded from any thread.
+    """
+
+    def __init__(self, window=512, trace=False, max_events=100000):
+        self.window = window
+        self.trace = trace
+        self.lock = threading.Lock()
+        self.stats = {}
+        self.events = deque(maxlen=max_events)
+        self.origin = time.perf_counter()
+
+    def record(self, name, start, duration):
+        with self.lock:
+            stat = self.stats.get(name)
+            if stat is None:
+                stat = self.stats[name] = {'count': 0, 'total': 0.0, 'max': 0.0,
+                                           'recent': deque(maxlen=self.window)}
+            stat['count'] += 1
+            stat['total'] += duration
+            if duration > stat['max']:
+                stat['max'] = duration
+            stat['recent'].append(duration)
+            if self.trace:
+                self.events.append({
+                    'name': name, 'ph': 'X', 'pid': os.getpid(), 'tid': threading.get_ident(),
+                    'ts': round((start - self.origin) * 1e6, 1), 'dur': round(duration * 1e6, 1)
+                })
+
+    @contextmanager
+    def span(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, start, time.perf_counter() - start)
+
+    def timed(self, name):
+        def decorate(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    self.record(name, start, time.perf_counter() - start)
+            return wrapper
+        return decorate
+
+    def summary(self):
+        # Durations in milliseconds, slowest p95 first.
+        with self.lock:
+            stats = [(name, stat['count'], stat['total'], stat['max'], sorted(stat['recent']))
+                     for name, stat in self.stats.items()]
+        rows = {}
+        for name, count, total, longest, recent in stats:
+            rows[name] = {
+                'count': count,
+                'p50_ms': percentile(recent, 0.50) * 1000,
+                'p95_ms': percentile(recent, 0.95) * 1000,
+                'max_ms': longest * 1000,
+                'total_ms': total * 1000
+            }
+        return dict(sorted(rows.items(), key=lambda item: -item[1]['p95_ms']))
+
+    def reset(self):
+        with self.lock:
+            self.stats.clear()
+            self.events.clear()
+
+    def export_text(self):
+        # The trace-event object format; viewers ignore the extra keys.
+        with self.lock:
+            events = list(self.events)
+        return json.dumps({'traceEvents': events, 'displayTimeUnit': 'ms', 'summary': self.summary()}, indent=2)
+
+    def export(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(self.export_text())
+
+
+# BD2_PERF_TRACE=<file> records every span and writes them there on exit.
+timings = Timings(trace=bool(os.environ.get(TRACE_ENV)))
+timed = timings.timed
+
+if timings.trace:
+    atexit.register(lambda: timings.export(os.environ[TRACE_ENV]))
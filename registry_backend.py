@@ -0,0 +1,380 @@
+import os
+import json
+import time
+import base64
+import hashlib
+import threading
+from pathlib import Path
+from contextlib import contextmanager
+
+from perf_timings import timings
+from registry_value import RegistryValue, REG_BINARY, decode_raw, value_raw, value_type
+
+try:
+    import winreg
+except ImportError:
+    winreg = None
+
+
+REG_NOTIFY_CHANGE_NAME = 0x1
+REG_NOTIFY_CHANGE_LAST_SET = 0x4
+WAIT_OBJECT_0 = 0
+
+REGISTRY_PATH = r"SOFTWARE\Gamfs\BrownDust II"
+TOKEN_KEY_PATTERNS = [
+    "neon_access_token_h",
+    "neon_auth_member_h"
+]
+
+
+def match_pattern(name, patterns):
+    for pattern in patterns:
+        if name.startswith(pattern):
+            return pattern
+    return None
+
+
+def snapshot_hash(snapshot):
+    if snapshot is None:
+        return None
+    h = hashlib.blake2b(digest_size=16)
+    for name in sorted(snapshot):
+        value_data = snapshot[name]
+        raw = value_raw(value_data)
+        h.update(name.encode('utf-8'))
+        h.update(str(value_type(value_data)).encode('ascii'))
+        h.update(raw if isinstance(raw, bytes) else str(raw).encode('utf-8'))
+        h.update(b'\x00')
+    return h.digest()
+
+
+def same_value(entry, value_type, raw):
+    # winreg hands back an empty REG_BINARY as None and other types as
+    # str or int, so anything but two byte strings is compared decoded.
+    if entry is None or entry[1] != value_type:
+        return False
+    if isinstance(entry[0], bytes) and isinstance(raw, bytes):
+        return entry[0] == raw
+    return decode_raw(entry[0]) == decode_raw(raw)
+
+
+class RegistryWriteError(OSError):
+    """Raised when written values did not read back; the previous ones were restored."""
+
+
+class RegistryBackend:
+    """Reads and writes the game's login values under one registry key.
+
+    snapshot() enumerates the key once and returns {value_name: RegistryValue}
+    for every value matching one of the token patterns, or None when the key
+    does not exist; the values keep the bytes as read, undecoded. write() resolves
+    saved names against the live names and returns the resulting snapshot,
+    so callers never need a second enumeration after a switch.
+
+    A write is a small transaction: it reads the key, writes only the values
+    that differ, reads them back, and on a mismatch or a failed write puts
+    back every value it touched before raising. Subclasses provide
+    open_for_write() and the read_entries/set_entries/delete_entries
+    primitives on the key it yields; entries are {name: (raw, type)}.
+    """
+
+    def __init__(self, path=REGISTRY_PATH, patterns=TOKEN_KEY_PATTERNS):
+        self.path = path
+        self.patterns = list(patterns)
+
+    def snapshot(self):
+        raise NotImplementedError
+
+    def open_for_write(self):
+        raise NotImplementedError
+
+    def read_entries(self, key):
+        raise NotImplementedError
+
+    def set_entries(self, key, writes):
+        raise NotImplementedError
+
+    def delete_entries(self, key, names):
+        raise NotImplementedError
+
+    def write(self, values, report=None):
+        # `report`, when given, is filled with the counts and timings.
+        start = time.perf_counter()
+        with self.open_for_write() as key:
+            before = self.read_entries(key)
+            read_done = time.perf_counter()
+            planned = self.plan_writes(values, before)
+            writes = [write for write in planned if not same_value(before.get(write[0]), write[1], write[2])]
+            try:
+                self.set_entries(key, writes)
+            except OSError:
+                self.restore(key, before, writes)
+                raise
+            write_done = time.perf_counter()
+            after = self.read_entries(key) if writes else before
+            failed = [name for name, value_type, raw in writes if not same_value(after.get(name), value_type, raw)]
+            if failed:
+                self.restore(key, before, writes)
+            verify_done = time.perf_counter()
+
+        timings.record('switch_read', start, read_done - start)
+        timings.record('switch_write', read_done, write_done - read_done)
+        timings.record('switch_verify', write_done, verify_done - write_done)
+        if report is not None:
+            report.update({
+                'written': len(writes),
+                'unchanged': len(planned) - len(writes),
+                'rolled_back': bool(failed),
+                'read_ms': (read_done - start) * 1000,
+                'write_ms': (write_done - read_done) * 1000,
+                'verify_ms': (verify_done - write_done) * 1000
+            })
+        if failed:
+            raise RegistryWriteError(f"Read-back mismatch for {', '.join(failed)}; previous values restored")
+        return self.collect((name, data, value_type) for name, (data, value_type) in after.items())
+
+    def restore(self, key, before, writes):
+        names = [name for name, _, _ in writes]
+        self.set_entries(key, [(name, before[name][1], before[name][0]) for name in names if name in before])
+        self.delete_entries(key, [name for name in names if name not in before])
+
+    def wait_for_change(self, timeout):
+        # True when a change was signalled, False on timeout, None when this
+        # backend cannot deliver notifications and callers must poll.
+        return None
+
+    def registry_keys(self, snapshot):
+        keys = {}
+        for name in snapshot or {}:
+            pattern = match_pattern(name, self.patterns)
+            if pattern:
+                keys[pattern] = name
+        return keys
+
+    def collect(self, entries):
+        found = {}
+        for name, data, value_type in entries:
+            pattern = match_pattern(name, self.patterns)
+            if pattern:
+                found[pattern] = (name, data, value_type)
+        return {name: RegistryValue.from_raw(data, value_type) for name, data, value_type in found.values()}
+
+    def plan_writes(self, values, live_names):
+        registry_keys = {}
+        for name in live_names:
+            pattern = match_pattern(name, self.patterns)
+            if pattern:
+                registry_keys[pattern] = name
+
+        writes = []
+        for saved_key, value_data in values.items():
+            target_key = saved_key
+            pattern = match_pattern(saved_key, self.patterns)
+            if pattern and pattern in registry_keys:
+                target_key = registry_keys[pattern]
+
+            writes.append((target_key, value_type(value_data), value_raw(value_data)))
+        return writes
+
+
+class WinregBackend(RegistryBackend):
+    def _enum_values(self, key):
+        i = 0
+        while True:
+            try:
+                yield winreg.EnumValue(key, i)
+            except OSError:
+                return
+            i += 1
+
+    def snapshot(self):
+        try:
+            key = winreg.OpenKey(winreg.HKEY_CURRENT_USER, self.path, 0, winreg.KEY_READ)
+        except FileNotFoundError:
+            return None
+        try:
+            return self.collect(self._enum_values(key))
+        finally:
+            winreg.CloseKey(key)
+
+    @contextmanager
+    def open_for_write(self):
+        key = winreg.OpenKey(winreg.HKEY_CURRENT_USER, self.path, 0,
+                             winreg.KEY_READ | winreg.KEY_WRITE)
+        try:
+            yield key
+        finally:
+            winreg.CloseKey(key)
+
+    def read_entries(self, key):
+        return {name: (data, value_type) for name, data, value_type in self._enum_values(key)}
+
+    def set_entries(self, key, writes):
+        for target_key, value_type, raw in writes:
+            winreg.SetValueEx(key, target_key, 0, value_type, raw)
+
+    def delete_entries(self, key, names):
+        for name in names:
+            try:
+                winreg.DeleteValue(key, name)
+            except FileNotFoundError:
+                pass
+
+    def wait_for_change(self, timeout):
+        try:
+            import ctypes
+            from ctypes import wintypes
+            advapi32 = ctypes.windll.advapi32
+            kernel32 = ctypes.windll.kernel32
+        except (ImportError, AttributeError):
+            return None
+        advapi32.RegNotifyChangeKeyValue.argtypes = [
+            wintypes.HKEY, wintypes.BOOL, wintypes.DWORD, wintypes.HANDLE, wintypes.BOOL
+        ]
+        advapi32.RegNotifyChangeKeyValue.restype = wintypes.LONG
+        kernel32.CreateEventW.restype = wintypes.HANDLE
+        kernel32.WaitForSingleObject.argtypes = [wintypes.HANDLE, wintypes.DWORD]
+        kernel32.CloseHandle.argtypes = [wintypes.HANDLE]
+
+        try:
+            key = winreg.OpenKey(winreg.HKEY_CURRENT_USER, self.path, 0, winreg.KEY_NOTIFY)
+        except FileNotFoundError:
+            return None
+        event = kernel32.CreateEventW(None, True, False, None)
+        try:
+            result = advapi32.RegNotifyChangeKeyValue(
+                key.handle, False, REG_NOTIFY_CHANGE_NAME | REG_NOTIFY_CHANGE_LAST_SET, event, True
+            )
+            if result != 0:
+                return None
+            return kernel32.WaitForSingleObject(event, int(timeout * 1000)) == WAIT_OBJECT_0
+        finally:
+            kernel32.CloseHandle(event)
+            winreg.CloseKey(key)
+
+
+class MemoryBackend(RegistryBackend):
+    """In-process stand-in for the registry key, holding raw winreg-style data."""
+
+    def __init__(self, path=REGISTRY_PATH, patterns=TOKEN_KEY_PATTERNS, entries=None, exists=True):
+        super().__init__(path, patterns)
+        self.entries = dict(entries or {})
+        self.exists = exists
+        self.lock = threading.RLock()
+        self.changed = threading.Event()
+
+    def notify_change(self):
+        # Also used by tests and benchmarks to fire a synthetic change event.
+        self.changed.set()
+
+    def wait_for_change(self, timeout):
+        fired = self.changed.wait(timeout)
+        self.changed.clear()
+        return fired
+
+    def set_value(self, name, data, value_type=REG_BINARY):
+        if value_type == REG_BINARY and isinstance(data, str):
+            data = data.encode('utf-8')
+        with self.lock:
+            self.entries[name] = (data, value_type)
+            self.exists = True
+        self.notify_change()
+
+    def _collect_entries(self):
+        return self.collect((name, data, value_type) for name, (data, value_type) in self.entries.items())
+
+    def snapshot(self):
+        with self.lock:
+            if not self.exists:
+                return None
+            return self._collect_entries()
+
+    @contextmanager
+    def open_for_write(self):
+        with self.lock:
+            if not self.exists:
+                raise FileNotFoundError(self.path)
+            yield self.entries
+
+    def read_entries(self, key):
+        return dict(key)
+
+    def set_entries(self, key, writes):
+        for target_key, value_type, raw in writes:
+            key[target_key] = (raw, value_type)
+        if writes:
+            self.notify_change()
+
+    def delete_entries(self, key, names):
+        for name in names:
+            key.pop(name, None)
+        if names:
+            self.notify_change()
+
+
+class FileBackend(MemoryBackend):
+    """MemoryBackend persisted to a JSON file, re-read on every snapshot."""
+
+    def __init__(self, file_path, path=REGISTRY_PATH, patterns=TOKEN_KEY_PATTERNS):
+        super().__init__(path, patterns, exists=False)
+        self.file_path = Path(file_path)
+
+    def _load(self):
+        if not self.file_path.exists():
+            self.entries = {}
+            self.exists = False
+            return
+        with open(self.file_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        entries = {}
+        for name, item in data.get('values', {}).items():
+            value_type = item.get('type', REG_BINARY)
+            if value_type == REG_BINARY:
+                entries[name] = (base64.b64decode(item.get('data', '')), value_type)
+            else:
+                entries[name] = (item.get('data'), value_type)
+        self.entries = entries
+        self.exists = True
+
+    def _save(self):
+        values = {}
+        for name, (data, value_type) in self.entries.items():
+            if value_type == REG_BINARY:
+                data = base64.b64encode(data or b'').decode('ascii')
+            values[name] = {'type': value_type, 'data': data}
+        tmp_path = self.file_path.with_name(self.file_path.name + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'path': self.path, 'values': values}, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.file_path)
+
+    def set_value(self, name, data, value_type=REG_BINARY):
+        with self.lock:
+            self._load()
+            super().set_value(name, data, value_type)
+            self._save()
+
+    def snapshot(self):
+        with self.lock:
+            self._load()
+            return super().snapshot()
+
+    @contextmanager
+    def open_for_write(self):
+        with self.lock:
+            self._load()
+            with super().open_for_write() as key:
+                yield key
+            self._save()
+
+
+def create_backend(path=REGISTRY_PATH, patterns=TOKEN_KEY_PATTERNS, spec=None):
+    # BD2_REGISTRY_BACKEND selects a stand-in: "memory" or "file:<path>".
+    if spec is None:
+        spec = os.environ.get('BD2_REGISTRY_BACKEND', '')
+    if spec == 'memory':
+        return MemoryBackend(path, patterns)
+    if spec.startswith('file:'):
+        return FileBackend(spec[5:], path, patterns)
+    if winreg is not None:
+        return WinregBackend(path, patterns)
+    return MemoryBackend(path, patterns, exists=False)
@@ -0,0 +1,105 @@
+import base64
+
+
+REG_SZ = 1
+REG_BINARY = 3
+REG_DWORD = 4
+REG_QWORD = 11
+
+
+class RegistryValue(dict):
+    """One saved registry value that keeps the exact data the registry holds.
+
+    The dict itself is the persisted form, so the stores and exports write it
+    as before: {'b64': str, 'type': REG_BINARY} for binary data read from the
+    registry, {'data': str or int, 'type': int} for other types and for values
+    saved by earlier versions as decoded text. `raw` is what gets written back
+    and `text` the UTF-8 reading with the NUL padding removed; both are worked
+    out on first use and kept. Values are never modified once built.
+    """
+
+    __slots__ = ('_raw', '_text')
+
+    @classmethod
+    def from_raw(cls, raw, value_type):
+        if value_type != REG_BINARY:
+            value = cls(data=raw, type=value_type)
+        else:
+            # winreg returns None for an empty REG_BINARY value.
+            raw = bytes(raw) if raw else b''
+            value = cls(b64=base64.b64encode(raw).decode('ascii'), type=value_type)
+        value._raw = raw
+        return value
+
+    @property
+    def type(self):
+        return self.get('type', REG_BINARY)
+
+    @property
+    def raw(self):
+        try:
+            return self._raw
+        except AttributeError:
+            pass
+        if 'b64' in self:
+            raw = base64.b64decode(self['b64'])
+        elif self.type == REG_BINARY:
+            # Earlier versions kept the decoded text and wrote back its UTF-8
+            # encoding, so that is what restoring them writes.
+            data = self.get('data')
+            raw = data.encode('utf-8', errors='surrogatepass') if data else b''
+        else:
+            raw = self.get('data')
+        self._raw = raw
+        return raw
+
+    @property
+    def text(self):
+        try:
+            return self._text
+        except AttributeError:
+            pass
+        data = self.get('data')
+        text = self._text = (data if isinstance(data, str) else decode_raw(self.raw)).rstrip('\x00')
+        return text
+
+
+def decode_raw(raw):
+    if isinstance(raw, (bytes, memoryview)):
+        return bytes(raw).decode('utf-8', errors='ignore')
+    return str(raw) if raw else ""
+
+
+def as_value(value_data):
+    # Bare strings predate typed values; they are kept as they are.
+    if isinstance(value_data, RegistryValue) or not isinstance(value_data, dict):
+        return value_data
+    return RegistryValue(value_data)
+
+
+def value_hook(obj):
+    # json object_hook for the stores: value dicts come out as RegistryValue
+    # while parsing, which costs far less than wrapping them afterwards.
+    if 'type' in obj and ('b64' in obj or 'data' in obj):
+        return RegistryValue(obj)
+    return obj
+
+
+def value_raw(value_data):
+    if type(value_data) is RegistryValue:
+        return value_data.raw
+    if isinstance(value_data, dict):
+        return as_value(value_data).raw
+    return value_data.encode('utf-8', errors='surrogatepass') if value_data else b''
+
+
+def value_text(value_data):
+    if type(value_data) is RegistryValue:
+        return value_data.text
+    if isinstance(value_data, dict):
+        return as_value(value_data).text
+    return (value_data or '').rstrip('\x00')
+
+
+def value_type(value_data):
+    return value_data.get('type', REG_BINARY) if isinstance(value_data, dict) else REG_BINARY
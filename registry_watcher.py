@@ -0,0 +1,53 @@
+import threading
+
+from registry_backend import snapshot_hash
+
+
+class RegistryWatcher:
+    """Background thread that reports registry snapshots after they change.
+
+    It blocks in backend.wait_for_change() when the backend supports change
+    notifications and falls back to polling every `poll_interval` seconds
+    otherwise. Bursts of notifications are folded into one callback by
+    waiting until `debounce` seconds pass without a further change, and the
+    callback only fires when the snapshot hash actually differs. The callback
+    runs on the watcher thread, so UIs must hand it over to their own loop.
+    """
+
+    def __init__(self, backend, callback, poll_interval=2.0, debounce=0.3):
+        self.backend = backend
+        self.callback = callback
+        self.poll_interval = poll_interval
+        self.debounce = debounce
+        self.stopped = threading.Event()
+        self.thread = None
+        self.last_hash = None
+
+    def start(self):
+        self.last_hash = snapshot_hash(self.backend.snapshot())
+        self.stopped.clear()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stopped.set()
+
+    def run(self):
+        while not self.stopped.is_set():
+            fired = self.backend.wait_for_change(self.poll_interval)
+            if fired is None:
+                if self.stopped.wait(self.poll_interval):
+                    return
+            elif fired:
+                while self.backend.wait_for_change(self.debounce) and not self.stopped.is_set():
+                    pass
+            if self.stopped.is_set():
+                return
+            self.check()
+
+    def check(self):
+        snapshot = self.backend.snapshot()
+        current_hash = snapshot_hash(snapshot)
+        if current_hash != self.last_hash:
+            self.last_hash = current_hash
+            self.callback(snapshot)
@@ -0,0 +1,357 @@
+import json
+import sqlite3
+import threading
+from collections.abc import Mapping
+from pathlib import Path
+
+from account_index import get_value_data, token_prefix, ACCESS_TOKEN_PATTERN
+from account_info import parse_raw_info, AUTH_MEMBER_PATTERN
+from perf_timings import timed
+from registry_value import RegistryValue, REG_DWORD, REG_QWORD, as_value
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS accounts (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    position INTEGER NOT NULL,
+    token_prefix TEXT,
+    token_ts INTEGER,
+    platform TEXT NOT NULL DEFAULT '',
+    reg_nation TEXT NOT NULL DEFAULT '',
+    create_time TEXT NOT NULL DEFAULT ''
+);
+-- Prefix and staleness lookups use the in-memory indexes built from the
+-- loaded rows, so these columns need no SQL index; earlier versions had one.
+DROP INDEX IF EXISTS accounts_token_prefix;
+DROP INDEX IF EXISTS accounts_token_ts;
+CREATE TABLE IF NOT EXISTS account_values (
+    account_id INTEGER NOT NULL REFERENCES accounts (id) ON DELETE CASCADE,
+    value_name TEXT NOT NULL,
+    type INTEGER,
+    data TEXT NOT NULL,
+    PRIMARY KEY (account_id, value_name)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS account_tags (
+    account_id INTEGER NOT NULL REFERENCES accounts (id) ON DELETE CASCADE,
+    tag TEXT NOT NULL,
+    PRIMARY KEY (account_id, tag)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS config (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+LIST_COLUMNS = 'id, name, token_prefix, token_ts, platform, reg_nation, create_time'
+
+
+def value_rows(account_id, values):
+    # Raw registry data goes in as a BLOB, which TEXT affinity leaves as is;
+    # values saved as text by earlier versions stay TEXT.
+    for value_name, value_data in values.items():
+        if not isinstance(value_data, dict):
+            yield account_id, value_name, None, value_data
+        elif 'b64' in value_data:
+            yield account_id, value_name, value_data.get('type'), as_value(value_data).raw
+        else:
+            yield account_id, value_name, value_data.get('type'), value_data.get('data', '')
+
+
+def row_value(value_type, data):
+    if value_type is None:
+        return data
+    if isinstance(data, bytes):
+        return RegistryValue.from_raw(data, value_type)
+    if value_type in (REG_DWORD, REG_QWORD) and isinstance(data, str):
+        # The TEXT column turns integers into their decimal text.
+        data = int(data)
+    return RegistryValue({'data': data, 'type': value_type})
+
+
+def summary_row(values):
+    info = parse_raw_info(get_value_data(values, AUTH_MEMBER_PATTERN),
+                          get_value_data(values, ACCESS_TOKEN_PATTERN))
+    return token_prefix(values), info['token_ts'], info['platform'], info['reg_nation'], info['create_time']
+
+
+class StoredValues(Mapping):
+    """Registry values of a stored account, read from account_values on first use.
+
+    `info` and `prefix` come from the accounts row, so AccountInfoCache and
+    TokenPrefixIndex use them without touching the blobs.
+    """
+
+    def __init__(self, store, account_id, info, prefix):
+        self.store = store
+        self.account_id = account_id
+        self.info = info
+        self.prefix = prefix
+        self.values = None
+
+    def fetch(self):
+        if self.values is None:
+            self.values = self.store.fetch_values(self.account_id)
+        return self.values
+
+    def __getitem__(self, key):
+        return self.fetch()[key]
+
+    def __iter__(self):
+        return iter(self.fetch())
+
+    def __len__(self):
+        return len(self.fetch())
+
+    def __eq__(self, other):
+        # The Qt model compares values objects to spot changed rows; comparing
+        # contents would pull both sets of blobs for every row.
+        return other is self
+
+    __hash__ = None
+
+
+class SqliteAccountStore:
+    """Account store kept in an SQLite database (accounts.db).
+
+    Same interface as JournaledAccountStore. load() reads only the accounts
+    table, which carries the columns the list shows; each account's values are
+    a StoredValues mapping that queries account_values when the account is
+    actually used, e.g. written back to the registry. Mutations update the
+    in-memory dicts immediately and run their SQL in one transaction, through
+    `writer` when one is given. Accounts are addressed by id in SQL, so queued
+    writes and lazy reads stay consistent across renames.
+
+    An empty database is seeded from `import_file` (accounts.json plus its
+    journal) the first time it is opened.
+    """
+
+    def __init__(self, db_file, import_file=None, writer=None):
+        self.db_file = Path(db_file)
+        self.import_file = Path(import_file) if import_file else None
+        self.config = {}
+        self.accounts = {}
+        self.tags = {}
+        self.ids = {}
+        self.next_id = 1
+        self.next_position = 1
+        self.loaded = False
+        self.load_error = None
+        self.lock = threading.RLock()
+        self.db = None
+        self.writer = writer
+
+    def connect(self):
+        if self.db is None:
+            db = sqlite3.connect(self.db_file, check_same_thread=False)
+            db.execute('PRAGMA foreign_keys = ON')
+            fresh = db.execute("SELECT 1 FROM sqlite_master WHERE name = 'accounts'").fetchone() is None
+            db.executescript(SCHEMA)
+            self.db = db
+            if fresh and self.import_file is not None:
+                try:
+                    self._import()
+                except (sqlite3.DatabaseError, ValueError):
+                    # Leave no half-seeded database behind; the next start retries.
+                    db.close()
+                    self.db = None
+                    self.db_file.unlink()
+                    raise
+        return self.db
+
+    def _import(self):
+        from account_store import JournaledAccountStore
+
+        source = JournaledAccountStore(self.import_file)
+        config, accounts = source.load()
+        statements = []
+        for name, values in accounts.items():
+            self._apply({'op': 'put', 'name': name, 'values': values}, statements)
+        for name, tags in source.tags.items():
+            for tag in tags:
+                self._apply({'op': 'tag', 'names': [name], 'tag': tag}, statements)
+        self._execute(statements)
+        self._write_config(config)
+        self.accounts = {}
+        self.tags = {}
+        self.ids = {}
+
+    def load_config(self):
+        with self.lock:
+            if not self.loaded:
+                try:
+                    self.config = self._read_config()
+                except (sqlite3.DatabaseError, ValueError) as e:
+                    # A database that cannot be opened or seeded fails load()
+                    # the same way, so callers see one error, not a crash here.
+                    self.load_error = ValueError(str(e))
+                    self.loaded = True
+            return self.config
+
+    def _read_config(self):
+        rows = self.connect().execute('SELECT key, value FROM config')
+        return {key: json.loads(value) for key, value in rows}
+
+    def load(self):
+        with self.lock:
+            if not self.loaded:
+                self._load()
+            if self.load_error is not None:
+                raise self.load_error
+            return self.config, self.accounts
+
+    def _load(self):
+        self.accounts = {}
+        self.tags = {}
+        self.ids = {}
+        try:
+            db = self.connect()
+            self.config = self._read_config()
+            for row in db.execute(f'SELECT {LIST_COLUMNS} FROM accounts ORDER BY position'):
+                account_id, name, prefix, token_ts, platform, reg_nation, create_time = row
+                info = {'platform': platform, 'create_time': create_time, 'reg_nation': reg_nation,
+                        'token_ts': token_ts}
+                self.accounts[name] = StoredValues(self, account_id, info, prefix)
+                self.ids[name] = account_id
+            names = {account_id: name for name, account_id in self.ids.items()}
+            for account_id, tag in db.execute('SELECT account_id, tag FROM account_tags ORDER BY tag'):
+                self.tags.setdefault(names[account_id], []).append(tag)
+            max_id, max_position = db.execute('SELECT MAX(id), MAX(position) FROM accounts').fetchone()
+            self.next_id = (max_id or 0) + 1
+            self.next_position = (max_position or 0) + 1
+        except (sqlite3.DatabaseError, ValueError) as e:
+            self.load_error = ValueError(str(e))
+        self.loaded = True
+
+    def fetch_values(self, account_id):
+        with self.lock:
+            rows = self.connect().execute(
+                'SELECT value_name, type, data FROM account_values WHERE account_id = ?', (account_id,)
+            )
+            return {value_name: row_value(value_type, data) for value_name, value_type, data in rows}
+
+    def _apply(self, record, statements):
+        op = record.get('op')
+        if op == 'put':
+            name, values = record['name'], record['values']
+            account_id = self.ids.get(name)
+            if account_id is None:
+                account_id = self.ids[name] = self.next_id
+                self.next_id += 1
+                statements.append((
+                    'INSERT INTO accounts (id, name, position, token_prefix, token_ts, platform, reg_nation, '
+                    'create_time) VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                    (account_id, name, self.next_position) + summary_row(values)
+                ))
+                self.next_position += 1
+            else:
+                statements.append((
+                    'UPDATE accounts SET token_prefix = ?, token_ts = ?, platform = ?, reg_nation = ?, '
+                    'create_time = ? WHERE id = ?',
+                    summary_row(values) + (account_id,)
+                ))
+                statements.append(('DELETE FROM account_values WHERE account_id = ?', (account_id,)))
+            statements.extend(
+                ('INSERT INTO account_values (account_id, value_name, type, data) VALUES (?, ?, ?, ?)', row)
+                for row in value_rows(account_id, values)
+            )
+            self.accounts[name] = values
+        elif op == 'delete':
+            account_id = self.ids.pop(record['name'], None)
+            self.accounts.pop(record['name'], None)
+            self.tags.pop(record['name'], None)
+            if account_id is not None:
+                statements.append(('DELETE FROM accounts WHERE id = ?', (account_id,)))
+        elif op == 'rename':
+            old_name, new_name = record['old'], record['new']
+            if old_name not in self.ids:
+                return
+            if new_name in self.ids:
+                self._apply({'op': 'delete', 'name': new_name}, statements)
+            # Renamed accounts move to the end, as they do in accounts.json.
+            account_id = self.ids[new_name] = self.ids.pop(old_name)
+            statements.append(('UPDATE accounts SET name = ?, position = ? WHERE id = ?',
+                               (new_name, self.next_position, account_id)))
+            self.next_position += 1
+            self.accounts[new_name] = self.accounts.pop(old_name)
+            if old_name in self.tags:
+                self.tags[new_name] = self.tags.pop(old_name)
+        elif op in ('tag', 'untag'):
+            for name in record['names']:
+                account_id = self.ids.get(name)
+                if account_id is None:
+                    continue
+                tags = set(self.tags.get(name, ()))
+                if op == 'tag':
+                    tags.add(record['tag'])
+                    statements.append(('INSERT OR IGNORE INTO account_tags (account_id, tag) VALUES (?, ?)',
+                                       (account_id, record['tag'])))
+                else:
+                    tags.discard(record['tag'])
+                    statements.append(('DELETE FROM account_tags WHERE account_id = ? AND tag = ?',
+                                       (account_id, record['tag'])))
+                if tags:
+                    self.tags[name] = sorted(tags)
+                else:
+                    self.tags.pop(name, None)
+        elif op == 'batch':
+            for item in record['ops']:
+                self._apply(item, statements)
+
+    @timed('save_accounts')
+    def _execute(self, statements):
+        with self.lock:
+            db = self.connect()
+            with db:
+                for sql, params in statements:
+                    db.execute(sql, params)
+
+    def commit(self, record):
+        with self.lock:
+            statements = []
+            self._apply(record, statements)
+            if not statements:
+                return
+            if self.writer is None:
+                self._execute(statements)
+            else:
+                self.writer(lambda: self._execute(statements))
+
+    def put(self, name, values):
+        self.commit({'op': 'put', 'name': name, 'values': values})
+
+    def delete(self, name):
+        self.commit({'op': 'delete', 'name': name})
+
+    def rename(self, old_name, new_name):
+        self.commit({'op': 'rename', 'old': old_name, 'new': new_name})
+
+    def apply_batch(self, ops):
+        if ops:
+            self.commit({'op': 'batch', 'ops': list(ops)})
+
+    def delete_many(self, names):
+        self.apply_batch([{'op': 'delete', 'name': name} for name in names])
+
+    def tag_many(self, names, tag, remove=False):
+        self.commit({'op': 'untag' if remove else 'tag', 'names': list(names), 'tag': tag})
+
+    @timed('save_accounts')
+    def set_config(self, config):
+        with self.lock:
+            self.config = dict(config)
+            self._write_config(self.config)
+
+    def _write_config(self, config):
+        with self.lock:
+            db = self.connect()
+            with db:
+                db.execute('DELETE FROM config')
+                db.executemany('INSERT INTO config (key, value) VALUES (?, ?)',
+                               [(key, json.dumps(value, ensure_ascii=False)) for key, value in config.items()])
+
+    def close(self):
+        with self.lock:
+            if self.db is not None:
+                self.db.close()
+                self.db = None
@@ -0,0 +1,72 @@
+import queue
+import threading
+from collections import deque
+
+
+class SerialWorker:
+    """Runs jobs one at a time on a background thread.
+
+    Results are not delivered on the worker thread: they queue up until the
+    UI thread calls drain(), which runs the on_done/on_error callbacks there.
+    Tk drives drain() from root.after polling; Qt sets `notify` to a signal
+    emit so the GUI thread is woken after every job. Submitting a job with a
+    `key` that is already waiting replaces the waiting job instead of queueing
+    a second one, so repeated clicks coalesce into the latest request.
+    """
+
+    def __init__(self, notify=None):
+        self.notify = notify
+        self.lock = threading.Lock()
+        self.wakeup = threading.Condition(self.lock)
+        self.idle = threading.Condition(self.lock)
+        self.pending = deque()
+        self.active = 0
+        self.completed = queue.Queue()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def submit(self, job, on_done=None, on_error=None, key=None):
+        with self.lock:
+            if key is not None:
+                for task in self.pending:
+                    if task[0] == key:
+                        task[1:] = [job, on_done, on_error]
+                        return False
+            self.pending.append([key, job, on_done, on_error])
+            self.active += 1
+            self.wakeup.notify()
+        return True
+
+    def run(self):
+        while True:
+            with self.lock:
+                while not self.pending:
+                    self.wakeup.wait()
+                _, job, on_done, on_error = self.pending.popleft()
+            try:
+                self.completed.put((on_done, job()))
+            except Exception as e:
+                self.completed.put((on_error, e))
+            with self.lock:
+                self.active -= 1
+                if not self.active:
+                    self.idle.notify_all()
+            if self.notify is not None:
+                self.notify()
+
+    def busy(self):
+        with self.lock:
+            return self.active > 0
+
+    def drain(self):
+        while True:
+            try:
+                callback, value = self.completed.get_nowait()
+            except queue.Empty:
+                return
+            if callback is not None:
+                callback(value)
+
+    def flush(self, timeout=None):
+        with self.lock:
+            return self.idle.wait_for(lambda: not self.active, timeout)
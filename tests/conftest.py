@@ -0,0 +1,51 @@
+import sys
+import json
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from account_store import JournaledAccountStore
+from registry_value import RegistryValue, REG_BINARY, REG_DWORD, value_raw, value_type
+
+TOKEN_VALUE = 'neon_access_token_h2877165395'
+MEMBER_VALUE = 'neon_auth_member_h1780470731'
+
+
+def account_values(i, token_ts=1700000000000):
+    token = f'{i:08x}|ab|cd|ef|1|{token_ts + i}'
+    member = json.dumps({'reg_path': 'FIREBASE_google', 'reg_nation': 'KR', 'crt_dt': 1600000000000})
+    return {
+        TOKEN_VALUE: RegistryValue.from_raw(token.encode('utf-8') + b'\x00', REG_BINARY),
+        MEMBER_VALUE: RegistryValue.from_raw(member.encode('utf-8') + b'\x00', REG_BINARY)
+    }
+
+
+def odd_values():
+    # Bytes that do not survive a round-trip through text: invalid UTF-8 and
+    # NUL padding, next to a DWORD and a value saved by an earlier version.
+    return {
+        TOKEN_VALUE: RegistryValue.from_raw(b'\xff\xfe|x|y|z|1|2\x00\x00', REG_BINARY),
+        'dword': RegistryValue.from_raw(7, REG_DWORD),
+        'legacy': {'data': 'plain text', 'type': REG_BINARY}
+    }
+
+
+def raw_values(values):
+    # What a switch would write to the registry for each value.
+    return {name: (value_type(value), value_raw(value)) for name, value in values.items()}
+
+
+@pytest.fixture
+def seeded_json(tmp_path):
+    """accounts.json with three accounts, a tag and a config, plus its journal."""
+    data_file = tmp_path / 'accounts.json'
+    store = JournaledAccountStore(data_file)
+    store.load()
+    store.set_config({'language': 'en'})
+    for i in range(3):
+        store.put(f'account{i}', account_values(i))
+    store.tag_many(['account1'], 'main')
+    store.close()
+    return data_file
@@ -0,0 +1,44 @@
+from account_index import TokenPrefixIndex, token_prefix
+from conftest import account_values
+
+
+def test_lookup_by_prefix():
+    index = TokenPrefixIndex({f'a{i}': account_values(i) for i in range(3)})
+    assert index.lookup(token_prefix(account_values(1))) == 'a1'
+    assert index.lookup('ffffffff|ab|cd|ef') is None
+    assert index.lookup(None) is None
+
+
+def test_shared_prefix_returns_earliest_added():
+    index = TokenPrefixIndex()
+    index.add('first', account_values(1))
+    index.add('second', account_values(1, token_ts=1800000000000))
+    prefix = token_prefix(account_values(1))
+    assert index.lookup(prefix) == 'first'
+
+    # Re-saving under the same prefix keeps the place, as it does in the store.
+    index.add('first', account_values(1, token_ts=1900000000000))
+    assert index.lookup(prefix) == 'first'
+
+    index.remove('first')
+    assert index.lookup(prefix) == 'second'
+    index.remove('second')
+    assert index.by_prefix == {}
+
+
+def test_changed_prefix_moves_the_account():
+    index = TokenPrefixIndex({'a': account_values(1)})
+    index.add('a', account_values(2))
+    assert index.lookup(token_prefix(account_values(1))) is None
+    assert index.lookup(token_prefix(account_values(2))) == 'a'
+
+    index.add('a', {})
+    assert index.by_name == {}
+
+
+def test_rename_keeps_prefix():
+    index = TokenPrefixIndex({'a': account_values(1)})
+    index.rename('a', 'b')
+    index.rename('missing', 'c')
+    assert index.lookup(token_prefix(account_values(1))) == 'b'
+    assert index.by_name == {'b': token_prefix(account_values(1))}
@@ -0,0 +1,65 @@
+from account_info import AccountInfoCache, format_token_age, parse_raw_info
+from conftest import MEMBER_VALUE, account_values
+
+
+def test_fields_match_an_eager_parse():
+    values = account_values(1)
+    info = AccountInfoCache().get(values)
+    assert info['token_ts'] == 1700000000001
+    assert info.fields is None
+    eager = parse_raw_info(values[MEMBER_VALUE].text, None)
+    for field in ('platform', 'reg_nation', 'create_time'):
+        assert info[field] == eager[field]
+    assert info['platform'] == 'google'
+    assert info['reg_nation'] == 'KR'
+
+
+def test_same_blobs_hit_the_cache():
+    cache = AccountInfoCache()
+    first = cache.get(account_values(1))
+    assert cache.get(account_values(1)) is first
+    assert cache.get(account_values(2)) is not first
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+def test_bound_follows_the_accounts():
+    accounts = {}
+    cache = AccountInfoCache(accounts, min_size=4)
+    assert cache.max_size == 4
+    for i in range(10):
+        accounts[f'a{i}'] = account_values(i)
+    assert cache.max_size == 20
+
+    for values in accounts.values():
+        cache.get(values)
+    for values in accounts.values():
+        cache.get(values)
+    assert cache.misses == 10
+    assert cache.hits == 10
+
+
+def test_least_recently_used_is_evicted():
+    cache = AccountInfoCache(min_size=4)
+    first = cache.get(account_values(0))
+    for i in range(1, 4):
+        cache.get(account_values(i))
+    assert cache.get(account_values(0)) is first
+    cache.get(account_values(4))
+    assert len(cache.entries) == 4
+    assert cache.get(account_values(0)) is first
+    cache.get(account_values(1))
+    assert cache.misses == 6
+
+
+def test_missing_or_broken_values():
+    info = AccountInfoCache().get({MEMBER_VALUE: {'data': '{broken'}})
+    assert info['token_ts'] is None
+    assert info['platform'] == ''
+
+
+def test_token_age():
+    now = 1700000000
+    assert format_token_age(None, 'en', now) == ''
+    assert format_token_age((now - 5 * 60) * 1000, 'en', now) == '5m ago'
+    assert format_token_age((now - 3 * 3600) * 1000, 'zh', now) == '3小时前'
+    assert format_token_age((now - 26 * 3600) * 1000, 'en', now) == '1d 2h ago'
@@ -0,0 +1,92 @@
+import random
+
+import pytest
+
+from account_search import AccountSearchIndex
+
+
+def info(platform='google', nation='KR', date='2024-01-02'):
+    return {'platform': platform, 'reg_nation': nation, 'create_time': date, 'token_ts': None}
+
+
+INFOS = {
+    'MainAlt': info(),
+    'alt-two': info('apple', 'JP', '2023-05-06'),
+    'Farm 03': info('guest', '', ''),
+    'seoul': info('google', 'KR', '2023-05-07'),
+}
+
+
+def brute_force(infos, query):
+    terms = query.lower().split()
+    if not terms:
+        return None
+    fields = {name: [name.lower()] + [info[key].lower() for key in ('platform', 'reg_nation', 'create_time')]
+              for name, info in infos.items()}
+    return {name for name, texts in fields.items() if all(any(term in text for text in texts) for term in terms)}
+
+
+@pytest.mark.parametrize('query, expected', [
+    ('', None),
+    ('   ', None),
+    ('alt', {'MainAlt', 'alt-two'}),
+    ('ALT jp', {'alt-two'}),
+    ('kr', {'MainAlt', 'seoul'}),
+    ('2023-05', {'alt-two', 'seoul'}),
+    ('goo seo', {'seoul'}),
+    ('farm 03', {'Farm 03'}),
+    ('nothing', set()),
+])
+def test_search(query, expected):
+    assert AccountSearchIndex(INFOS).search(query) == expected
+
+
+def test_typing_narrows_and_edits_drop_the_kept_result():
+    index = AccountSearchIndex(INFOS)
+    assert index.search('a') == brute_force(INFOS, 'a')
+    assert index.search('al') == {'MainAlt', 'alt-two'}
+    assert index.search('alt') == {'MainAlt', 'alt-two'}
+
+    index.add('altogether', info('apple'))
+    assert index.search('alt') == {'MainAlt', 'alt-two', 'altogether'}
+    index.rename('alt-two', 'second')
+    assert index.search('alt') == {'MainAlt', 'altogether'}
+    assert index.search('second jp') == {'second'}
+    index.remove('MainAlt')
+    assert index.search('alt') == {'altogether'}
+
+
+def test_changes_before_the_first_search():
+    index = AccountSearchIndex(INFOS)
+    index.add('new', info('apple'))
+    index.rename('seoul', 'busan')
+    index.remove('MainAlt')
+    assert index.search('g') == {'Farm 03', 'busan'}
+    assert index.search('apple') == {'alt-two', 'new'}
+
+
+@pytest.mark.parametrize('seed', range(10))
+def test_matches_brute_force(seed):
+    rng = random.Random(seed)
+    infos = {}
+    index = AccountSearchIndex()
+    index.search('x')
+    queries = ['a', 'ab', 'abc', 'abcd', 'kr', 'goo', 'a kr', 'ab 20', 'c b', '2024']
+    for step in range(300):
+        name = ''.join(rng.choice('abcd') for _ in range(rng.randint(1, 6)))
+        action = rng.random()
+        if action < 0.6:
+            infos[name] = info(rng.choice(['google', 'apple', '']), rng.choice(['KR', 'JP', '']),
+                               rng.choice(['2024-01-01', '2023-12-31', '']))
+            index.add(name, infos[name])
+        elif action < 0.8 and infos:
+            old = rng.choice(sorted(infos))
+            if name not in infos:
+                infos[name] = infos.pop(old)
+                index.rename(old, name)
+        elif infos:
+            old = rng.choice(sorted(infos))
+            del infos[old]
+            index.remove(old)
+        query = rng.choice(queries)
+        assert index.search(query) == brute_force(infos, query), (step, query)
@@ -0,0 +1,61 @@
+import random
+
+import pytest
+
+from account_sort import SortedAccountIndex, SORT_FIELDS, sort_key
+
+
+def info(platform, nation, date, token_ts):
+    return {'platform': platform, 'reg_nation': nation, 'create_time': date, 'token_ts': token_ts}
+
+
+INFOS = {
+    'bravo': info('google', 'KR', '2024-01-02', 300),
+    'Alpha': info('apple', '', '2023-05-06', None),
+    'charlie': info('', 'JP', '', 100),
+}
+
+
+@pytest.mark.parametrize('field, expected', [
+    ('name', ['Alpha', 'bravo', 'charlie']),
+    ('platform', ['Alpha', 'bravo', 'charlie']),
+    ('reg_nation', ['charlie', 'bravo', 'Alpha']),
+    ('create_time', ['Alpha', 'bravo', 'charlie']),
+    ('token_ts', ['charlie', 'bravo', 'Alpha']),
+])
+def test_orders_put_missing_fields_last(field, expected):
+    index = SortedAccountIndex(INFOS)
+    assert index.names(field) == expected
+    assert index.names(field, reverse=True) == expected[::-1]
+
+
+def test_refreshed_token_moves_one_entry():
+    index = SortedAccountIndex(INFOS)
+    assert index.names('token_ts') == ['charlie', 'bravo', 'Alpha']
+    index.add('charlie', info('', 'JP', '', 500))
+    assert index.names('token_ts') == ['bravo', 'charlie', 'Alpha']
+    index.rename('bravo', 'delta')
+    index.remove('Alpha')
+    index.remove('missing')
+    assert index.names('token_ts') == ['delta', 'charlie']
+    assert index.names('name') == ['charlie', 'delta']
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_matches_a_full_sort(seed):
+    rng = random.Random(seed)
+    index = SortedAccountIndex()
+    infos = {}
+    for field in SORT_FIELDS:
+        index.names(field)
+    for _ in range(200):
+        name = rng.choice('abcdefghij') + rng.choice('xyz')
+        if rng.random() < 0.7:
+            infos[name] = info(rng.choice(['google', 'apple', '']), rng.choice(['KR', 'jp', '']),
+                               rng.choice(['2024-01-01', '2023-12-31', '']), rng.choice([None, 1, 2, 3]))
+            index.add(name, infos[name])
+        else:
+            infos.pop(name, None)
+            index.remove(name)
+        for field in SORT_FIELDS:
+            assert index.names(field) == [key[-1] for key in sorted(sort_key(field, n, i) for n, i in infos.items())]
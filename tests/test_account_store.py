@@ -0,0 +1,134 @@
+import json
+
+import pytest
+
+from account_store import JournaledAccountStore
+from task_worker import SerialWorker
+from conftest import account_values, odd_values, raw_values
+
+
+def reopen(data_file, **kwargs):
+    store = JournaledAccountStore(data_file, **kwargs)
+    return store, store.load()
+
+
+def test_journal_replays_mutations(tmp_path):
+    data_file = tmp_path / 'accounts.json'
+    store = JournaledAccountStore(data_file)
+    store.load()
+    store.put('a', account_values(1))
+    store.put('b', account_values(2))
+    store.rename('a', 'c')
+    store.delete('b')
+    store.tag_many(['c'], 'main')
+    store.apply_batch([{'op': 'put', 'name': 'd', 'values': account_values(4)}])
+
+    assert not data_file.exists()
+    store, (_, accounts) = reopen(data_file)
+    assert list(accounts) == ['c', 'd']
+    assert raw_values(accounts['c']) == raw_values(account_values(1))
+    assert store.tags == {'c': ['main']}
+
+
+def test_torn_journal_line_is_dropped_and_truncated(tmp_path):
+    data_file = tmp_path / 'accounts.json'
+    store = JournaledAccountStore(data_file)
+    store.load()
+    store.put('a', account_values(1))
+    store.put('b', account_values(2))
+    journal = store.journal_file
+    whole = journal.read_bytes()
+    journal.write_bytes(whole[:-10])
+
+    store, (_, accounts) = reopen(data_file)
+    assert list(accounts) == ['a']
+    assert journal.read_bytes() == whole[:whole.index(b'\n') + 1]
+
+    # The next record lands after the truncated line, not inside it.
+    store.put('c', account_values(3))
+    _, (_, accounts) = reopen(data_file)
+    assert list(accounts) == ['a', 'c']
+
+
+def test_compaction_folds_and_trims_journal(tmp_path):
+    data_file = tmp_path / 'accounts.json'
+    store = JournaledAccountStore(data_file, compact_threshold=1000)
+    store.load()
+    for i in range(5):
+        store.put(f'a{i}', account_values(i))
+    store.compact()
+    assert not store.journal_file.exists()
+    assert json.loads(data_file.read_text(encoding='utf-8'))['_config']['_journal_seq'] == 5
+
+    store.put('late', account_values(9))
+    _, (_, accounts) = reopen(data_file)
+    assert list(accounts) == [f'a{i}' for i in range(5)] + ['late']
+
+
+def test_background_compaction_with_async_writer(tmp_path):
+    data_file = tmp_path / 'accounts.json'
+    worker = SerialWorker()
+    store = JournaledAccountStore(data_file, compact_threshold=10, writer=worker.submit)
+    store.load()
+    for i in range(35):
+        store.put(f'a{i}', account_values(i))
+    worker.flush(timeout=10)
+    store.close()
+    worker.flush(timeout=10)
+
+    # The writer can append records a compaction already folded in; replay
+    # skips them by seq.
+    assert data_file.exists()
+    _, (_, accounts) = reopen(data_file)
+    assert list(accounts) == [f'a{i}' for i in range(35)]
+
+    store.compact()
+    assert not store.journal_file.exists()
+    _, (_, accounts) = reopen(data_file)
+    assert list(accounts) == [f'a{i}' for i in range(35)]
+
+
+def test_config_lives_in_sidecar(seeded_json):
+    store = JournaledAccountStore(seeded_json)
+    assert store.load_config() == {'language': 'en'}
+    assert not store.loaded
+
+    store.set_config({'language': 'zh'})
+    fresh = JournaledAccountStore(seeded_json)
+    assert fresh.load_config() == {'language': 'zh'}
+    config, _ = fresh.load()
+    assert config == {'language': 'zh'}
+
+
+def test_config_falls_back_to_snapshot_without_sidecar(seeded_json):
+    store = JournaledAccountStore(seeded_json)
+    store.load()
+    store.compact()
+    store.config_file.unlink()
+    data = json.loads(seeded_json.read_text(encoding='utf-8'))
+    data['_config']['language'] = 'zh'
+    seeded_json.write_text(json.dumps(data), encoding='utf-8')
+
+    assert JournaledAccountStore(seeded_json).load_config() == {'language': 'zh'}
+
+
+def test_corrupt_snapshot_sets_load_error(tmp_path):
+    data_file = tmp_path / 'accounts.json'
+    data_file.write_text('{"a": {broken', encoding='utf-8')
+    store = JournaledAccountStore(data_file)
+    with pytest.raises(ValueError):
+        store.load()
+    assert store.load_config() == {}
+
+
+def test_raw_bytes_survive_journal_and_snapshot(tmp_path):
+    data_file = tmp_path / 'accounts.json'
+    store = JournaledAccountStore(data_file)
+    store.load()
+    store.put('odd', odd_values())
+    _, (_, accounts) = reopen(data_file)
+    assert raw_values(accounts['odd']) == raw_values(odd_values())
+
+    store.compact()
+    _, (_, accounts) = reopen(data_file)
+    assert raw_values(accounts['odd']) == raw_values(odd_values())
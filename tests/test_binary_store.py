@@ -0,0 +1,123 @@
+import json
+
+import pytest
+
+import binary_store
+from binary_store import (BinaryAccountStore, PackedValues, pack_accounts, pack_values, unpack_values,
+                          json_to_binary, binary_to_json)
+from account_store import JournaledAccountStore, create_store
+from registry_value import RegistryValue, REG_BINARY, REG_DWORD, REG_QWORD
+from conftest import TOKEN_VALUE, account_values, odd_values, raw_values
+
+
+def test_seeded_from_accounts_json(seeded_json, monkeypatch):
+    monkeypatch.delenv('BD2_ACCOUNT_STORE', raising=False)
+    store = create_store(seeded_json, spec='binary')
+    config, accounts = store.load()
+    assert config == {'language': 'en'}
+    assert list(accounts) == ['account0', 'account1', 'account2']
+    assert raw_values(accounts['account2']) == raw_values(account_values(2))
+    assert store.tags == {'account1': ['main']}
+    store.close()
+
+    store = create_store(seeded_json)
+    assert isinstance(store, BinaryAccountStore)
+    store.close()
+
+
+@pytest.mark.parametrize('number, value_type', [(0, REG_DWORD), (7, REG_DWORD), (2 ** 32 - 1, REG_DWORD),
+                                                (2 ** 64 - 1, REG_QWORD), (-1, REG_DWORD)])
+def test_integer_values_pack(number, value_type):
+    values = {'n': RegistryValue.from_raw(number, value_type)}
+    unpacked = unpack_values(memoryview(pack_values(values)))
+    assert unpacked == values
+    assert unpacked['n'].raw == number
+
+
+def test_round_trip_through_snapshot_is_lossless(tmp_path):
+    data_file = tmp_path / 'accounts.bd2'
+    store = BinaryAccountStore(data_file)
+    store.load()
+    store.put('odd', {**odd_values(), 'bare': 'a bare string'})
+    store.put('plain', account_values(1))
+    store.compact()
+    assert not store.journal_file.exists()
+    store.close()
+
+    store = BinaryAccountStore(data_file)
+    _, accounts = store.load()
+    assert isinstance(accounts['odd'], PackedValues)
+    assert raw_values(accounts['odd']) == raw_values({**odd_values(), 'bare': 'a bare string'})
+    assert accounts['odd']['bare'] == 'a bare string'
+    assert raw_values(accounts['plain']) == raw_values(account_values(1))
+    store.close()
+
+
+def test_compaction_with_dword_values_keeps_journal_short(tmp_path):
+    data_file = tmp_path / 'accounts.bd2'
+    store = BinaryAccountStore(data_file, compact_threshold=5)
+    store.load()
+    for i in range(12):
+        store.put(f'a{i}', odd_values())
+    store.close()
+    store.compact()
+    assert not store.journal_file.exists()
+    store.close()
+
+    store = BinaryAccountStore(data_file)
+    _, accounts = store.load()
+    assert len(accounts) == 12
+    assert raw_values(accounts['a11']) == raw_values(odd_values())
+    store.close()
+
+
+def test_older_versions_still_load(tmp_path, monkeypatch):
+    data_file = tmp_path / 'accounts.bd2'
+    monkeypatch.setattr(binary_store, 'VERSION', 1)
+    values = {TOKEN_VALUE: {'data': 'a|b|c|d|1|2', 'type': REG_BINARY}}
+    data_file.write_bytes(pack_accounts({'language': 'en'}, {'old': values}))
+    monkeypatch.undo()
+
+    store = BinaryAccountStore(data_file)
+    config, accounts = store.load()
+    assert config == {'language': 'en'}
+    assert raw_values(accounts['old']) == raw_values(values)
+    store.close()
+
+
+def test_truncated_file_is_a_load_error(tmp_path):
+    data_file = tmp_path / 'accounts.bd2'
+    data_file.write_bytes(pack_accounts({}, {'a': account_values(1)})[:-20])
+    store = BinaryAccountStore(data_file)
+    with pytest.raises(ValueError):
+        store.load()
+    store.close()
+
+
+def test_conversions_replay_journals(tmp_path):
+    json_file = tmp_path / 'accounts.json'
+    store = JournaledAccountStore(json_file)
+    store.load()
+    store.put('a', odd_values())
+    store.compact()
+    store.put('b', account_values(2))  # only in accounts.journal
+    store.tag_many(['b'], 'main')
+
+    bd2_file = tmp_path / 'accounts.bd2'
+    json_to_binary(json_file, bd2_file)
+    converted = BinaryAccountStore(bd2_file)
+    _, accounts = converted.load()
+    assert list(accounts) == ['a', 'b']
+    assert converted.seq == 0
+    assert converted.tags == {'b': ['main']}
+    converted.put('c', account_values(3))  # only in accounts.bd2.journal
+    converted.close()
+
+    back = tmp_path / 'back.json'
+    binary_to_json(bd2_file, back)
+    data = json.loads(back.read_text(encoding='utf-8'))
+    assert '_journal_seq' not in data['_config']
+    assert data['_config']['_tags'] == {'b': ['main']}
+    _, accounts = JournaledAccountStore(back).load()
+    assert list(accounts) == ['a', 'b', 'c']
+    assert raw_values(accounts['a']) == raw_values(odd_values())
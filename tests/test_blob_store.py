@@ -0,0 +1,151 @@
+import json
+
+import pytest
+
+from blob_store import BlobAccountStore
+from account_store import create_store
+from conftest import TOKEN_VALUE, MEMBER_VALUE, account_values, odd_values, raw_values
+
+
+def reopen(data_file, **kwargs):
+    store = BlobAccountStore(data_file, **kwargs)
+    store.load()
+    return store
+
+
+def test_seeded_from_accounts_json(seeded_json, monkeypatch):
+    monkeypatch.delenv('BD2_ACCOUNT_STORE', raising=False)
+    store = create_store(seeded_json, spec='blobs')
+    config, accounts = store.load()
+    assert config == {'language': 'en'}
+    assert list(accounts) == ['account0', 'account1', 'account2']
+    assert store.tags == {'account1': ['main']}
+    assert store.history('account0') == []
+
+    store = create_store(seeded_json)
+    assert isinstance(store, BlobAccountStore)
+    assert raw_values(store.load()[1]['account2']) == raw_values(account_values(2))
+
+
+def test_values_round_trip_exactly(tmp_path):
+    store = reopen(tmp_path / 'accounts.blobs')
+    store.put('odd', odd_values())
+    assert raw_values(reopen(tmp_path / 'accounts.blobs').accounts['odd']) == raw_values(odd_values())
+    store.compact()
+    assert raw_values(reopen(tmp_path / 'accounts.blobs').accounts['odd']) == raw_values(odd_values())
+
+
+def test_shared_values_are_stored_once(tmp_path):
+    store = reopen(tmp_path / 'accounts.blobs')
+    store.put('a', account_values(1))
+    store.put('b', account_values(2))
+    # Same auth member, different tokens: three blobs, not four.
+    assert len(store.blobs) == 3
+    store.compact()
+
+    store = reopen(tmp_path / 'accounts.blobs')
+    assert store.accounts['a'][MEMBER_VALUE] is store.accounts['b'][MEMBER_VALUE]
+    assert raw_values(store.accounts['b']) == raw_values(account_values(2))
+
+
+def test_history_and_rollback(tmp_path):
+    data_file = tmp_path / 'accounts.blobs'
+    store = reopen(data_file, history_limit=2)
+    for i in range(4):
+        store.put('a', account_values(i))
+    store.put('a', account_values(3))  # unchanged: no history entry
+
+    history = store.history('a')
+    assert [raw_values(values) for _, values in history] == [raw_values(account_values(2)),
+                                                             raw_values(account_values(1))]
+
+    restored = store.rollback('a', 1)
+    assert raw_values(restored) == raw_values(account_values(1))
+    assert [raw_values(values) for _, values in store.history('a')] == [raw_values(account_values(3)),
+                                                                        raw_values(account_values(2))]
+    with pytest.raises(ValueError):
+        store.rollback('a', 5)
+
+    # Replayed from the journal, then from the compacted snapshot.
+    for _ in range(2):
+        store = reopen(data_file, history_limit=2)
+        assert raw_values(store.accounts['a']) == raw_values(account_values(1))
+        assert len(store.history('a')) == 2
+        store.compact()
+
+
+def test_compaction_drops_unreferenced_blobs(tmp_path):
+    store = reopen(tmp_path / 'accounts.blobs', history_limit=1)
+    for i in range(3):
+        store.put('a', account_values(i))
+    store.compact()
+    # Current and one earlier token, plus the shared auth member.
+    assert len(store.blobs) == 3
+
+    # A blob dropped by compaction is journaled again when it comes back.
+    store.put('a', account_values(0))
+    store = reopen(tmp_path / 'accounts.blobs', history_limit=1)
+    assert raw_values(store.accounts['a']) == raw_values(account_values(0))
+
+
+def test_rename_and_delete_carry_history(tmp_path):
+    store = reopen(tmp_path / 'accounts.blobs')
+    store.put('a', account_values(1))
+    store.put('a', account_values(2))
+    store.rename('a', 'b')
+    store.put('c', account_values(3))
+    store.delete('c')
+
+    store = reopen(tmp_path / 'accounts.blobs')
+    assert list(store.accounts) == ['b']
+    assert len(store.history('b')) == 1
+    assert store.history('c') == []
+
+
+@pytest.mark.parametrize('name', ['_blobs', '_config', '_accounts'])
+def test_reserved_looking_names_are_ordinary_accounts(tmp_path, name):
+    data_file = tmp_path / 'accounts.blobs'
+    store = reopen(data_file)
+    store.put(name, account_values(1))
+    store.put('other', account_values(2))
+    store.compact()
+
+    store = reopen(data_file)
+    assert list(store.accounts) == [name, 'other']
+    assert raw_values(store.accounts['other']) == raw_values(account_values(2))
+
+
+def test_flat_snapshots_still_load(tmp_path):
+    data_file = tmp_path / 'accounts.blobs'
+    store = reopen(data_file)
+    store.put('a', account_values(1))
+    store.compact()
+    data = json.loads(data_file.read_text(encoding='utf-8'))
+    data.update(data.pop('_accounts'))
+    data_file.write_text(json.dumps(data), encoding='utf-8')
+
+    store = reopen(data_file)
+    assert list(store.accounts) == ['a']
+    assert TOKEN_VALUE in store.accounts['a']
+
+
+def test_batched_puts_share_blobs_and_keep_history(tmp_path):
+    data_file = tmp_path / 'accounts.blobs'
+    store = reopen(data_file)
+    store.put('a', account_values(1))
+    store.apply_batch([
+        {'op': 'put', 'name': 'a', 'values': account_values(1)},  # unchanged: no history entry
+        {'op': 'put', 'name': 'b', 'values': account_values(2)},
+        {'op': 'put', 'name': 'c', 'values': account_values(3)},
+        {'op': 'delete', 'name': 'c'},
+        {'op': 'put', 'name': 'c', 'values': account_values(3)},
+    ])
+    assert store.history('a') == []
+    assert len(store.blobs) == 4
+
+    for _ in range(2):
+        store = reopen(data_file)
+        assert list(store.accounts) == ['a', 'b', 'c']
+        assert raw_values(store.accounts['c']) == raw_values(account_values(3))
+        assert store.history('c') == []
+        store.compact()
@@ -0,0 +1,107 @@
+import json
+
+import pytest
+
+from browndust2_account_switcher_cli import SwitcherCLI, SwitcherError, main, mask_prefix
+from registry_backend import FileBackend, MemoryBackend
+from conftest import TOKEN_VALUE, account_values, raw_values
+
+
+@pytest.fixture
+def registry_file(tmp_path, monkeypatch):
+    registry_file = tmp_path / 'registry.json'
+    monkeypatch.setenv('BD2_REGISTRY_BACKEND', f'file:{registry_file}')
+    monkeypatch.delenv('BD2_ACCOUNT_STORE', raising=False)
+    FileBackend(registry_file).set_value('unrelated', 1, 4)
+    return registry_file
+
+
+def run(capsys, data_file, *argv):
+    rc = main(['--data', str(data_file), '--json', *argv])
+    out, err = capsys.readouterr()
+    return rc, json.loads(out) if out else None, err
+
+
+def test_save_load_and_current(tmp_path, registry_file, capsys):
+    data_file = tmp_path / 'accounts.json'
+    registry = FileBackend(registry_file)
+    registry.write(account_values(1))
+    assert run(capsys, data_file, 'save', 'one')[0] == 0
+    registry.write(account_values(2))
+    assert run(capsys, data_file, 'save', 'two')[0] == 0
+
+    rc, accounts, _ = run(capsys, data_file, 'list')
+    assert [info['name'] for info in accounts] == ['one', 'two']
+    assert accounts[0]['platform'] == 'google'
+    # Tokens from 2023 are long past the stale threshold.
+    assert [info['name'] for info in run(capsys, data_file, 'list', '--stale')[1]] == ['one', 'two']
+
+    assert run(capsys, data_file, 'load', 'one')[0] == 0
+    assert raw_values(registry.snapshot()) == raw_values(account_values(1))
+    assert run(capsys, data_file, 'current')[1]['name'] == 'one'
+
+    rc, _, err = run(capsys, data_file, 'save', 'one')
+    assert rc == 1 and err
+    rc, _, err = run(capsys, data_file, 'load', 'missing')
+    assert rc == 1 and err
+
+
+def test_refresh_token_and_logout(tmp_path, registry_file, capsys):
+    data_file = tmp_path / 'accounts.json'
+    registry = FileBackend(registry_file)
+    registry.write(account_values(1))
+    run(capsys, data_file, 'save', 'one')
+
+    refreshed = account_values(1, token_ts=1800000000000)
+    registry.write(refreshed)
+    assert run(capsys, data_file, 'refresh-token')[0] == 0
+    cli = SwitcherCLI(data_file)
+    assert raw_values(cli.accounts['one']) == raw_values(refreshed)
+    cli.close()
+
+    assert run(capsys, data_file, 'logout')[0] == 0
+    assert registry.snapshot()[TOKEN_VALUE].raw == b''
+    assert run(capsys, data_file, 'current') == (0, None, '')
+    rc, _, err = run(capsys, data_file, 'refresh-token')
+    assert rc == 1 and err
+
+
+def test_history_and_rollback_need_a_blob_store(tmp_path, registry_file, capsys, monkeypatch):
+    data_file = tmp_path / 'accounts.json'
+    registry = FileBackend(registry_file)
+    registry.write(account_values(1))
+    run(capsys, data_file, 'save', 'one')
+    rc, _, err = run(capsys, data_file, 'history', 'one')
+    assert rc == 1 and err
+
+    monkeypatch.setenv('BD2_ACCOUNT_STORE', 'blobs')
+    registry.write(account_values(1, token_ts=1800000000000))
+    assert run(capsys, data_file, 'save', 'one', '--force')[0] == 0
+    rc, history, _ = run(capsys, data_file, 'history', 'one')
+    assert [info['token_ts'] for info in history] == [1700000000001]
+
+    assert run(capsys, data_file, 'rollback', 'one')[0] == 0
+    assert run(capsys, data_file, 'list')[1][0]['token_ts'] == 1700000000001
+    rc, _, err = run(capsys, data_file, 'rollback', 'one', '--index', '5')
+    assert rc == 1 and err
+
+
+def test_switch_report_with_injected_registry(tmp_path):
+    registry = MemoryBackend()
+    registry.write(account_values(1))
+    cli = SwitcherCLI(tmp_path / 'accounts.json', registry)
+    cli.save_account('one')
+    cli.load_account('one')
+    assert cli.last_report['written'] == 0
+    assert cli.last_report['unchanged'] == 2
+    assert cli.current_account()['prefix'] == '00000001|ab|cd|ef'
+
+    registry.exists = False
+    with pytest.raises(SwitcherError):
+        cli.save_account('two')
+    cli.close()
+
+
+def test_mask_prefix():
+    assert mask_prefix('0123456789|ab|cd|ef') == '0123***89|ab|cd|ef'
+    assert mask_prefix('abc|x') == 'abc|x'
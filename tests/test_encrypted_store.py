@@ -0,0 +1,119 @@
+import json
+
+import pytest
+
+pytest.importorskip('cryptography')
+
+from account_store import PassphraseError
+from encrypted_store import EncryptedAccountStore, SealedValues
+from conftest import account_values, odd_values, raw_values
+
+
+def answers(*replies):
+    asked = []
+    replies = iter(replies)
+
+    def passphrase(prompt):
+        asked.append(prompt)
+        return next(replies)
+    passphrase.asked = asked
+    return passphrase
+
+
+@pytest.fixture
+def enc_file(tmp_path):
+    data_file = tmp_path / 'accounts.enc'
+    store = EncryptedAccountStore(data_file, 'secret')
+    store.load()
+    store.put('a', account_values(1))
+    store.put('b', account_values(2))
+    store.compact()
+    return data_file
+
+
+def test_accounts_are_sealed_and_opened(enc_file):
+    text = enc_file.read_text(encoding='utf-8')
+    assert 'neon_access_token' not in text
+
+    store = EncryptedAccountStore(enc_file, 'secret')
+    _, accounts = store.load()
+    assert isinstance(accounts['a'], SealedValues)
+    assert raw_values(accounts['b']) == raw_values(account_values(2))
+
+    store.put('odd', odd_values())
+    _, accounts = EncryptedAccountStore(enc_file, 'secret').load()
+    assert raw_values(accounts['odd']) == raw_values(odd_values())
+
+
+def test_wrong_passphrase_is_retried(enc_file):
+    passphrase = answers('wrong', 'secret')
+    store = EncryptedAccountStore(enc_file, passphrase)
+    _, accounts = store.load()
+    assert passphrase.asked == ['unlock', 'retry']
+    assert list(accounts) == ['a', 'b']
+
+
+def test_failed_unlock_publishes_nothing_and_writes_nothing(enc_file):
+    before = enc_file.read_bytes()
+    store = EncryptedAccountStore(enc_file, answers('x', 'y', 'z'))
+    with pytest.raises(PassphraseError):
+        store.load()
+    assert store.accounts == {}
+    assert store.tags == {}
+    with pytest.raises(ValueError):
+        store.put('c', account_values(3))
+    store.compact()
+    assert enc_file.read_bytes() == before
+
+
+def test_cancelled_prompt_is_a_passphrase_error(enc_file):
+    store = EncryptedAccountStore(enc_file, answers(None))
+    with pytest.raises(PassphraseError):
+        store.load()
+
+
+def test_new_passphrase_must_be_confirmed(tmp_path):
+    passphrase = answers('one', 'two', 'three', 'three')
+    store = EncryptedAccountStore(tmp_path / 'accounts.enc', passphrase)
+    store.load()
+    assert passphrase.asked == ['new', 'confirm', 'mismatch', 'confirm']
+    store.put('a', account_values(1))
+
+    _, accounts = EncryptedAccountStore(tmp_path / 'accounts.enc', 'three').load()
+    assert list(accounts) == ['a']
+
+
+def test_swapped_records_fail_authentication(enc_file):
+    data = json.loads(enc_file.read_text(encoding='utf-8'))
+    data['a'], data['b'] = data['b'], data['a']
+    enc_file.write_text(json.dumps(data), encoding='utf-8')
+
+    _, accounts = EncryptedAccountStore(enc_file, 'secret').load()
+    with pytest.raises(ValueError):
+        dict(accounts['a'])
+
+
+def test_rename_reseals_under_new_name(enc_file):
+    store = EncryptedAccountStore(enc_file, 'secret')
+    store.load()
+    store.rename('a', 'c')
+    store.apply_batch([{'op': 'rename', 'old': 'b', 'new': 'd'}])
+
+    # Replayed from the journal, then from the compacted snapshot.
+    for _ in range(2):
+        store = EncryptedAccountStore(enc_file, 'secret')
+        _, accounts = store.load()
+        assert raw_values(accounts['c']) == raw_values(account_values(1))
+        assert raw_values(accounts['d']) == raw_values(account_values(2))
+        store.compact()
+
+
+def test_store_is_seeded_from_accounts_json(seeded_json):
+    store = EncryptedAccountStore(seeded_json.with_suffix('.enc'), 'secret', import_file=seeded_json)
+    config, accounts = store.load()
+    assert config == {'language': 'en'}
+    assert list(accounts) == ['account0', 'account1', 'account2']
+    assert store.tags == {'account1': ['main']}
+
+    _, accounts = EncryptedAccountStore(seeded_json.with_suffix('.enc'), 'secret').load()
+    assert raw_values(accounts['account1']) == raw_values(account_values(1))
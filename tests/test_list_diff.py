@@ -0,0 +1,63 @@
+import random
+
+import pytest
+
+from list_diff import diff_rows
+
+
+def apply(names, labels, ops):
+    # Mirrors how the list widgets apply the plan, one index at a time.
+    names = list(names)
+    labels = dict(labels)
+    for op in ops:
+        if op[0] == 'remove':
+            _, index, name = op
+            assert names.pop(index) == name
+            del labels[name]
+        elif op[0] == 'order':
+            assert sorted(op[1]) == sorted(names)
+            names = list(op[1])
+        elif op[0] == 'insert':
+            _, index, name, label = op
+            names.insert(index, name)
+            labels[name] = label
+        else:
+            _, index, name, label = op
+            assert names[index] == name
+            labels[name] = label
+    return names, labels
+
+
+def rows_of(names, version=0):
+    return [(name, f'{name} v{version}') for name in names]
+
+
+def test_unchanged_rows_need_no_ops():
+    rows = rows_of('abc')
+    assert diff_rows(list('abc'), dict(rows), rows) == []
+
+
+def test_label_change_is_an_update():
+    rows = rows_of('abc')
+    new_rows = rows[:1] + rows_of('b', 1) + rows[2:]
+    assert diff_rows(list('abc'), dict(rows), new_rows) == [('update', 1, 'b', 'b v1')]
+
+
+def test_reorder_is_a_single_order_op():
+    rows = rows_of('abcde')
+    ops = diff_rows(list('abcde'), dict(rows), rows[::-1])
+    assert ops == [('order', list('edcba'))]
+
+
+@pytest.mark.parametrize('seed', range(50))
+def test_random_edits_reach_the_wanted_rows(seed):
+    rng = random.Random(seed)
+    pool = [f'n{i}' for i in range(30)]
+    current = rng.sample(pool, rng.randint(0, 20))
+    labels = dict(rows_of(current))
+    wanted = rng.sample(pool, rng.randint(0, 20))
+    rows = [(name, labels[name] if name in labels and rng.random() < 0.7 else f'{name} v1') for name in wanted]
+
+    ops = diff_rows(current, labels, rows)
+    assert apply(current, labels, ops) == ([name for name, _ in rows], dict(rows))
+    assert sum(op[0] == 'order' for op in ops) <= 1
@@ -0,0 +1,112 @@
+import pytest
+
+from registry_backend import (MemoryBackend, FileBackend, RegistryWriteError, create_backend, snapshot_hash)
+from registry_value import REG_BINARY, REG_DWORD
+from conftest import TOKEN_VALUE, MEMBER_VALUE, account_values, raw_values
+
+LIVE_TOKEN = 'neon_access_token_h1111'
+
+
+class LossyBackend(MemoryBackend):
+    """Drops the last byte of each value in the first write, so its read-back fails."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.lossy = True
+
+    def set_entries(self, key, writes):
+        if self.lossy:
+            self.lossy = False
+            writes = [(name, value_type, raw[:-1]) for name, value_type, raw in writes]
+        super().set_entries(key, writes)
+
+
+class FailingBackend(MemoryBackend):
+    """Writes the first value, then fails like a denied SetValueEx."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fail = True
+
+    def set_entries(self, key, writes):
+        if self.fail:
+            self.fail = False
+            super().set_entries(key, writes[:1])
+            raise PermissionError('access denied')
+        super().set_entries(key, writes)
+
+
+def test_write_targets_live_names_and_returns_snapshot():
+    backend = MemoryBackend(entries={LIVE_TOKEN: (b'old', REG_BINARY), 'unrelated': (5, REG_DWORD)})
+    values = account_values(1)
+    snapshot = backend.write(values)
+
+    assert set(backend.entries) == {LIVE_TOKEN, MEMBER_VALUE, 'unrelated'}
+    assert backend.entries[LIVE_TOKEN] == (values[TOKEN_VALUE].raw, REG_BINARY)
+    assert snapshot_hash(snapshot) == snapshot_hash(backend.snapshot())
+
+
+def test_write_skips_unchanged_values():
+    backend = MemoryBackend()
+    values = account_values(1)
+    backend.write(values)
+
+    report = {}
+    backend.write(values, report)
+    assert report['written'] == 0
+    assert report['unchanged'] == 2
+    assert not report['rolled_back']
+
+    backend.write(account_values(2), report)
+    # Only the token differs between the two accounts.
+    assert report['written'] == 1
+    assert report['unchanged'] == 1
+
+
+def test_mismatched_read_back_is_rolled_back():
+    before = {LIVE_TOKEN: (b'old token', REG_BINARY)}
+    backend = LossyBackend(entries=before)
+    report = {}
+    with pytest.raises(RegistryWriteError):
+        backend.write(account_values(1), report)
+    assert report['rolled_back']
+    assert backend.entries == before
+
+
+def test_failed_write_is_rolled_back():
+    before = {LIVE_TOKEN: (b'old token', REG_BINARY), MEMBER_VALUE: (b'old member', REG_BINARY)}
+    backend = FailingBackend(entries=before)
+    with pytest.raises(PermissionError):
+        backend.write({'extra': 'written before the failure', **account_values(1)})
+    assert backend.entries == before
+
+
+def test_missing_key_is_not_created():
+    backend = MemoryBackend(exists=False)
+    assert backend.snapshot() is None
+    with pytest.raises(FileNotFoundError):
+        backend.write(account_values(1))
+
+
+def test_file_backend_persists_raw_values(tmp_path):
+    registry_file = tmp_path / 'registry.json'
+    backend = create_backend(spec=f'file:{registry_file}')
+    assert isinstance(backend, FileBackend)
+    assert backend.snapshot() is None
+
+    backend.set_value('unrelated', 5, REG_DWORD)
+    backend.write(account_values(1))
+
+    snapshot = FileBackend(registry_file).snapshot()
+    assert raw_values(snapshot) == raw_values(account_values(1))
+    assert FileBackend(registry_file).entries == {}
+    assert 'unrelated' in registry_file.read_text(encoding='utf-8')
+
+
+def test_change_notifications():
+    backend = MemoryBackend()
+    assert not backend.wait_for_change(0)
+    backend.write(account_values(1))
+    assert backend.wait_for_change(0)
+    backend.write(account_values(1))
+    assert not backend.wait_for_change(0)
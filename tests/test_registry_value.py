@@ -0,0 +1,54 @@
+import json
+
+import pytest
+
+from registry_value import (RegistryValue, REG_BINARY, REG_DWORD, REG_SZ, value_hook, value_raw, value_text,
+                            value_type)
+
+
+@pytest.mark.parametrize('raw', [b'', b'\x00', b'\xff\xfe\x00abc\x00\x00', bytes(range(256))])
+def test_binary_round_trips_through_json(raw):
+    value = RegistryValue.from_raw(raw, REG_BINARY)
+    loaded = json.loads(json.dumps(value), object_hook=value_hook)
+    assert type(loaded) is RegistryValue
+    assert loaded == value
+    assert loaded.raw == raw
+    assert value_type(loaded) == REG_BINARY
+
+
+def test_empty_binary_from_winreg():
+    value = RegistryValue.from_raw(None, REG_BINARY)
+    assert value.raw == b''
+    assert value.text == ''
+
+
+def test_text_drops_nul_padding_and_bad_bytes():
+    value = RegistryValue.from_raw(b'a|b\xff|c\x00\x00', REG_BINARY)
+    assert value.text == 'a|b|c'
+    assert value_text(value) == 'a|b|c'
+
+
+def test_other_types_keep_their_data():
+    dword = RegistryValue.from_raw(7, REG_DWORD)
+    assert dword == {'data': 7, 'type': REG_DWORD}
+    assert dword.raw == 7
+    assert dword.text == '7'
+    text = RegistryValue.from_raw('hello\x00', REG_SZ)
+    assert text.raw == 'hello\x00'
+    assert text.text == 'hello'
+
+
+def test_earlier_versions_write_back_their_text():
+    legacy = {'data': 'token|text', 'type': REG_BINARY}
+    assert value_raw(legacy) == b'token|text'
+    assert value_text(legacy) == 'token|text'
+    assert value_raw('bare\x00') == b'bare\x00'
+    assert value_text('bare\x00') == 'bare'
+    assert value_type('bare') == REG_BINARY
+    assert value_raw(None) == b''
+
+
+def test_hook_leaves_other_objects_alone():
+    data = json.loads('{"_config": {"language": "en"}, "a": {"type": 3, "data": "x"}}', object_hook=value_hook)
+    assert type(data['_config']) is dict
+    assert type(data['a']) is RegistryValue
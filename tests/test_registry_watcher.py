@@ -0,0 +1,64 @@
+import time
+import queue
+
+from registry_backend import MemoryBackend
+from registry_watcher import RegistryWatcher
+from conftest import TOKEN_VALUE, account_values, raw_values
+
+
+class PollingBackend(MemoryBackend):
+    """A backend without change notifications, like winreg without ctypes."""
+
+    def wait_for_change(self, timeout):
+        return None
+
+
+def start_watcher(backend, **kwargs):
+    snapshots = queue.Queue()
+    watcher = RegistryWatcher(backend, snapshots.put, **kwargs)
+    watcher.start()
+    return watcher, snapshots
+
+
+def test_burst_of_changes_is_one_callback():
+    backend = MemoryBackend()
+    watcher, snapshots = start_watcher(backend, poll_interval=0.5, debounce=0.1)
+    try:
+        for i in range(5):
+            backend.write(account_values(i))
+        snapshot = snapshots.get(timeout=5)
+        assert raw_values(snapshot) == raw_values(account_values(4))
+        assert snapshots.empty()
+    finally:
+        watcher.stop()
+        watcher.thread.join(5)
+
+
+def test_notification_without_a_change_is_ignored():
+    backend = MemoryBackend()
+    backend.write(account_values(1))
+    watcher, snapshots = start_watcher(backend, poll_interval=0.5, debounce=0.05)
+    try:
+        backend.notify_change()
+        backend.write(account_values(1))
+        time.sleep(0.3)
+        assert snapshots.empty()
+        backend.set_value(TOKEN_VALUE, account_values(2)[TOKEN_VALUE].raw)
+        assert raw_values(snapshots.get(timeout=5)) == raw_values(account_values(2))
+    finally:
+        watcher.stop()
+        watcher.thread.join(5)
+
+
+def test_polls_without_notifications():
+    backend = PollingBackend(exists=False)
+    watcher, snapshots = start_watcher(backend, poll_interval=0.05)
+    try:
+        backend.set_value(TOKEN_VALUE, b'a|b|c|d|1|2')
+        assert snapshots.get(timeout=5)[TOKEN_VALUE].raw == b'a|b|c|d|1|2'
+        backend.exists = False
+        assert snapshots.get(timeout=5) is None
+    finally:
+        watcher.stop()
+        watcher.thread.join(5)
+    assert not watcher.thread.is_alive()
@@ -0,0 +1,79 @@
+import pytest
+
+from account_store import create_store
+from sqlite_store import SqliteAccountStore, StoredValues
+from conftest import account_values, odd_values, raw_values
+
+
+def test_seeded_from_accounts_json(seeded_json, monkeypatch):
+    monkeypatch.delenv('BD2_ACCOUNT_STORE', raising=False)
+    store = create_store(seeded_json, spec='sqlite')
+    config, accounts = store.load()
+    assert config == {'language': 'en'}
+    assert list(accounts) == ['account0', 'account1', 'account2']
+    assert raw_values(accounts['account2']) == raw_values(account_values(2))
+    assert store.tags == {'account1': ['main']}
+    store.close()
+
+    # Picked by its file on the next start.
+    store = create_store(seeded_json)
+    assert isinstance(store, SqliteAccountStore)
+    store.close()
+
+
+def test_failed_import_is_a_load_error(tmp_path):
+    data_file = tmp_path / 'accounts.json'
+    data_file.write_text('{"a": {broken', encoding='utf-8')
+    store = SqliteAccountStore(tmp_path / 'accounts.db', import_file=data_file)
+    assert store.load_config() == {}
+    with pytest.raises(ValueError):
+        store.load()
+    assert not (tmp_path / 'accounts.db').exists()
+
+
+def test_values_round_trip_exactly(tmp_path):
+    store = SqliteAccountStore(tmp_path / 'accounts.db')
+    store.load()
+    store.put('odd', odd_values())
+    store.rename('odd', 'renamed')
+    store.close()
+
+    store = SqliteAccountStore(tmp_path / 'accounts.db')
+    _, accounts = store.load()
+    assert isinstance(accounts['renamed'], StoredValues)
+    assert raw_values(accounts['renamed']) == raw_values(odd_values())
+    store.close()
+
+
+def test_list_columns_come_without_values(tmp_path):
+    store = SqliteAccountStore(tmp_path / 'accounts.db')
+    store.load()
+    store.put('a', account_values(1))
+    store.close()
+
+    store = SqliteAccountStore(tmp_path / 'accounts.db')
+    _, accounts = store.load()
+    values = accounts['a']
+    assert values.info['platform'] == 'google'
+    assert values.prefix == '00000001|ab|cd|ef'
+    assert values.values is None
+    store.close()
+
+
+def test_mutations_keep_order_tags_and_ids(tmp_path):
+    store = SqliteAccountStore(tmp_path / 'accounts.db')
+    store.load()
+    for i in range(3):
+        store.put(f'a{i}', account_values(i))
+    store.tag_many(['a0', 'a2'], 'main')
+    store.rename('a0', 'z')
+    store.delete_many(['a1'])
+    store.put('a2', account_values(9))
+    store.close()
+
+    store = SqliteAccountStore(tmp_path / 'accounts.db')
+    _, accounts = store.load()
+    assert list(accounts) == ['a2', 'z']
+    assert store.tags == {'a2': ['main'], 'z': ['main']}
+    assert raw_values(accounts['a2']) == raw_values(account_values(9))
+    store.close()
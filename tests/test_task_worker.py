@@ -0,0 +1,60 @@
+import threading
+
+from task_worker import SerialWorker
+
+
+def test_results_arrive_on_drain_in_order():
+    worker = SerialWorker()
+    done = []
+    for i in range(5):
+        worker.submit(lambda i=i: i * 2, done.append)
+    assert worker.flush(timeout=5)
+    assert done == []
+    worker.drain()
+    assert done == [0, 2, 4, 6, 8]
+    assert not worker.busy()
+
+
+def test_errors_go_to_on_error():
+    worker = SerialWorker()
+    errors = []
+    worker.submit(lambda: 1 / 0, on_error=errors.append)
+    worker.flush(timeout=5)
+    worker.drain()
+    assert isinstance(errors[0], ZeroDivisionError)
+
+
+def test_waiting_jobs_with_a_key_coalesce():
+    worker = SerialWorker()
+    release = threading.Event()
+    ran = []
+    worker.submit(release.wait)
+    assert worker.submit(lambda: ran.append('first'), key='save')
+    worker.submit(lambda: ran.append('other'), key='other')
+    assert not worker.submit(lambda: ran.append('second'), key='save')
+    assert not worker.submit(lambda: ran.append('third'), key='save')
+    release.set()
+    worker.flush(timeout=5)
+    # The replaced job keeps its place in the queue.
+    assert ran == ['third', 'other']
+
+    # Once a keyed job has started, the same key queues a new one.
+    started = threading.Event()
+    release.clear()
+    worker.submit(lambda: (started.set(), release.wait()), key='save')
+    started.wait(5)
+    assert worker.submit(lambda: ran.append('after'), key='save')
+    release.set()
+    worker.flush(timeout=5)
+    assert ran[-1] == 'after'
+
+
+def test_notify_runs_after_each_job():
+    notified = threading.Semaphore(0)
+    worker = SerialWorker(notify=notified.release)
+    worker.submit(lambda: 1)
+    worker.submit(lambda: 2)
+    # notify fires after the job's result is queued, so drain() sees it.
+    assert notified.acquire(timeout=5)
+    assert notified.acquire(timeout=5)
+    assert worker.completed.qsize() == 2
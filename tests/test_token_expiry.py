@@ -0,0 +1,63 @@
+from token_expiry import ExpiryScheduler, DEFAULT_STALE_HOURS, stale_at
+
+HOUR = 3600
+
+
+def infos(**token_seconds):
+    return {name: {'token_ts': None if seconds is None else seconds * 1000} for name, seconds in token_seconds.items()}
+
+
+def test_accounts_go_stale_in_token_order():
+    scheduler = ExpiryScheduler(infos(a=2 * HOUR, b=0, c=None))
+    assert scheduler.next_due() == DEFAULT_STALE_HOURS * HOUR
+    assert scheduler.advance(DEFAULT_STALE_HOURS * HOUR - 1) == []
+    assert scheduler.advance(DEFAULT_STALE_HOURS * HOUR) == ['b']
+    assert scheduler.next_due() == (DEFAULT_STALE_HOURS + 2) * HOUR
+    assert scheduler.advance(10 ** 9) == ['a']
+    assert scheduler.stale == {'a', 'b'}
+    assert scheduler.next_due() is None
+
+
+def test_changes_reschedule_without_stale_entries():
+    scheduler = ExpiryScheduler(infos(a=0, b=HOUR), stale_after=HOUR)
+    scheduler.advance(HOUR)
+    assert scheduler.stale == {'a'}
+
+    # A refreshed token leaves `stale` and its old heap entry is skipped.
+    scheduler.add('a', {'token_ts': 5 * HOUR * 1000})
+    scheduler.add('b', {'token_ts': 3 * HOUR * 1000})
+    assert scheduler.stale == set()
+    assert scheduler.next_due() == 4 * HOUR
+    scheduler.remove('b')
+    assert scheduler.next_due() == 6 * HOUR
+    assert scheduler.advance(10 * HOUR) == ['a']
+
+
+def test_rename_keeps_state():
+    scheduler = ExpiryScheduler(infos(a=0, b=HOUR), stale_after=HOUR)
+    scheduler.advance(HOUR)
+    scheduler.rename('a', 'x')
+    scheduler.rename('b', 'y')
+    scheduler.rename('missing', 'z')
+    assert scheduler.stale == {'x'}
+    assert scheduler.advance(2 * HOUR) == ['y']
+    assert set(scheduler.token_ts) == {'x', 'y'}
+
+
+def test_changing_the_threshold_reschedules():
+    scheduler = ExpiryScheduler(infos(a=0, b=HOUR), stale_after=HOUR)
+    scheduler.advance(HOUR)
+    scheduler.set_stale_after(3 * HOUR)
+    assert scheduler.stale == set()
+    assert scheduler.next_due() == stale_at(0, 3 * HOUR)
+
+
+def test_heap_is_rebuilt_when_dead_entries_pile_up():
+    scheduler = ExpiryScheduler()
+    for i in range(200):
+        scheduler.add('a', {'token_ts': i * 1000})
+    for i in range(100):
+        scheduler.add(f'n{i}', {'token_ts': i * 1000})
+        scheduler.remove(f'n{i}')
+    assert len(scheduler.heap) <= 2 * len(scheduler.due) + 64
+    assert scheduler.next_due() == 199 + scheduler.stale_after
@@ -0,0 +1,44 @@
+import json
+from pathlib import Path
+
+from translator import Translator, compile_template, render_template
+
+TRANSLATIONS = {
+    'en': {'title': 'Switcher', 'saved': 'Saved {0} as {1}', 'only_en': 'English'},
+    'zh': {'title': '切换器', 'saved': '已将{1}保存为{0}'},
+}
+
+
+def test_lookup_and_placeholders():
+    tr = Translator(TRANSLATIONS, 'en')
+    assert tr('title') == 'Switcher'
+    assert tr('saved', 'a', 'b') == 'Saved a as b'
+    assert tr('saved', 'a') == 'Saved a as {1}'
+    assert tr('missing') == 'missing'
+
+
+def test_switching_reuses_compiled_templates():
+    tr = Translator(TRANSLATIONS, 'en')
+    english = tr.templates
+    tr.set_language('zh')
+    assert tr('saved', 'a', 'b') == '已将b保存为a'
+    assert tr('only_en') == 'only_en'
+    tr.set_language('en')
+    assert tr.templates is english
+    assert tr.lang == 'en'
+
+
+def test_templates():
+    assert compile_template('plain') == 'plain'
+    assert compile_template('{0} and {1}') == ('', 0, ' and ', 1, '')
+    assert render_template(compile_template('{1}{0}'), (1, 2)) == '21'
+
+
+def test_shipped_translations_render_like_format():
+    all_translations = json.loads((Path(__file__).resolve().parent.parent / 'translations.json')
+                                  .read_text(encoding='utf-8'))
+    args = ('x', 'y', 'z')
+    for lang, texts in all_translations.items():
+        tr = Translator(all_translations, lang)
+        for key, text in texts.items():
+            assert tr(key, *args) == text.format(*args), (lang, key)
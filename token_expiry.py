@@ -0,0 +1,98 @@
+import heapq
+
+
+# The game rotates access tokens about every 12 hours.
+DEFAULT_STALE_HOURS = 12
+
+
+def stale_at(token_ts, stale_after):
+    # token_ts is the issue time in milliseconds, as parsed from the token.
+    if token_ts is None:
+        return None
+    return token_ts / 1000 + stale_after
+
+
+class ExpiryScheduler:
+    """Saved accounts in a min-heap ordered by when their token goes stale.
+
+    advance(now) pops the accounts whose token crossed `stale_after` seconds
+    since it was issued and moves them into `stale`; next_due() is the only
+    time a caller needs to wake up for. Changing an account pushes a fresh
+    entry instead of searching the heap: `due` holds each pending account's
+    current time and entries that no longer match it are skipped when they
+    reach the top. Accounts without a token timestamp are never scheduled.
+    """
+
+    def __init__(self, infos=None, stale_after=DEFAULT_STALE_HOURS * 3600):
+        self.stale_after = stale_after
+        self.token_ts = {}
+        self.due = {}
+        self.stale = set()
+        self.heap = []
+        for name, info in (infos or {}).items():
+            self.token_ts[name] = info['token_ts']
+        self.reschedule()
+
+    def reschedule(self):
+        self.due = {}
+        self.stale.clear()
+        for name, token_ts in self.token_ts.items():
+            due = stale_at(token_ts, self.stale_after)
+            if due is not None:
+                self.due[name] = due
+        self.heap = [(due, name) for name, due in self.due.items()]
+        heapq.heapify(self.heap)
+
+    def set_stale_after(self, stale_after):
+        if stale_after != self.stale_after:
+            self.stale_after = stale_after
+            self.reschedule()
+
+    def add(self, name, info):
+        self.remove(name)
+        token_ts = self.token_ts[name] = info['token_ts']
+        due = stale_at(token_ts, self.stale_after)
+        if due is not None:
+            self.due[name] = due
+            heapq.heappush(self.heap, (due, name))
+
+    def remove(self, name):
+        self.token_ts.pop(name, None)
+        self.due.pop(name, None)
+        self.stale.discard(name)
+        # Dead entries are dropped lazily; rebuild once they dominate.
+        if len(self.heap) > 64 and len(self.heap) > 2 * len(self.due):
+            self.heap = [(due, name) for name, due in self.due.items()]
+            heapq.heapify(self.heap)
+
+    def rename(self, old_name, new_name):
+        if old_name not in self.token_ts:
+            return
+        stale = old_name in self.stale
+        self.add(new_name, {'token_ts': self.token_ts[old_name]})
+        self.remove(old_name)
+        if stale:
+            self.due.pop(new_name, None)
+            self.stale.add(new_name)
+
+    def discard_dead(self):
+        heap = self.heap
+        while heap and self.due.get(heap[0][1]) != heap[0][0]:
+            heapq.heappop(heap)
+
+    def advance(self, now):
+        """Moves accounts whose token went stale by `now` to `stale` and returns them."""
+        crossed = []
+        heap = self.heap
+        while True:
+            self.discard_dead()
+            if not heap or heap[0][0] > now:
+                return crossed
+            _, name = heapq.heappop(heap)
+            del self.due[name]
+            self.stale.add(name)
+            crossed.append(name)
+
+    def next_due(self):
+        self.discard_dead()
+        return self.heap[0][0] if self.heap else None
@@ -0,0 +1,55 @@
+import re
+
+
+PLACEHOLDER = re.compile(r'\{(\d+)\}')
+
+
+def compile_template(text):
+    # A text without placeholders stays a plain string; otherwise the split
+    # alternates literal chunks and argument indices: ('a ', 0, ' b').
+    parts = PLACEHOLDER.split(text)
+    if len(parts) == 1:
+        return text
+    return tuple(int(part) if i % 2 else part for i, part in enumerate(parts))
+
+
+def render_template(template, args):
+    if isinstance(template, str):
+        return template
+    out = []
+    for i, part in enumerate(template):
+        if not i % 2:
+            out.append(part)
+        elif part < len(args):
+            out.append(str(args[part]))
+        else:
+            out.append(f'{{{part}}}')
+    return ''.join(out)
+
+
+class Translator:
+    """Looks up translation keys for one language at a time.
+
+    Each language's texts are compiled once, on first use, so tr() is a
+    dict lookup plus a join; switching back to a language reuses its
+    compiled templates.
+    """
+
+    def __init__(self, all_translations, lang):
+        self.all_translations = all_translations
+        self.compiled = {}
+        self.set_language(lang)
+
+    def set_language(self, lang):
+        templates = self.compiled.get(lang)
+        if templates is None:
+            templates = {key: compile_template(text) for key, text in self.all_translations[lang].items()}
+            self.compiled[lang] = templates
+        self.lang = lang
+        self.templates = templates
+
+    def __call__(self, key, *args):
+        template = self.templates.get(key)
+        if template is None:
+            return key
+        return render_template(template, args)